@@ -0,0 +1,74 @@
+def get_candle_signature(values, last=-1):
+    """
+    changes whenever a candle is added / dropped or the candle at last is updated
+    :param values: candle DataFrame as an array (candles.to_numpy()), timestamp is the first column
+    :param last: -1 for the live candle, -2 for the last closed candle
+    """
+    if len(values) < -last:
+        return (0,)
+
+    return (len(values), values[0, 0], *values[last].tolist())
+
+
+class IndicatorCache:
+    """
+    Memoizes run_ta results per (key, timeframe) until the timeframe's candles change
+
+    Results are keyed by (indicator name, candle period) so strategies that reference the same indicator share one
+    calculation, entries are dropped as soon as the candle signature changes.
+    Results on the closed candles alone are kept separately, they only change when a candle closes
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._closed_entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ----
+    def get_results(self, key, timeframe, values):
+        """
+        :param values: candle DataFrame as an array, see get_candle_signature
+        :return: dict of cached results for these candles, run_ta fills in anything missing
+        """
+        signature = get_candle_signature(values)
+        entry = self._entries.get((key, timeframe))
+
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        results = {}
+        self._entries[(key, timeframe)] = (signature, results)
+        return results
+
+    # --
+    def get_closed_results(self, key, timeframe, values):
+        """
+        :return: dict of cached results calculated without the live candle
+        """
+        signature = get_candle_signature(values, last=-2)
+        entry = self._closed_entries.get((key, timeframe))
+
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        results = {}
+        self._closed_entries[(key, timeframe)] = (signature, results)
+        return results
+
+    # ----
+    def clear(self):
+        self._entries = {}
+        self._closed_entries = {}
+
+
+if __name__ == '__main__':
+    from utils.CandleTools import candles_to_df
+
+    cache = IndicatorCache()
+    candles = candles_to_df([[1535455200000 + i * 300000, 1, 2, 0.5, 1.5, 100] for i in range(50)])
+
+    cache.get_results('ADA/ETH', '5m', candles.to_numpy())['RSI', 14] = 'cached'
+    print(cache.get_results('ADA/ETH', '5m', candles.to_numpy()), cache.hits, cache.misses)
@@ -0,0 +1,186 @@
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+
+# initial row / column capacity, doubled whenever it runs out
+INITIAL_PAIRS = 64
+INITIAL_INDICATORS = 16
+
+
+class PairStatistics(Mapping):
+    """
+    One pair's row of a StatisticsStore, read like the old {statistic name: array} dict
+    values are the last window values, oldest first, so negative / len() based indexing works as before
+    """
+
+    __slots__ = ('store', 'pair_id')
+
+    def __init__(self, store, pair_id):
+        self.store = store
+        self.pair_id = pair_id
+
+    def __getitem__(self, name):
+        store = self.store
+        indicator_id = store.indicator_ids[name]
+        if not store.present[self.pair_id, indicator_id]:
+            raise KeyError(name)
+
+        return store.data[self.pair_id, indicator_id]
+
+    def __iter__(self):
+        present = self.store.present[self.pair_id]
+        return (name for name, indicator_id in self.store.indicator_ids.items() if present[indicator_id])
+
+    def __len__(self):
+        return int(self.store.present[self.pair_id, :len(self.store.indicator_ids)].sum())
+
+
+# =============================
+class StatisticsStore(Mapping):
+    """
+    Tail of every indicator output for every pair, in one (pair, indicator, window) array
+
+    Conditions only look at the last value and at most cross_candles / change_over candles back,
+    so only window values are kept instead of the full history run_ta returns.
+    store[pair] is a PairStatistics view, pair / indicator ids can be used directly with get_tail / get_last
+
+    Updates run on the trader thread, indicator ids are also handed out to strategies compiled on other threads
+    (see Condition.compile), id allocation and anything that reallocates the arrays holds the lock.
+    Other threads (GUI, state channel) read through to_records, which holds it too: an update clears a pair's
+    row before refilling it
+    """
+
+    def __init__(self, window=2):
+        """
+        :param window: values kept per indicator, see Config.statistics_window
+        """
+        self.window = max(1, int(window))
+        self.pair_ids = {}
+        self.indicator_ids = {}
+        self.data = np.full((INITIAL_PAIRS, INITIAL_INDICATORS, self.window), np.nan)
+        self.present = np.zeros((INITIAL_PAIRS, INITIAL_INDICATORS), dtype=bool)
+        self._lock = threading.Lock()
+
+    # ----
+    def __getitem__(self, pair):
+        return PairStatistics(self, self.pair_ids[pair])
+
+    def __iter__(self):
+        return iter(self.pair_ids)
+
+    def __len__(self):
+        return len(self.pair_ids)
+
+    # ----
+    def get_pair_id(self, pair):
+        pair_id = self.pair_ids.get(pair)
+        if pair_id is None:
+            pair_id = self.pair_ids[pair] = len(self.pair_ids)
+            if pair_id >= self.data.shape[0]:
+                self._resize(pair_id * 2, self.data.shape[1], self.window)
+
+        return pair_id
+
+    # --
+    def get_indicator_id(self, name):
+        indicator_id = self.indicator_ids.get(name)
+        if indicator_id is None:
+            with self._lock:
+                indicator_id = self._get_indicator_id(name)
+
+        return indicator_id
+
+    def _get_indicator_id(self, name):
+        indicator_id = self.indicator_ids.get(name)
+        if indicator_id is None:
+            indicator_id = self.indicator_ids[name] = len(self.indicator_ids)
+            if indicator_id >= self.data.shape[1]:
+                self._resize(self.data.shape[0], indicator_id * 2, self.window)
+
+        return indicator_id
+
+    # ----
+    def _resize(self, pairs, indicators, window):
+        # existing values are kept right aligned, the newest value is always last
+        data = np.full((pairs, indicators, window), np.nan)
+        present = np.zeros((pairs, indicators), dtype=bool)
+
+        kept = min(window, self.window)
+        old_pairs, old_indicators = self.present.shape
+        data[:old_pairs, :old_indicators, window - kept:] = self.data[:, :, self.window - kept:]
+        present[:old_pairs, :old_indicators] = self.present
+
+        self.data = data
+        self.present = present
+        self.window = window
+
+    # ----
+    def set_window(self, window):
+        """
+        change the values kept per indicator. a longer window is back filled by the next update
+        """
+        window = max(1, int(window))
+        if window != self.window:
+            with self._lock:
+                self._resize(*self.present.shape, window)
+
+    # ----
+    def update(self, pair, statistics):
+        """
+        :param statistics: {statistic name: array}, as returned by run_ta. replaces everything stored for pair
+        """
+        with self._lock:
+            pair_id = self.get_pair_id(pair)
+            window = self.window
+
+            indicator_ids = [self._get_indicator_id(name) for name in statistics]
+            row = self.data[pair_id]
+            present = self.present[pair_id]
+            present[:] = False
+
+            for indicator_id, values in zip(indicator_ids, statistics.values()):
+                tail = values[-window:]
+                count = len(tail)
+                row[indicator_id, :window - count] = np.nan
+                row[indicator_id, window - count:] = tail
+                present[indicator_id] = True
+
+    # ----
+    def remove(self, pair):
+        pair_id = self.pair_ids.get(pair)
+        if pair_id is not None:
+            self.present[pair_id] = False
+
+    # ----
+    def get_tail(self, pair_id, indicator_id):
+        return self.data[pair_id, indicator_id]
+
+    def get_last(self, pair_id, indicator_id, lookback=0):
+        return float(self.data[pair_id, indicator_id, self.window - 1 - lookback])
+
+    # ----
+    def to_records(self):
+        """
+        :return: [{'symbol': pair, statistic name: last value}], for the GUI
+        """
+        with self._lock:
+            last = self.data[:, :, -1]
+            records = []
+            for pair, pair_id in self.pair_ids.items():
+                record = {'symbol': pair}
+                present = self.present[pair_id]
+                for name, indicator_id in self.indicator_ids.items():
+                    if present[indicator_id]:
+                        record[name] = float(last[pair_id, indicator_id])
+                records.append(record)
+
+        return records
+
+
+if __name__ == '__main__':
+    store = StatisticsStore(window=3)
+    store.update('ADA/ETH', {'RSI_14_5m': np.arange(100.0), 'MFI_30_5m': np.array([1.0, 2.0])})
+
+    print(dict(store['ADA/ETH']))
+    print(store.get_last(0, store.get_indicator_id('RSI_14_5m'), lookback=2), store.to_records())
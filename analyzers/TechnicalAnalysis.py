@@ -1,3 +1,4 @@
+import functools
 import pickle
 import talib as ta
 from talib import abstract
@@ -5,8 +6,22 @@ import pandas as pd
 from talib.abstract import *
 
 import sys
+import threading
 import numpy as np
 
+TA_FUNCTIONS = frozenset(ta.get_functions())
+
+# the live candle's value is recalculated from a tail of at least this many candles...
+MIN_LIVE_WINDOW = 64
+# ...or this many times the indicator's lookback, long enough for smoothed (EMA / Wilder) indicators to converge
+LIVE_WINDOW_LOOKBACKS = 10
+# with a cache, histories longer than this many live windows keep closed candle results and only recalculate the
+# live candle. the engine holds 300-500 candles per timeframe, with direct TA-Lib calls the split pays off from
+# about 1.5 windows (measured on RSI / EMA / MACD / BBANDS / MFI)
+LIVE_SPLIT_MIN_WINDOWS = 1.5
+
+CANDLE_INPUTS = frozenset(('open', 'high', 'low', 'close', 'volume'))
+
 
 def get_output_for_indicator(indicator):
     '''
@@ -22,8 +37,16 @@ def get_output_for_indicator(indicator):
 
 
 def get_inputs(df):
-    df = df.astype(float)
-    o, h, l, c, v = df['open'].values * 100000000, df['high'].values * 100000000, df['low'].values* 100000000, df['close'].values * 100000000, df['volume'].values * 100000000
+    # one conversion for the whole frame, column access on the DataFrame is comparatively slow
+    return scale_inputs(df.to_numpy(dtype=float), df.columns)
+
+
+def scale_inputs(values, columns):
+    """
+    :param values: candle DataFrame as a float array
+    :param columns: the DataFrame's columns
+    """
+    o, h, l, c, v = (values[:, columns.get_loc(name)] * 100000000 for name in ('open', 'high', 'low', 'close', 'volume'))
     # o, h, l, c, v = df['o'].values, df['h'].values, df['l'].values, df[
     #     'c'].values, df['v'].values
     inputs = {
@@ -42,28 +65,98 @@ def append_candle_period(candle_period, indicator):
     return '{}_{}'.format(indicator, candle_period)
 
 
+_thread_state = threading.local()
+
+
+def get_indicator_function(indicator_name, candle_period):
+    """
+    abstract Function objects are expensive to build and keep their parameters between calls,
+    so they're cached per thread and per (name, period)
+    """
+    functions = getattr(_thread_state, 'functions', None)
+    if functions is None:
+        functions = _thread_state.functions = {}
+
+    function = functions.get((indicator_name, candle_period))
+    if function is None:
+        function = functions[(indicator_name, candle_period)] = abstract.Function(indicator_name)
+
+    return function
+
+
+@functools.lru_cache(maxsize=None)
+def get_direct_function(indicator_name):
+    """
+    the abstract API costs ~50us a call, ten times the calculation itself on the candle counts the engine holds
+    :return: (TA-Lib function, candle input names in argument order), None if an input isn't a candle column
+    """
+    input_names = []
+    for names in Function(indicator_name).info['input_names'].values():
+        input_names.extend([names] if isinstance(names, str) else names)
+
+    if not CANDLE_INPUTS.issuperset(input_names):
+        return None
+
+    return getattr(ta, indicator_name), tuple(input_names)
+
+
+def call_indicator(inputs, indicator_name, candle_period):
+    """
+    :return: TA-Lib's result, an array or a list of arrays for multiple outputs
+    """
+    direct = get_direct_function(indicator_name)
+    if direct is None:
+        indicator_calculation = get_indicator_function(indicator_name, candle_period)
+        if candle_period is not None and int(candle_period) > 0:
+            return indicator_calculation(inputs, timeperiod=int(candle_period))
+        return indicator_calculation(inputs)
+
+    function, input_names = direct
+    arrays = [inputs[name] for name in input_names]
+    if candle_period is not None and int(candle_period) > 0:
+        res = function(*arrays, timeperiod=int(candle_period))
+    else:
+        res = function(*arrays)
+
+    return list(res) if isinstance(res, tuple) else res
+
+
+@functools.lru_cache(maxsize=None)
+def is_price_indicator(indicator_name):
+    # price-like outputs are scaled back down after calculation, see get_inputs
+    function_flags = Function(indicator_name).info['function_flags']
+    if function_flags is None:
+        return False
+
+    return 'Output scale same as input' in function_flags or 'MACD' in indicator_name
+
+
+@functools.lru_cache(maxsize=None)
+def get_output_names(indicator_name, candle_period):
+    return tuple(append_candle_period(candle_period, item) for item in get_output_for_indicator(indicator_name))
+
+
 def get_indicators(df, indicator_name, candle_period=0):
+    return calculate_indicator(get_inputs(df), indicator_name, candle_period)
+
+
+def calculate_indicator(inputs, indicator_name, candle_period=0, round_last=True):
+    """
+    :param inputs: scaled candle arrays, see get_inputs. can be shared between indicators on the same candles
+    :param round_last: round the last value of non price-like outputs, off when the last candle isn't the live one
+    :return: list of (output name, array)
+    """
     indicator_name = indicator_name.upper()
-    inputs = get_inputs(df)
-    output_names = get_output_for_indicator(indicator_name)
-    outputs = [append_candle_period(candle_period, item) for item in output_names]
-    indicator_calculation = abstract.Function(indicator_name)
-    if Function(indicator_name).info['function_flags'] is None:
-        is_price = False
-    else:
-        is_price = 'Output scale same as input' in Function(indicator_name).info['function_flags']\
-                   or 'MACD' in indicator_name
+    outputs = get_output_names(indicator_name, candle_period)
+    is_price = is_price_indicator(indicator_name)
 
     if isinstance(candle_period, str) and candle_period == '':
         candle_period=0
     try:
-        if candle_period is not None and int(candle_period) > 0:
-            res = indicator_calculation(inputs, timeperiod=int(candle_period))
-        else:
-            res = indicator_calculation(inputs)
+        res = call_indicator(inputs, indicator_name, candle_period)
 
     except Exception as ex:
-        res = indicator_calculation(inputs)
+        res = call_indicator(inputs, indicator_name, 0)
         print(ex)
 
 
@@ -74,7 +167,7 @@ def get_indicators(df, indicator_name, candle_period=0):
 
         else:
             res /= 100000000
-    else:
+    elif round_last:
         if isinstance(res, list):
             for i in range(len(res)):
                 res[i][len(res[i])-1]= round(res[i][len(res[i])-1], 2)
@@ -88,27 +181,139 @@ def get_indicators(df, indicator_name, candle_period=0):
     return list(zip(outputs,res))
 
 
+@functools.lru_cache(maxsize=None)
+def get_live_window(indicator_name, candle_period):
+    indicator_function = abstract.Function(indicator_name.upper())
+    if candle_period not in (None, '') and int(candle_period) > 0:
+        indicator_function.set_parameters(timeperiod=int(candle_period))
+
+    return max(MIN_LIVE_WINDOW, indicator_function.lookback * LIVE_WINDOW_LOOKBACKS)
+
+
+def calculate_live_indicator(closed_results, inputs, indicator_name, candle_period=0):
+    """
+    closed candles are calculated once and kept in closed_results, only the live (last) candle's value is
+    recalculated, from a tail window of the inputs
+    :param closed_results: dict results on the closed candles are stored in, see IndicatorCache.get_closed_results
+    :param inputs: scaled inputs for every candle including the live one
+    :return: list of (output name, array), same as calculate_indicator
+    """
+    window = get_live_window(indicator_name, candle_period)
+    if len(inputs['close']) <= window * LIVE_SPLIT_MIN_WINDOWS:
+        return calculate_indicator(inputs, indicator_name, candle_period)
+
+    result_key = (indicator_name, candle_period)
+    closed = closed_results.get(result_key)
+    if closed is None:
+        closed_inputs = {name: values[:-1] for name, values in inputs.items()}
+        closed = closed_results[result_key] = calculate_indicator(closed_inputs, indicator_name, candle_period,
+                                                                  round_last=False)
+
+    live_values = calculate_live_values(inputs, indicator_name, candle_period, window)
+
+    return [(name, append_live_value(closed_values, live_value))
+            for (name, closed_values), live_value in zip(closed, live_values)]
+
+
+@functools.lru_cache(maxsize=None)
+def get_live_plan(indicator_name, candle_period):
+    """
+    :return: (function, input names, keyword arguments, is price indicator) for calculate_live_values,
+             None for functions that go through the abstract API
+    """
+    direct = get_direct_function(indicator_name)
+    if direct is None:
+        return None
+
+    function, input_names = direct
+    period = int(candle_period) if candle_period not in (None, '') else 0
+    # periods are only passed to functions that take one, as calculate_indicator's retry would
+    kwargs = {'timeperiod': period} if period > 0 and 'timeperiod' in Function(indicator_name).parameters else {}
+    return function, input_names, kwargs, is_price_indicator(indicator_name)
+
 
-def run_ta(candlesticks, indicators):
+def calculate_live_values(inputs, indicator_name, candle_period, window):
+    """
+    the last value of each output, calculated on the last window candles
+    direct TA-Lib functions skip calculate_indicator, its per call overhead is most of the cost on a short window
+    """
+    plan = get_live_plan(indicator_name.upper(), candle_period)
+    if plan is None:
+        live = calculate_indicator({name: values[-window:] for name, values in inputs.items()},
+                                   indicator_name, candle_period)
+        return [values[-1] for _, values in live]
+
+    function, input_names, kwargs, is_price = plan
+    res = function(*[inputs[name][-window:] for name in input_names], **kwargs)
+    last_values = [float(part[-1]) for part in res] if isinstance(res, tuple) else [float(res[-1])]
+
+    if is_price:
+        return [value / 100000000 for value in last_values]
+    return [round(value, 2) for value in last_values]
+
+
+def append_live_value(closed_values, live_value):
+    # a fresh array, earlier results keep their live value. cheaper than np.append
+    values = np.empty(len(closed_values) + 1)
+    values[:-1] = closed_values
+    values[-1] = live_value
+    return values
+
+
+def uses_timeframe(indicator, timeframe):
+    # indicators without a timeframe list (older callers) are calculated on every timeframe
+    timeframes = indicator.get('timeframes')
+    return not timeframes or timeframe in timeframes
+
+
+def run_ta(candlesticks, indicators, cache=None, cache_key=None):
     '''
     Runs calculation for each indicator and sets the value
     in the Pair attributes
     this is called every time the websocket tics
-    :param pair:
+    only (indicator, period, timeframe) combinations a strategy references are calculated, see Config.indicators
+    :param candlesticks: {timeframe: candle DataFrame}
+    :param indicators: list of {'name', 'candle_period', 'timeframes'}
+    :param cache: IndicatorCache, results are reused until the timeframe's candles change. closed candles are
+                  only calculated once per candle close, see calculate_live_indicator
+    :param cache_key: cache namespace, ie the pair symbol
     '''
     stats = {}
     for key in candlesticks:
-        for indicator in indicators:
-            if indicator['name'] in ta.get_functions():
-                # try:
-                inds = get_indicators(candlesticks[key], indicator['name'],candle_period= indicator['candle_period'])
-                # except Exception as ex:
-                #     print(ex)
-                #     continue
-                for k, v in inds:
-                    stats.update({k + '_'+key: v})
+        plan = [indicator for indicator in indicators
+                if indicator['name'] in TA_FUNCTIONS and uses_timeframe(indicator, key)]
+        if not plan:
+            continue
+
+        candles = candlesticks[key]
+        values = candles.to_numpy(dtype=float)
+        results = cache.get_results(cache_key, key, values) if cache is not None else {}
+        split_live = cache is not None
+        closed_results = None
+        inputs = None
+
+        for indicator in plan:
+            result_key = (indicator['name'], indicator['candle_period'])
+            inds = results.get(result_key)
+
+            if inds is None:
+                # scaled inputs are shared by every indicator on this timeframe
+                if inputs is None:
+                    inputs = scale_inputs(values, candles.columns)
+
+                if split_live:
+                    if closed_results is None:
+                        closed_results = cache.get_closed_results(cache_key, key, values)
+                    inds = calculate_live_indicator(closed_results, inputs, indicator['name'],
+                                                    candle_period=indicator['candle_period'])
+
+                else:
+                    inds = calculate_indicator(inputs, indicator['name'], candle_period=indicator['candle_period'])
 
+                results[result_key] = inds
 
+            for k, v in inds:
+                stats[k + '_' + key] = v
 
     return stats
 
@@ -0,0 +1,104 @@
+from exchanges.PaperBinance import PaperBinance
+
+# order book depth reported at the simulated price, large enough that any order fills in one level
+DEPTH_AMOUNT = 1e12
+
+
+class BacktestExchange(PaperBinance):
+    """
+    Paper exchange driven by a Backtester instead of sockets / REST
+
+    - no client connections are made
+    - the clock (get_time) is the simulated time set by the Backtester
+    - the order book is a single level at the simulated ask / bid, fills and fees are the same as PaperBinance
+    - a sell that closes a position resets its cost, so a run's next position doesn't start with the last one's
+      realised gain / loss (live paper trading keeps PaperBinance's accounting)
+    """
+
+    def __init__(self, quote_currency, starting_balance, candle_timeframes, min_cost=0.0):
+        super().__init__('binance', quote_currency, starting_balance, {'public': '', 'secret': ''},
+                         candle_timeframes)
+        self.min_cost = min_cost
+        self.sim_time = 0
+        self.candle_errors = 0
+
+    # ----
+    def _init_client_connection(self):
+        pass
+
+    # ----
+    def add_pair(self, symbol):
+        """
+        list a market on the exchange, done by the Backtester once a symbol has history
+        """
+        base, quote = symbol.split('/')
+        self.pairs[symbol] = {
+            'symbol': symbol,
+            'base': base,
+            'quote': quote,
+            'active': True,
+            'limits': {'amount': {'min': 0, 'max': None},
+                       'price': {'min': 0, 'max': None},
+                       'cost': {'min': self.min_cost, 'max': None}},
+            'total': 0,
+            'amount': 0,
+            'total_cost': 0,
+            'avg_price': None,
+            'dca_level': 0,
+            'last_order_time': 0,
+            'trades': [],
+            'last_id': 0,
+            'last_depth_check': 0,
+            'percentage': 0,
+        }
+        self.candles[symbol] = {}
+        return self.pairs[symbol]
+
+    # ----
+    def get_time(self):
+        return self.sim_time
+
+    # ----
+    def get_depth(self, symbol, side):
+        pair = self.pairs[symbol]
+        price = pair['ask'] if side.upper() == 'BUY' else pair['bid']
+        return [[price, DEPTH_AMOUNT]]
+
+    # ----
+    def place_order(self, symbol, order_type, side, amount, price):
+        order = super().place_order(symbol, order_type, side, amount, price)
+        order['timestamp'] = order['lastTradeTimestamp'] = self.sim_time * 1000
+
+        pair = self.pairs[symbol]
+        if side == 'sell' and pair['total'] <= 0:
+            pair['total'] = 0
+            pair['total_cost'] = 0
+            pair['avg_price'] = None
+
+        return order
+
+    # ----
+    def reload_single_candle_history(self, symbol):
+        # history is fixed, count the failure so it shows up in the results
+        self.candle_errors += 1
+
+    def reload_candles(self):
+        pass
+
+    def update_balances(self):
+        pass
+
+    def save(self):
+        pass
+
+    def load(self):
+        pass
+
+
+if __name__ == '__main__':
+    ex = BacktestExchange('ETH', 1, ['5m'], min_cost=0.01)
+    ex.add_pair('ADA/ETH').update({'close': 0.0004, 'bid': 0.0004, 'ask': 0.0004})
+    ex.sim_time = 1535455200
+
+    print(ex.place_order('ADA/ETH', 'limit', 'buy', 1000, 0.0004))
+    print(ex.pairs['ADA/ETH']['total'], ex.balance)
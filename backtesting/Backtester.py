@@ -0,0 +1,382 @@
+"""
+Replays stored OHLCV through the live trading pipeline
+
+Candles are fed one base timeframe candle at a time through the same code the live engine runs:
+run_ta -> Buy/DCABuy/SellCondition.evaluate -> LiquiTrader.handle_possible_*, trading against a BacktestExchange
+
+Indicators are computed once per symbol / timeframe over the whole history with run_ta, every step only slices
+the arrays up to the last candle closed at the simulated time, so larger timeframes never see a candle before it closes.
+quote currency change (quote_change_info) isn't simulated and is always 0
+
+    python -m backtesting.Backtester history.json [starting_balance]
+"""
+import bisect
+import contextlib
+import os
+import time
+
+import numpy as np
+
+from analyzers.TechnicalAnalysis import run_ta
+from backtesting.BacktestExchange import BacktestExchange
+from backtesting.HistoryLoader import load_history, resample_candles, timeframe_to_ms
+from config.GlobalTradeConditions import GlobalTradeConditions
+from config.PairSettingsTable import PairSettingsTable
+from config.config import Config
+from liquitrader import LiquiTrader, ShutdownHandler
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+DEFAULT_GENERAL_SETTINGS = {
+    'trading_enabled': True,
+    'sell_only_mode': False,
+}
+
+DEFAULT_TRADE_CONDITIONS = {
+    'min_buy_balance': 0,
+    'dca_min_buy_balance': 0,
+    'max_pairs': 0,
+    'min_change': 0,
+    'max_change': 0,
+    'max_spread': 0,
+    'dca_timeout': 0,
+    'blacklist': [],
+    'whitelist': [],
+    'min_24h_quote_change': 0,
+    'max_24h_quote_change': 0,
+    'min_1h_quote_change': 0,
+    'max_1h_quote_change': 0,
+    'min_24h_market_change': 0,
+    'max_24h_market_change': 0,
+}
+
+
+# ----
+def make_config(buy_strategies, sell_strategies, dca_buy_strategies=None, global_trade_conditions=None,
+                general_settings=None, pair_specific_settings=None):
+    """
+    build a Config from strategy lists instead of the config files
+    missing global trade conditions / general settings fall back to the permissive defaults above
+    """
+    config = Config()
+    config.buy_strategies = buy_strategies
+    config.sell_strategies = sell_strategies
+    config.dca_buy_strategies = dca_buy_strategies or []
+    config.general_settings = {**DEFAULT_GENERAL_SETTINGS, **(general_settings or {})}
+    config.global_trade_conditions = {**DEFAULT_TRADE_CONDITIONS, **(global_trade_conditions or {})}
+    config.trade_conditions = GlobalTradeConditions(config.global_trade_conditions)
+    config.pair_specific_settings = pair_specific_settings or {}
+    config.pair_settings_table = PairSettingsTable(config.pair_specific_settings)
+
+    for strategies in (config.buy_strategies, config.dca_buy_strategies, config.sell_strategies):
+        config.parse_indicators_from_strategy(strategies)
+
+    return config
+
+
+def load_config():
+    """
+    current config files, with trading forced on so the strategies actually trade
+    """
+    config = Config()
+    config.load_general_settings()
+    config.load_global_trade_conditions()
+    config.load_pair_settings()
+    config.load_all_strategies()
+    config.general_settings.update(DEFAULT_GENERAL_SETTINGS)
+    return config
+
+
+# =============================
+class BacktestTrader(LiquiTrader):
+    """
+    LiquiTrader with statistics supplied by the Backtester and no trade history written to disk
+    """
+
+    def __init__(self, config, exchange):
+        super().__init__(ShutdownHandler())
+        # PairFeed already hands out views into precomputed arrays, copying tails into a StatisticsStore buys nothing
+        self.statistics = {}
+        self.config = config
+        self.exchange = exchange
+        self.timeframes = config.timeframes
+        self.indicators = list(config.indicators.values())
+        self.load_strategies()
+
+    def do_technical_analysis(self):
+        pass
+
+    def save_trade_history(self):
+        pass
+
+
+# =============================
+class PairFeed:
+    """
+    One symbol's precomputed prices / indicators, advanced to the simulated time by the Backtester
+    """
+
+    def __init__(self, symbol, frames, indicators, base_timeframe, timeframes):
+        """
+        :param frames: {timeframe: candle DataFrame}, must include base_timeframe and every one of timeframes
+        :param indicators: indicator list as used by run_ta
+        :param base_timeframe: timeframe prices are taken from, one candle per step
+        :param timeframes: timeframes indicators are calculated on
+        """
+        self.symbol = symbol
+
+        base = frames[base_timeframe]
+        base_ms = timeframe_to_ms(base_timeframe)
+        day = max(1, DAY_MS // base_ms)
+
+        close = base['close'].astype(float)
+        past_close = close.shift(day).fillna(close.iloc[0])
+
+        self.close = close.tolist()
+        self.quote_volume = (base['volume'].astype(float) * close).rolling(day, min_periods=1).sum().tolist()
+        self.percentage = ((close - past_close) / past_close * 100).tolist()
+        self.close_times = (base['timestamp'].values.astype('int64') + base_ms).tolist()
+        self.index = -1
+
+        # [close times, index of the last closed candle, {statistic name: full array}] per timeframe
+        self.frames = []
+        self.statistics = {}
+        self.start_time = self.close_times[0]
+
+        for timeframe in timeframes:
+            df = frames[timeframe]
+            close_times = (df['timestamp'].values.astype('int64') + timeframe_to_ms(timeframe)).tolist()
+            arrays = run_ta({timeframe: df}, indicators)
+
+            # trading starts once every indicator on every timeframe has a value
+            first_valid = max((self.first_valid_index(values) for values in arrays.values()), default=0)
+            self.start_time = max(self.start_time,
+                                  close_times[first_valid] if first_valid < len(close_times) else float('inf'))
+
+            self.frames.append([close_times, -1, arrays])
+
+    # ----
+    @staticmethod
+    def first_valid_index(values):
+        valid = ~np.isnan(np.asarray(values, dtype=float))
+        return int(valid.argmax()) if valid.any() else len(valid)
+
+    # ----
+    def reset(self):
+        # feeds are reused between runs (see Optimizer), only the position in time is per run
+        self.index = -1
+        self.statistics = {}
+        for frame in self.frames:
+            frame[1] = -1
+
+    # ----
+    def advance(self, now):
+        """
+        move to the last candles closed at now (ms), statistics are only re-sliced for timeframes that moved
+        """
+        self.index = bisect.bisect_right(self.close_times, now) - 1
+
+        statistics = self.statistics
+        for frame in self.frames:
+            index = bisect.bisect_right(frame[0], now) - 1
+            if index == frame[1]:
+                continue
+
+            frame[1] = index
+            for name, values in frame[2].items():
+                statistics[name] = values[:index + 1]
+
+
+# =============================
+class Backtester:
+
+    def __init__(self, history, config, starting_balance=1.0, quote_currency=None, min_cost=0.0, spread=0.0,
+                 base_timeframe=None, start=None, end=None, verbose=False):
+        """
+        :param history: {symbol: {timeframe: candle DataFrame}}, see HistoryLoader.load_history
+        :param config: Config, see make_config / load_config
+        :param starting_balance: quote currency balance
+        :param quote_currency: defaults to the quote of the first symbol
+        :param min_cost: minimum order cost for every pair
+        :param spread: simulated bid / ask spread in %, centered on the candle close
+        :param base_timeframe: timeframe stepped through, defaults to the smallest in history
+        :param start: first step in ms, defaults to the earliest time a pair has every indicator
+        :param end: last step in ms
+        :param verbose: show the engine's output, it's suppressed by default
+        """
+        self.history = history
+        self.config = config
+        self.starting_balance = starting_balance
+        self.quote_currency = quote_currency or next(iter(history)).split('/')[1]
+        self.min_cost = min_cost
+        self.spread = spread
+        self.start = start
+        self.end = end
+        self.verbose = verbose
+
+        self.base_timeframe = base_timeframe or min({tf for frames in history.values() for tf in frames},
+                                                    key=timeframe_to_ms)
+        self.timeframes = sorted(config.timeframes, key=timeframe_to_ms)
+
+        self.exchange = None
+        self.trader = None
+        self.feeds = None
+        self.equity_curve = []
+        self.max_drawdown = 0
+        self.steps = 0
+        self.elapsed = 0
+
+    # ----
+    def get_frames(self, symbol):
+        # timeframes missing from history are built from the base timeframe
+        frames = dict(self.history[symbol])
+        for timeframe in self.timeframes:
+            if timeframe not in frames:
+                frames[timeframe] = resample_candles(frames[self.base_timeframe], timeframe)
+
+        return frames
+
+    # ----
+    def prepare(self):
+        """
+        precompute every symbol's indicators, only needs to happen once per history / indicator set
+        feeds prepared with a superset of the config's indicators can be assigned to self.feeds instead
+        """
+        indicators = list(self.config.indicators.values())
+        self.feeds = [PairFeed(symbol, self.get_frames(symbol), indicators, self.base_timeframe, self.timeframes)
+                      for symbol, frames in self.history.items()
+                      if self.base_timeframe in frames and len(frames[self.base_timeframe])]
+
+        return self.feeds
+
+    # ----
+    def get_step_times(self):
+        times = np.unique(np.concatenate([feed.close_times for feed in self.feeds]))
+
+        start = min(feed.start_time for feed in self.feeds)
+        if self.start is not None:
+            start = max(start, self.start)
+
+        times = times[times >= start]
+        if self.end is not None:
+            times = times[times <= self.end]
+
+        return times.tolist()
+
+    # ----
+    def run(self):
+        """
+        :return: results dict, see get_results
+        """
+        if self.feeds is None:
+            self.prepare()
+
+        for feed in self.feeds:
+            feed.reset()
+
+        self.exchange = BacktestExchange(self.quote_currency, self.starting_balance, self.timeframes, self.min_cost)
+        self.trader = BacktestTrader(self.config, self.exchange)
+        self.equity_curve = []
+        self.max_drawdown = 0
+
+        started = time.perf_counter()
+
+        if self.verbose:
+            self._run_steps(self.get_step_times())
+        else:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                self._run_steps(self.get_step_times())
+
+        self.elapsed = time.perf_counter() - started
+        return self.get_results()
+
+    # --
+    def _run_steps(self, times):
+        exchange = self.exchange
+        pairs = exchange.pairs
+        statistics = self.trader.statistics
+        trade_cycle = self.trader.trade_cycle
+
+        bid_factor = 1 - self.spread / 200
+        ask_factor = 1 + self.spread / 200
+
+        # feeds are listed on the exchange once their indicators have values
+        pending = sorted(self.feeds, key=lambda f: f.start_time)
+        active = []
+        peak = 0
+
+        for now in times:
+            exchange.sim_time = now / 1000
+
+            while pending and pending[0].start_time <= now:
+                feed = pending.pop(0)
+                exchange.add_pair(feed.symbol)
+                statistics[feed.symbol] = feed.statistics
+                active.append(feed)
+
+            for feed in active:
+                feed.advance(now)
+                index = feed.index
+                close = feed.close[index]
+
+                pair = pairs[feed.symbol]
+                pair['close'] = close
+                pair['bid'] = close * bid_factor
+                pair['ask'] = close * ask_factor
+                pair['quoteVolume'] = feed.quote_volume[index]
+                pair['percentage'] = feed.percentage[index]
+
+            trade_cycle()
+
+            value = exchange.balance + sum(pair['close'] * pair['total'] for pair in pairs.values() if pair['total'])
+            self.equity_curve.append((now, value))
+
+            peak = max(peak, value)
+            if peak > 0:
+                self.max_drawdown = max(self.max_drawdown, (peak - value) / peak * 100)
+
+        self.steps = len(times)
+
+    # ----
+    def get_results(self):
+        trades = self.trader.trade_history
+        sells = [order for order in trades if order['side'] == 'sell']
+        winning_sells = [order for order in sells if order['price'] > order['bought_price']]
+
+        final_value = self.equity_curve[-1][1] if self.equity_curve else self.starting_balance
+        profit = final_value - self.starting_balance
+
+        return {
+            'start': self.equity_curve[0][0] if self.equity_curve else None,
+            'end': self.equity_curve[-1][0] if self.equity_curve else None,
+            'steps': self.steps,
+            'pairs': len(self.exchange.pairs),
+            'starting_balance': self.starting_balance,
+            'final_balance': self.exchange.balance,
+            'final_value': final_value,
+            'profit': profit,
+            'profit_percent': profit / self.starting_balance * 100 if self.starting_balance else 0,
+            'max_drawdown_percent': self.max_drawdown,
+            'trades': len(trades),
+            'buys': len(trades) - len(sells),
+            'sells': len(sells),
+            'win_rate': len(winning_sells) / len(sells) * 100 if sells else 0,
+            'open_positions': sum(1 for pair in self.exchange.pairs.values()
+                                  if pair['total'] * pair['close'] > self.exchange.get_min_cost(pair['symbol'])),
+            'candle_errors': self.exchange.candle_errors,
+            'elapsed': self.elapsed,
+        }
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 2:
+        print('usage: python -m backtesting.Backtester <history.json> [starting_balance]')
+        sys.exit(1)
+
+    backtester = Backtester(load_history(sys.argv[1]), load_config(),
+                            starting_balance=float(sys.argv[2]) if len(sys.argv) > 2 else 1.0)
+
+    for key, value in backtester.run().items():
+        print(f'{key:22} {value}')
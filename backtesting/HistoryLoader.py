@@ -0,0 +1,124 @@
+"""
+Stored OHLCV history for backtesting
+
+History files are JSON in the same shape ccxt's fetch_ohlcv returns, keyed by symbol then timeframe
+    {"ADA/ETH": {"1m": [[timestamp_ms, open, high, low, close, volume], ...], "5m": [...]}, ...}
+
+    python -m backtesting.HistoryLoader binance ETH 1m 2018-08-01 2018-09-01 history.json
+"""
+import time
+
+import ccxt
+import pandas as pd
+
+from utils import JsonTools
+from utils.CandleTools import candles_to_df
+
+
+def timeframe_to_ms(timeframe):
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+
+# ----
+def load_history(path):
+    """
+    :param path: history json file
+    :return: {symbol: {timeframe: candle DataFrame}}
+    """
+    raw = JsonTools.load_file(path)
+
+    return {symbol: {timeframe: candles_to_df(candles) for timeframe, candles in frames.items()}
+            for symbol, frames in raw.items()}
+
+
+def save_history(raw, path):
+    """
+    :param raw: {symbol: {timeframe: ohlcv list}}, ie the output of download_history
+    """
+    JsonTools.dump_file(raw, path)
+
+
+# ----
+def resample_candles(df, timeframe):
+    """
+    build candles for a larger timeframe from a smaller one, buckets are aligned to the epoch like exchange candles
+    the last candle may be incomplete, backtesting never uses it before its close time is reached
+    :param df: candle DataFrame (see candles_to_df)
+    :param timeframe: target timeframe ie 15m
+    """
+    resampled = df.resample(f'{timeframe_to_ms(timeframe)}ms', closed='left', label='left', origin='epoch').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    ).dropna(subset=['close'])
+
+    timestamps = resampled.index.values.astype('datetime64[ms]').astype('int64')
+    candles = resampled[['open', 'high', 'low', 'close', 'volume']].values.tolist()
+
+    return candles_to_df([[int(ts), *candle] for ts, candle in zip(timestamps, candles)])
+
+
+# ----
+def download_history(exchange_id, symbols, timeframes, since, until=None, limit=1000):
+    """
+    page through fetch_ohlcv for every symbol / timeframe
+    :param exchange_id: ccxt exchange id
+    :param symbols: list of symbols, ie ['ADA/ETH']
+    :param timeframes: list of timeframes, ie ['1m', '5m']
+    :param since: start timestamp in ms
+    :param until: end timestamp in ms, defaults to now
+    :param limit: candles per request
+    :return: {symbol: {timeframe: ohlcv list}}
+    """
+    client = getattr(ccxt, exchange_id)({'enableRateLimit': True, 'timeout': 50000})
+    until = until or int(time.time() * 1000)
+    history = {}
+
+    for symbol in symbols:
+        history[symbol] = {}
+
+        for timeframe in timeframes:
+            step = timeframe_to_ms(timeframe)
+            candles = []
+            start = since
+
+            while start < until:
+                batch = client.fetch_ohlcv(symbol, timeframe, since=start, limit=limit)
+                batch = [candle for candle in batch if candle[0] < until]
+                if not batch:
+                    break
+
+                candles.extend(batch)
+                start = batch[-1][0] + step
+
+            history[symbol][timeframe] = candles
+            print(f'downloaded {len(candles)} {timeframe} candles for {symbol}')
+
+    return history
+
+
+def download_market_history(exchange_id, quote_currency, timeframes, since, until=None, path=None):
+    """
+    download history for every active market in quote_currency, saved to path if given
+    """
+    client = getattr(ccxt, exchange_id)({'enableRateLimit': True})
+    symbols = [market['symbol'] for market in client.fetch_markets()
+               if market['active'] and market['quote'] == quote_currency.upper()]
+
+    history = download_history(exchange_id, symbols, timeframes, since, until)
+    if path is not None:
+        save_history(history, path)
+
+    return history
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 7:
+        print('usage: python -m backtesting.HistoryLoader <exchange> <quote> <timeframe,...> <start> <end> <path>')
+        sys.exit(1)
+
+    _exchange_id, _quote, _timeframes, _start, _end, _path = sys.argv[1:]
+    download_market_history(_exchange_id, _quote, _timeframes.split(','),
+                            int(pd.Timestamp(_start, tz='UTC').timestamp() * 1000),
+                            int(pd.Timestamp(_end, tz='UTC').timestamp() * 1000),
+                            _path)
@@ -0,0 +1,214 @@
+"""
+Parameter sweeps over strategy configs, each variant is backtested in a process pool
+
+Parameters are dot paths into the strategy lists, list positions are indexes
+    {
+        "buy_strategies.0.trailing %": [0.1, 0.25, 0.5],
+        "buy_strategies.0.buy_value": ["2%", "5%"],
+        "buy_strategies.0.conditions.0.left.candle_period": [14, 21],
+        "sell_strategies.0.sell_value": [1, 2, 3],
+        "dca_buy_strategies.0.dca_strategy.default.trigger": [-3, -5]
+    }
+
+Indicators for every variant are computed once up front and handed to the workers,
+so variants that only change thresholds never recompute an indicator
+
+    python -m backtesting.Optimizer history.json params.json [random_samples]
+"""
+import copy
+import itertools
+import os
+import random
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from backtesting.Backtester import Backtester, make_config
+
+STRATEGY_SECTIONS = ('buy_strategies', 'dca_buy_strategies', 'sell_strategies')
+
+# worker process state, set by _init_worker
+_worker = {}
+
+
+# ----
+def set_param(strategies, path, value):
+    """
+    :param strategies: {section: strategy list}
+    :param path: dot path, ie buy_strategies.0.trailing %
+    """
+    keys = path.split('.')
+    target = strategies
+    for key in keys[:-1]:
+        target = target[int(key) if isinstance(target, list) else key]
+
+    target[int(keys[-1]) if isinstance(target, list) else keys[-1]] = value
+
+
+def grid_search(params):
+    """
+    :param params: {path: list of values}
+    :return: every combination as a list of {path: value}
+    """
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*params.values())]
+
+
+def random_search(params, samples, seed=None):
+    """
+    :return: up to samples distinct combinations, picked uniformly from the full grid
+    """
+    names = list(params)
+    sizes = [len(params[name]) for name in names]
+    grid_size = 1
+    for size in sizes:
+        grid_size *= size
+
+    if samples >= grid_size:
+        return grid_search(params)
+
+    variants = []
+    for position in random.Random(seed).sample(range(grid_size), samples):
+        variant = {}
+        for name, size in zip(names, sizes):
+            position, index = divmod(position, size)
+            variant[name] = params[name][index]
+        variants.append(variant)
+
+    return variants
+
+
+# ----
+def _init_worker(history, feeds, settings):
+    _worker['history'] = history
+    _worker['feeds'] = feeds
+    _worker['settings'] = settings
+
+
+def _run_variant(variant, strategies):
+    settings = _worker['settings']
+    config = make_config(strategies['buy_strategies'], strategies['sell_strategies'],
+                         strategies['dca_buy_strategies'], settings['global_trade_conditions'],
+                         settings['general_settings'], settings['pair_specific_settings'])
+
+    backtester = Backtester(_worker['history'], config, **settings['backtest'])
+    backtester.feeds = _worker['feeds']
+
+    try:
+        return {'params': variant, **backtester.run()}
+    except Exception:
+        return {'params': variant, 'error': traceback.format_exc()}
+
+
+# =============================
+class Optimizer:
+
+    def __init__(self, history, config, params, workers=None, rank_by='profit_percent', **backtest_settings):
+        """
+        :param history: {symbol: {timeframe: candle DataFrame}}, see HistoryLoader.load_history
+        :param config: base Config, its strategies are copied and modified per variant
+        :param params: {path: list of values}
+        :param workers: process count, defaults to the cpu count. 1 runs everything in this process
+        :param rank_by: result key to rank on, higher is better. ties go to the smaller drawdown
+        :param backtest_settings: passed through to each Backtester (starting_balance, min_cost, spread, ...)
+        """
+        self.history = history
+        self.config = config
+        self.params = params
+        self.workers = workers or os.cpu_count()
+        self.rank_by = rank_by
+        self.backtest_settings = backtest_settings
+
+    # ----
+    def get_variants(self, samples=None, seed=None):
+        if samples is None:
+            return grid_search(self.params)
+
+        return random_search(self.params, samples, seed)
+
+    # ----
+    def get_strategies(self, variant):
+        """
+        :return: {section: strategy list} from the base config with variant applied
+        """
+        strategies = {section: copy.deepcopy(getattr(self.config, section) or []) for section in STRATEGY_SECTIONS}
+        for path, value in variant.items():
+            set_param(strategies, path, value)
+
+        return strategies
+
+    # ----
+    def prepare_feeds(self, all_strategies):
+        """
+        precompute the union of every variant's indicators
+        """
+        config = make_config([], [])
+        for strategies in all_strategies:
+            for section in STRATEGY_SECTIONS:
+                config.parse_indicators_from_strategy(strategies[section])
+
+        return Backtester(self.history, config, **self.backtest_settings).prepare()
+
+    # ----
+    def run(self, samples=None, seed=None):
+        """
+        :param samples: random search with this many variants, grid search if None
+        :param seed: random search seed
+        :return: results ranked best first, each has 'rank', 'params' and the Backtester results
+        """
+        variants = self.get_variants(samples, seed)
+        all_strategies = [self.get_strategies(variant) for variant in variants]
+
+        settings = {
+            'global_trade_conditions': self.config.global_trade_conditions,
+            'general_settings': self.config.general_settings,
+            'pair_specific_settings': self.config.pair_specific_settings,
+            'backtest': self.backtest_settings,
+        }
+        initargs = (self.history, self.prepare_feeds(all_strategies), settings)
+
+        if self.workers == 1:
+            _init_worker(*initargs)
+            results = list(map(_run_variant, variants, all_strategies))
+
+        else:
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=initargs) as pool:
+                results = list(pool.map(_run_variant, variants, all_strategies))
+
+        return self.rank(results)
+
+    # ----
+    def rank(self, results):
+        failed = [result for result in results if 'error' in result]
+        ranked = sorted((result for result in results if 'error' not in result),
+                        key=lambda result: (-result[self.rank_by], result['max_drawdown_percent']))
+
+        for rank, result in enumerate(ranked, 1):
+            result['rank'] = rank
+
+        for result in failed:
+            print('variant failed', result['params'], result['error'])
+
+        return ranked
+
+
+# ----
+def print_results(results, count=10):
+    for result in results[:count]:
+        print(f"#{result['rank']:<3} profit: {result['profit_percent']:>8.2f}%  "
+              f"drawdown: {result['max_drawdown_percent']:>6.2f}%  "
+              f"trades: {result['trades']:>5}  win rate: {result['win_rate']:>6.2f}%  {result['params']}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    from backtesting.Backtester import load_config
+    from backtesting.HistoryLoader import load_history
+    from utils import JsonTools
+
+    if len(sys.argv) < 3:
+        print('usage: python -m backtesting.Optimizer <history.json> <params.json> [random_samples]')
+        sys.exit(1)
+
+    optimizer = Optimizer(load_history(sys.argv[1]), load_config(), JsonTools.load_file(sys.argv[2]))
+    print_results(optimizer.run(samples=int(sys.argv[3]) if len(sys.argv) > 3 else None))
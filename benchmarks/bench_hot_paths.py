@@ -0,0 +1,289 @@
+"""
+Timings for the engine's hot paths on synthetic 150 pair x 3 timeframe fixtures (see fixtures.py)
+
+Results are written as JSON and compared against a stored baseline, any case whose median time grew by more than
+the tolerance is reported as a regression and the exit code is 1
+
+    python -m benchmarks.bench_hot_paths                       run, compare against benchmarks/baseline.json
+    python -m benchmarks.bench_hot_paths --save-baseline       run and store the results as the new baseline
+    python -m benchmarks.bench_hot_paths --output results.json --filter condition
+
+Baselines are machine specific, compare runs from the same machine / interpreter only
+"""
+import argparse
+import contextlib
+import io
+import pathlib
+import platform
+import statistics
+import sys
+import time
+
+import numpy
+import pandas
+import talib
+
+from analyzers.IndicatorCache import IndicatorCache
+from analyzers.StatisticsStore import StatisticsStore
+from analyzers.TechnicalAnalysis import run_ta
+from benchmarks import fixtures
+from conditions.CompiledCondition import CompiledCondition
+from conditions.condition_tools import evaluate_condition
+from utils import JsonTools
+from utils.AverageCalcs import calc_average_price_from_hist
+from utils.DepthAnalyzer import process_depth
+
+BASELINE_PATH = pathlib.Path(__file__).parent / 'baseline.json'
+DEFAULT_TOLERANCE = 0.25
+
+
+def get_dashboard_route():
+    # the GUI needs flask & co, without them the dashboard case is reported as skipped
+    try:
+        import gui.gui_server as gui_server
+    except ImportError:
+        return None, None
+
+    return gui_server, getattr(gui_server.get_dashboard_data, '__wrapped__', gui_server.get_dashboard_data)
+
+
+def time_calls(function, repeat, number=1):
+    """
+    :return: per call seconds over repeat rounds of number calls
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+
+    return {
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'min': min(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+# =============================
+class HotPathBenchmarks:
+    """
+    Builds the fixtures once, every case_* method returns (callable, calls per round) or None to skip the case
+    """
+
+    def __init__(self, pair_count=fixtures.PAIR_COUNT, candle_count=fixtures.CANDLE_COUNT):
+        self.pair_count = pair_count
+        self.candlesticks = fixtures.make_candlesticks(pair_count, candle_count)
+        self.config = fixtures.get_config()
+        self.indicators = list(self.config.indicators.values())
+        self.engine = fixtures.make_engine(pair_count)
+
+        self.statistics = StatisticsStore(self.config.statistics_window)
+        for symbol, candles in self.candlesticks.items():
+            self.statistics.update(symbol, run_ta(candles, self.indicators))
+
+        self.pairs = [{**pair, 'current_value': 1.05, 'total_cost': 1.0}
+                      for pair in self.engine.exchange.pairs.values()]
+
+    # ----
+    def get_cases(self):
+        cases = {name[len('case_'):]: getattr(self, name) for name in dir(self) if name.startswith('case_')}
+        for name in fixtures.CONDITIONS:
+            cases['condition_' + name] = lambda name=name: self.get_condition_case(name)
+            cases['condition_' + name + '_compiled'] = lambda name=name: self.get_compiled_condition_case(name)
+        return cases
+
+    # ----
+    def case_run_ta(self):
+        def run():
+            for candles in self.candlesticks.values():
+                run_ta(candles, self.indicators)
+        return run, 1
+
+    def case_run_ta_cached(self):
+        # ticks between candle updates, every result comes from the cache
+        cache = IndicatorCache()
+        for symbol, candles in self.candlesticks.items():
+            run_ta(candles, self.indicators, cache, symbol)
+
+        def run():
+            for symbol, candles in self.candlesticks.items():
+                run_ta(candles, self.indicators, cache, symbol)
+        return run, 1
+
+    # --
+    def get_condition_case(self, name):
+        condition = fixtures.CONDITIONS[name]
+        statistics = self.statistics
+        pairs = self.pairs
+
+        def run():
+            for pair in pairs:
+                evaluate_condition(condition, pair, statistics[pair['symbol']])
+        return run, 5
+
+    def get_compiled_condition_case(self, name):
+        # the same condition resolved to store columns as LiquiTrader.compile_strategies does
+        condition = CompiledCondition(fixtures.CONDITIONS[name], self.statistics)
+        pair_ids = [(pair, self.statistics.pair_ids[pair['symbol']]) for pair in self.pairs]
+
+        def run():
+            for pair, pair_id in pair_ids:
+                condition.evaluate(pair, pair_id)
+        return run, 5
+
+    # ----
+    def case_process_depth(self):
+        orderbook = fixtures.make_orderbook()
+        targets = [10, 1000, 50000, 500000, 5000000]
+
+        def run():
+            for target in targets:
+                process_depth(orderbook, target, 0.01)
+        return run, 200
+
+    # ----
+    def case_calc_average_price_from_hist(self):
+        trades, owned = fixtures.make_trade_history()
+        return lambda: calc_average_price_from_hist(trades, owned), 20
+
+    # ----
+    def case_pairs_to_df_friendly(self):
+        return lambda: self.engine.pairs_to_df(friendly=True), 3
+
+    # ----
+    def case_dashboard_data(self):
+        gui_server, get_dashboard_data = get_dashboard_route()
+        if gui_server is None:
+            return None
+
+        gui_server.LT_ENGINE = self.engine
+
+        def run():
+            with gui_server._app.app_context():
+                get_dashboard_data()
+        return run, 1
+
+
+# ----
+def run_benchmarks(pair_count=fixtures.PAIR_COUNT, repeat=5, name_filter=None):
+    """
+    :param name_filter: only run cases whose name contains this
+    :return: {'meta': {...}, 'results': {case: timings or {'skipped': reason}}}
+    """
+    benchmarks = HotPathBenchmarks(pair_count)
+    results = {}
+
+    for name, get_case in sorted(benchmarks.get_cases().items()):
+        if name_filter and name_filter not in name:
+            continue
+
+        case = get_case()
+        if case is None:
+            results[name] = {'skipped': 'dependencies missing'}
+            continue
+
+        function, number = case
+        # engine code prints, keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            function()
+            results[name] = time_calls(function, repeat, number)
+
+    return {'meta': get_meta(pair_count, repeat), 'results': results}
+
+
+def get_meta(pair_count, repeat):
+    return {
+        'pairs': pair_count,
+        'timeframes': list(fixtures.TIMEFRAMES),
+        'candles': fixtures.CANDLE_COUNT,
+        'repeat': repeat,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'talib': talib.__version__,
+        'time': int(time.time()),
+    }
+
+
+# ----
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    :return: list of (case, baseline median, current median, change %) for cases slower than the tolerance allows
+    """
+    regressions = []
+    for name, current in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None or 'median' not in previous or 'median' not in current:
+            continue
+
+        change = (current['median'] - previous['median']) / previous['median']
+        if change > tolerance:
+            regressions.append((name, previous['median'], current['median'], change * 100))
+
+    return regressions
+
+
+def print_results(results, baseline=None):
+    baseline_results = (baseline or {}).get('results', {})
+    for name, result in results['results'].items():
+        if 'skipped' in result:
+            print(f'{name:36} skipped ({result["skipped"]})')
+            continue
+
+        line = f'{name:36} {result["median"] * 1000:>10.3f} ms  (min {result["min"] * 1000:.3f}, ' \
+               f'stdev {result["stdev"] * 1000:.3f})'
+        previous = baseline_results.get(name, {}).get('median')
+        if previous:
+            line += f'  {(result["median"] - previous) / previous * 100:>+7.1f}% vs baseline'
+        print(line)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='benchmark the engine hot paths')
+    parser.add_argument('--output', help='write the results JSON here')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed median slowdown as a fraction, default %(default)s')
+    parser.add_argument('--filter', help='only run cases whose name contains this')
+    parser.add_argument('--pairs', type=int, default=fixtures.PAIR_COUNT)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(args)
+
+    results = run_benchmarks(args.pairs, args.repeat, args.filter)
+
+    if args.output:
+        JsonTools.dump_file(results, args.output)
+
+    if args.save_baseline:
+        JsonTools.dump_file(results, args.baseline)
+        print_results(results)
+        print(f'baseline saved to {args.baseline}')
+        return 0
+
+    baseline_path = pathlib.Path(args.baseline)
+    baseline = JsonTools.load_file(baseline_path) if baseline_path.exists() else None
+    print_results(results, baseline)
+
+    if baseline is None:
+        print(f'no baseline at {baseline_path}, run with --save-baseline to create one')
+        return 0
+
+    if baseline['meta'].get('pairs') != results['meta']['pairs']:
+        print('baseline was recorded with a different pair count, not comparing')
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, previous, current, change in regressions:
+        print(f'REGRESSION {name}: {previous * 1000:.3f} ms -> {current * 1000:.3f} ms ({change:+.1f}%)')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Messages/sec for the stdlib json module vs utils.JsonTools (orjson when installed)
+
+    python -m benchmarks.bench_json
+"""
+import json
+import random
+import time
+
+from utils import JsonTools
+
+
+def make_ticker_messages(count=20000):
+    # binance 24hr ticker stream payloads
+    messages = []
+    for i in range(count):
+        price = random.uniform(0.00001, 0.1)
+        messages.append(json.dumps({
+            'e': '24hrTicker', 'E': 1535455200000 + i, 's': f'SYM{i % 150}ETH',
+            'p': str(price * 0.01), 'P': '1.25', 'w': str(price), 'x': str(price),
+            'c': str(price), 'Q': '100.0', 'b': str(price * 0.999), 'B': '50.0',
+            'a': str(price * 1.001), 'A': '75.0', 'o': str(price * 0.99), 'h': str(price * 1.05),
+            'l': str(price * 0.95), 'v': '123456.0', 'q': '1234.5', 'O': 0, 'C': 0, 'F': 0, 'L': 0, 'n': 100
+        }))
+    return messages
+
+
+def make_depth_messages(count=5000, levels=20):
+    messages = []
+    for i in range(count):
+        messages.append(json.dumps({
+            'lastUpdateId': i,
+            'bids': [[str(0.001 - n * 1e-6), str(random.uniform(1, 1000))] for n in range(levels)],
+            'asks': [[str(0.001 + n * 1e-6), str(random.uniform(1, 1000))] for n in range(levels)],
+        }))
+    return messages
+
+
+def make_exchange_state(pair_count=150):
+    pairs = {}
+    for i in range(pair_count):
+        symbol = f'SYM{i}/ETH'
+        pairs[symbol] = {
+            'symbol': symbol, 'base': f'SYM{i}', 'quote': 'ETH', 'active': True,
+            'limits': {'amount': {'min': 1, 'max': 90000000}, 'price': {'min': 1e-8, 'max': None},
+                       'cost': {'min': 0.01, 'max': None}},
+            'precision': {'amount': 0, 'price': 8}, 'total': 0, 'amount': 0, 'total_cost': 0,
+            'avg_price': None, 'dca_level': 0, 'last_order_time': 0, 'trades': [], 'last_id': 0,
+            'close': random.random(), 'bid': random.random(), 'ask': random.random(),
+            'quoteVolume': random.random() * 1000, 'percentage': random.uniform(-10, 10)
+        }
+    return {'binance': {'pairs': pairs, 'balance': 1.0}}
+
+
+def messages_per_second(decode, messages, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            decode(message)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(messages) / best
+
+
+def operations_per_second(func, obj, iterations=200):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(obj)
+    return iterations / (time.perf_counter() - start)
+
+
+def run():
+    random.seed(0)
+    tickers = make_ticker_messages()
+    depth = make_depth_messages()
+    state = make_exchange_state()
+    encoded_state = json.dumps(state)
+
+    return {
+        'fast_json_available': JsonTools.FAST_JSON,
+        'ticker_decode_msgs_per_sec': {
+            'json': messages_per_second(json.loads, tickers),
+            'JsonTools': messages_per_second(JsonTools.loads, tickers),
+        },
+        'depth_decode_msgs_per_sec': {
+            'json': messages_per_second(json.loads, depth),
+            'JsonTools': messages_per_second(JsonTools.loads, depth),
+        },
+        'exchange_state_dumps_per_sec': {
+            'json': operations_per_second(json.dumps, state),
+            'JsonTools': operations_per_second(JsonTools.dumpb, state),
+        },
+        'exchange_state_loads_per_sec': {
+            'json': operations_per_second(json.loads, encoded_state),
+            'JsonTools': operations_per_second(JsonTools.loads, encoded_state),
+        },
+    }
+
+
+if __name__ == '__main__':
+    results = run()
+    print(f'fast json available: {results.pop("fast_json_available")}')
+    for name, result in results.items():
+        speedup = result['JsonTools'] / result['json']
+        print(f'{name:32} json: {result["json"]:>12,.0f}   JsonTools: {result["JsonTools"]:>12,.0f}   ({speedup:.1f}x)')
@@ -0,0 +1,143 @@
+"""
+Synthetic, seeded market data for the benchmarks: every run builds exactly the same fixtures
+"""
+import contextlib
+import io
+import math
+import random
+
+from backtesting.BacktestExchange import BacktestExchange
+from backtesting.Backtester import make_config
+from liquitrader import LiquiTrader, ShutdownHandler
+from utils.CandleTools import candles_to_df
+
+START = 1535455200000
+PAIR_COUNT = 150
+TIMEFRAMES = ('5m', '15m', '1h')
+CANDLE_COUNT = 500
+TIMEFRAME_MS = {'5m': 300000, '15m': 900000, '1h': 3600000}
+
+
+def get_symbols(pair_count=PAIR_COUNT):
+    return [f'SYM{i}/ETH' for i in range(pair_count)]
+
+
+def get_operand(value, period=14, timeframe='5m', **extra):
+    return {'value': value, 'candle_period': period, 'timeframe': timeframe, **extra}
+
+
+# one condition per operator type evaluate_condition handles ('gain' needs attribute access on the pair, unused)
+CONDITIONS = {
+    'static_compare': {'left': get_operand('RSI'), 'op': '<', 'right': {'value': 30}},
+    'indicator_compare': {'left': get_operand('EMA', 20, '15m'), 'op': '>', 'right': {'value': 'price'}},
+    'cross_up': {'left': get_operand('RSI', 14, '1h'), 'op': 'cross_up', 'right': {'value': 50}, 'cross_candles': 3},
+    'cross_down': {'left': get_operand('MFI', 14), 'op': 'cross_down', 'right': {'value': 70}, 'cross_candles': 1},
+    'change_over': {'left': get_operand('EMA', 20, '15m', change_over=3), 'op': '>', 'right': {'value': '1%'}},
+    'pattern': {'left': {'value': 'CDLDOJI', 'timeframe': '5m'}, 'op': '>', 'right': {'value': 0}},
+    # evaluate_condition reads 'left' before looking at the operator
+    'min_volume': {'left': {'value': 'volume'}, 'op': 'min_volume', 'right': 10},
+    'min_profit': {'left': {'value': 'price'}, 'op': 'min_profit', 'right': 1},
+}
+
+
+def get_strategies():
+    """
+    :return: (buy, sell, dca) strategy lists referencing every indicator in CONDITIONS on all three timeframes
+    """
+    buy = [{'conditions': [CONDITIONS['static_compare'], CONDITIONS['cross_up']], 'trailing %': 0.1,
+            'buy_value': '2%'},
+           {'conditions': [CONDITIONS['indicator_compare'], CONDITIONS['change_over'], CONDITIONS['pattern']],
+            'trailing %': 0.25, 'buy_value': 0.05}]
+    sell = [{'conditions': [CONDITIONS['cross_down']], 'trailing %': 0.1, 'sell_value': 1}]
+    dca = [{'conditions': [CONDITIONS['static_compare']], 'trailing %': 0.1, 'max_dca_level': 3,
+            'dca_strategy': {'default': {'trigger': -3, 'percentage': 100}}}]
+    return buy, sell, dca
+
+
+def get_config():
+    buy, sell, dca = get_strategies()
+    return make_config(buy, sell, dca, general_settings={'timezone': 'UTC', 'market': 'ETH'})
+
+
+# ----
+def make_candles(seed, timeframe, count=CANDLE_COUNT):
+    rnd = random.Random(seed)
+    step = TIMEFRAME_MS[timeframe]
+    price = 0.001 * (1 + seed / 100)
+    candles = []
+    for i in range(count):
+        open_ = price
+        price *= 1 + 0.01 * math.sin(i / 20 + seed) * rnd.random() + rnd.uniform(-0.005, 0.005)
+        candles.append([START + i * step, open_, max(open_, price) * 1.002, min(open_, price) * 0.998, price,
+                        rnd.uniform(500, 5000)])
+    return candles_to_df(candles)
+
+
+def make_candlesticks(pair_count=PAIR_COUNT, candle_count=CANDLE_COUNT):
+    """
+    :return: {symbol: {timeframe: candle DataFrame}}, the shape of GenericExchange.candles
+    """
+    return {symbol: {timeframe: make_candles(seed * 3 + offset, timeframe, candle_count)
+                     for offset, timeframe in enumerate(TIMEFRAMES)}
+            for seed, symbol in enumerate(get_symbols(pair_count))}
+
+
+def make_orderbook(levels=100, price=0.00036, seed=0):
+    rnd = random.Random(seed)
+    return [[price * (1 + n * 0.0001), rnd.uniform(10, 50000)] for n in range(levels)]
+
+
+def make_trade_history(count=1000, symbol='SYM0/ETH', seed=0):
+    """
+    :return: (trades, amount owned), the input of AverageCalcs.calc_average_price_from_hist
+    """
+    rnd = random.Random(seed)
+    trades = []
+    owned = 0
+    for i in range(count):
+        # mostly buys so the history has to be walked a long way back
+        side = 'sell' if i % 5 == 4 and owned > 0 else 'buy'
+        amount = rnd.uniform(10, 1000) if side == 'buy' else owned * 0.3
+        price = 0.001 * rnd.uniform(0.9, 1.1)
+        owned += amount if side == 'buy' else -amount
+        trades.append({'id': str(i), 'symbol': symbol, 'side': side, 'amount': amount, 'cost': amount * price,
+                       'price': price, 'fee': {'currency': 'ETH', 'cost': amount * price * 0.001}})
+    return trades, owned
+
+
+# ----
+def make_engine(pair_count=PAIR_COUNT, holding=40, trades_per_pair=4, seed=0):
+    """
+    LiquiTrader on a BacktestExchange with pair_count priced pairs, holding of them owned and a trade history,
+    everything pairs_to_df / the dashboard reads
+    """
+    rnd = random.Random(seed)
+    exchange = BacktestExchange('ETH', 10.0, list(TIMEFRAMES))
+    exchange.quote_price = 200.0
+    exchange.quote_candles = make_candles(seed, '1h', 168)
+    exchange.quote_change_info = {'1h': 0.5, '4h': 1.0, '6h': 1.2, '12h': -0.5, '24h': 2.0}
+
+    trader = LiquiTrader(ShutdownHandler())
+    trader.config = get_config()
+    trader.exchange = exchange
+    trader.load_strategies()
+
+    # place_order prints every order
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, symbol in enumerate(get_symbols(pair_count)):
+            close = 0.001 * rnd.uniform(0.5, 2)
+            exchange.add_pair(symbol).update({'close': close, 'bid': close * 0.999, 'ask': close * 1.001,
+                                              'quoteVolume': rnd.uniform(10, 5000),
+                                              'percentage': rnd.uniform(-10, 10)})
+            if i >= holding:
+                continue
+
+            for n in range(trades_per_pair):
+                exchange.sim_time = START / 1000 + (i * trades_per_pair + n) * 3600
+                side = 'sell' if n % 2 else 'buy'
+                amount = exchange.pairs[symbol]['total'] if side == 'sell' else 10 / close
+                trader.trade_history.append(exchange.place_order(symbol, 'limit', side, amount, close))
+
+            exchange.place_order(symbol, 'limit', 'buy', 5 / close, close)
+
+    return trader
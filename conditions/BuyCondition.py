@@ -1,24 +1,24 @@
 from conditions.Condition import Condition
-from conditions.condition_tools import evaluate_condition, get_buy_value
+from conditions.condition_tools import parse_buy_value, resolve_buy_value
 
 class BuyCondition(Condition):
 
     def __init__(self, condition_config: dict, pair_settings=None):
         super().__init__(condition_config, pair_settings)
         self.buy_value = condition_config['buy_value']
+        self.parsed_buy_value = parse_buy_value(self.buy_value)
 
     def apply_pair_settings(self, pair, balance):
-        pair_settings = self.pair_settings
-        id = pair.split("/")[0]
-        if pair_settings is None or id not in pair_settings or "buy" not in pair_settings[id]:
-            return get_buy_value(self.buy_value, balance)
-
-        elif pair_settings[id]["buy"]["method"] == "modify":
-            return float(pair_settings[id]["buy"]["value"]) * get_buy_value(self.buy_value, balance)
-        elif pair_settings[id]["buy"]["method"] == "override":
-            return get_buy_value(pair_settings[id]["buy"]["value"], balance)
-
+        settings = self.pair_settings.get(pair)
+        if settings is None:
+            return resolve_buy_value(self.parsed_buy_value, balance)
 
+        elif settings.buy_override is not None:
+            return resolve_buy_value(settings.buy_override, balance)
+        elif settings.buy_modifier is not None:
+            return settings.buy_modifier * resolve_buy_value(self.parsed_buy_value, balance)
+        else:
+            return resolve_buy_value(self.parsed_buy_value, balance)
 
     def evaluate(self, pair: dict, indicators: dict, balance):
         """
@@ -40,11 +40,10 @@ class BuyCondition(Condition):
 
         price = float(pair['close'])
         trail_to = None
-        analysis = [evaluate_condition(condition, pair, indicators) for condition in self.conditions_list]
-        res = False not in analysis
+        res = self.check_conditions(pair, indicators)
 
         if res and symbol in self.pairs_trailing:
-            current_marker = self.pairs_trailing[symbol]['trail_from']
+            current_marker = self.pairs_trailing[symbol].trail_from
             marker = price if price < current_marker else current_marker
             trail_to = marker * (1 + (self.trailing_value / 100))
             self.pairs_trailing[symbol] = self.trail_to(marker, trail_to, pair, indicators)
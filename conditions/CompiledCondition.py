@@ -0,0 +1,214 @@
+"""
+Conditions resolved against a StatisticsStore once, see Condition.compile
+
+evaluate_condition merges the pair and its statistics into one dict and translates every operand by name on each
+call, here indicator operands are resolved to store columns up front and evaluation reads the store's array directly
+"""
+from analyzers.StatisticsStore import PairStatistics
+from conditions.condition_tools import PATTERNS, talib_indicators, op_translate, ind_dict_to_full_name, \
+    isPriceLike, percentToFloat, evaluate_condition
+
+
+class CompiledOperand:
+    """
+    One side of a condition: an indicator column of the store, a key of the pair (price / volume) or a static value
+    """
+
+    __slots__ = ('indicator_ids', 'change_over', 'as_percent', 'pair_key', 'value')
+
+    def __init__(self, operand, store):
+        self.indicator_ids = None
+        self.change_over = None
+        self.as_percent = False
+        self.pair_key = None
+        self.value = None
+
+        value = operand['value']
+        if value in talib_indicators or value in PATTERNS:
+            name = ind_dict_to_full_name(operand)
+            # translate falls back to the name without a double underscore
+            names = [name] if '__' not in name else [name, name.replace('__', '_')]
+            self.indicator_ids = [store.get_indicator_id(name) for name in names]
+
+            if 'change_over' in operand and operand['change_over'] != '':
+                try:
+                    self.change_over = int(operand['change_over'])
+                    self.as_percent = isPriceLike(value)
+                except (TypeError, ValueError):
+                    # calculate_indicator_change can't use it, the operand never has a value
+                    self.indicator_ids = []
+
+        elif value == 'price':
+            self.pair_key = 'close'
+
+        elif value == 'volume':
+            self.pair_key = 'quoteVolume'
+
+        elif type(value) == int or type(value) == float:
+            self.value = value
+
+        elif '%' in value:
+            self.value = percentToFloat(value)
+
+        else:
+            try:
+                self.value = float(value)
+            except ValueError as ex:
+                print('compiled condition: ', ex, operand)
+
+    # ----
+    def get_current(self, store, pair, pair_id):
+        """
+        :return: the operand's current value, None when the pair has no such statistic
+        """
+        indicator_ids = self.indicator_ids
+        if indicator_ids is None:
+            return pair[self.pair_key] if self.pair_key is not None else self.value
+
+        present = store.present
+        for indicator_id in indicator_ids:
+            if present[pair_id, indicator_id]:
+                break
+        else:
+            return None
+
+        data = store.data
+        if self.change_over is None:
+            return data[pair_id, indicator_id, -1]
+
+        try:
+            previous = data[pair_id, indicator_id, -1 - self.change_over]
+        except IndexError:
+            return None
+
+        change = data[pair_id, indicator_id, -1] - previous
+        return change / previous * 100 if self.as_percent else change
+
+    def get_previous(self, store, pair, pair_id, candles):
+        """
+        :return: the value candles back, operands that aren't an indicator series (see getLookback) stay current
+        """
+        if self.indicator_ids is None or self.change_over is not None:
+            return self.get_current(store, pair, pair_id)
+
+        for indicator_id in self.indicator_ids:
+            if store.present[pair_id, indicator_id]:
+                try:
+                    return store.data[pair_id, indicator_id, -1 - candles]
+                except IndexError:
+                    return None
+
+        return None
+
+
+# =============================
+class CompiledCondition:
+    """
+    A condition of a strategy, evaluates to what evaluate_condition returns for the same pair and statistics
+    operators that don't read statistics by name ('gain' and unknown ones) are handed to evaluate_condition as they are
+    """
+
+    __slots__ = ('condition', 'store', 'kind', 'left', 'right', 'op', 'cross_candles', 'inverse')
+
+    def __init__(self, condition, store):
+        self.condition = condition
+        self.store = store
+        self.left = None
+        self.right = None
+        self.op = None
+        self.cross_candles = None
+        self.inverse = False
+
+        try:
+            self.kind = self.compile(condition, store)
+        except (KeyError, TypeError, ValueError):
+            # a malformed condition is left to evaluate_condition, which fails on it as before
+            self.kind = None
+
+    def compile(self, condition, store):
+        """
+        :return: the kind of condition, None for those evaluate_condition handles
+        """
+        op = condition['op']
+        if condition['left']['value'] in PATTERNS:
+            self.left = CompiledOperand(condition['left'], store)
+            self.inverse = bool(condition.get('inverse'))
+            return 'pattern'
+
+        elif op in op_translate:
+            self.left = CompiledOperand(condition['left'], store)
+            self.right = CompiledOperand(condition['right'], store)
+            self.op = op_translate[op]
+            return 'compare'
+
+        elif 'cross' in op:
+            self.left = CompiledOperand(condition['left'], store)
+            self.right = CompiledOperand(condition['right'], store)
+            self.op = op
+            self.cross_candles = int(condition['cross_candles'])
+            return 'cross'
+
+        elif op in ('min_volume', 'min_profit'):
+            return op
+
+        return None
+
+    # ----
+    def evaluate(self, pair, pair_id, is_buy=True):
+        """
+        :param pair: the exchange's pair dict
+        :param pair_id: the pair's id in the store
+        """
+        kind = self.kind
+        store = self.store
+
+        if kind == 'compare':
+            a = self.left.get_current(store, pair, pair_id)
+            b = self.right.get_current(store, pair, pair_id)
+            if a is None or b is None:
+                return False
+            return self.op(a, b)
+
+        elif kind == 'cross':
+            left, right = self.left, self.right
+            a1 = left.get_current(store, pair, pair_id)
+            a2 = left.get_previous(store, pair, pair_id, self.cross_candles)
+            b1 = right.get_current(store, pair, pair_id)
+            b2 = right.get_previous(store, pair, pair_id, self.cross_candles)
+            if a1 is None or a2 is None or b1 is None or b2 is None:
+                return False
+
+            if 'cross_up' in self.op:
+                return a1 - b1 >= 0 and a2 - b2 <= 0
+            elif 'cross_down' in self.op:
+                return a1 - b1 <= 0 and a2 - b2 >= 0
+            else:
+                return False
+
+        elif kind == 'pattern':
+            a = self.left.get_current(store, pair, pair_id)
+            if a is None:
+                print(self.condition, pair.get('symbol'))
+                return False
+            return a < 0 if self.inverse else a > 0
+
+        elif kind == 'min_volume':
+            return float(pair['quoteVolume']) >= self.condition['right']
+
+        elif kind == 'min_profit':
+            return (pair['current_value'] - pair['total_cost']) / pair['total_cost'] * 100 >= self.condition['right']
+
+        else:
+            return evaluate_condition(self.condition, pair, PairStatistics(store, pair_id), is_buy)
+
+
+if __name__ == '__main__':
+    import numpy as np
+    from analyzers.StatisticsStore import StatisticsStore
+
+    store = StatisticsStore(window=3)
+    condition = CompiledCondition({'left': {'value': 'RSI', 'candle_period': 14, 'timeframe': '5m'},
+                                   'op': 'cross_up', 'right': {'value': 30}, 'cross_candles': 1}, store)
+    store.update('ADA/ETH', {'RSI_14_5m': np.array([40.0, 25.0, 35.0])})
+
+    print(condition.evaluate({'symbol': 'ADA/ETH', 'close': 1.0}, store.pair_ids['ADA/ETH']))
@@ -1,12 +1,93 @@
 """
 This will take in a list of conditions
 """
+import copy
+import hashlib
+import json
+
 import numpy
 from talib import get_functions as get_talib_functions
 
+from analyzers.StatisticsStore import PairStatistics
+from conditions.CompiledCondition import CompiledCondition
+from conditions.condition_tools import evaluate_condition
+from config.PairSettingsTable import PairSettingsTable
+from utils import JsonTools
+
 talib_funcs = get_talib_functions()
 
 
+class TrailingEntry:
+    """
+    Trailing state of one pair in one strategy
+    the pair itself is only referenced by symbol, see Condition.get_trailing_view for what the GUI gets
+    """
+
+    __slots__ = ('symbol', 'trail_from', 'trail_to', 'stats', 'version', '_encoded')
+
+    def __init__(self, symbol, trail_from=None, trail_to=None, stats=None):
+        self.symbol = symbol
+        self.trail_from = trail_from
+        self.trail_to = trail_to
+        self.stats = stats
+        # bumped when the trail moves, the encoded entry is rebuilt on the next GUI request after that
+        self.version = 0
+        self._encoded = None
+
+    # ----
+    def update(self, trail_from, trail_to, stats):
+        if trail_from != self.trail_from or trail_to != self.trail_to or stats != self.stats:
+            self.trail_from = trail_from
+            self.trail_to = trail_to
+            self.stats = stats
+            self.version += 1
+
+    # ----
+    def to_dict(self, pair=None):
+        """
+        :param pair: the exchange's pair dict, close is taken from it
+        """
+        return {'symbol': self.symbol,
+                'trail_from': self.trail_from,
+                'trail_to': self.trail_to,
+                'close': None if pair is None else pair.get('close'),
+                'stats': self.stats}
+
+    def get_encoded(self):
+        """
+        :return: b'"symbol":{...entry,"close":' as JSON, the caller appends the pair's close and b'}'
+        """
+        version = self.version
+        encoded = self._encoded
+        if encoded is None or encoded[0] != version:
+            body = JsonTools.dumpb({'symbol': self.symbol,
+                                    'trail_from': self.trail_from,
+                                    'trail_to': self.trail_to,
+                                    'stats': self.stats})
+            # taken before encoding, an update racing the GUI thread leaves a stale version to rebuild next time
+            encoded = (version, JsonTools.dumpb(self.symbol) + b':' + body[:-1] + b',"close":')
+            self._encoded = encoded
+
+        return encoded[1]
+
+
+def get_strategy_key(condition_config):
+    """
+    :return: stable hash of a strategy's config, equal for strategies that are configured the same
+    """
+    encoded = json.dumps(condition_config, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def get_migration_keys(condition_config):
+    """
+    :return: keys a changed strategy is matched to its predecessor on, closest match first:
+             the config without its trailing %, then the conditions alone
+    """
+    untrailed = {key: value for key, value in condition_config.items() if key != 'trailing %'}
+    return get_strategy_key(untrailed), get_strategy_key(condition_config.get('conditions'))
+
+
 class Condition:
     """
     Base class condition:
@@ -15,13 +96,22 @@ class Condition:
 
     def __init__(self, condition_config: dict, pair_settings=None):
         self.conditions_list = condition_config['conditions']
+        self.strategy_key = get_strategy_key(condition_config)
+        self.migration_keys = get_migration_keys(condition_config)
         if 'trailing %' in condition_config:
             self.trailing_value = float(condition_config['trailing %'])
         else:
             self.trailing_value = 0
         self.pairs_trailing = {}
         self.indicators = self.get_indicators()
+        # a raw PairSpecificSettings dict is parsed here, LiquiTrader shares the config's table between strategies
+        if not isinstance(pair_settings, PairSettingsTable):
+            pair_settings = PairSettingsTable(pair_settings)
         self.pair_settings = pair_settings
+        # (pair settings table, encoded strategy fields), see get_trailing_json
+        self._encoded_fields = None
+        # (statistics store, CompiledCondition list), see compile
+        self._compiled = None
 
     def get_indicators(self):
         indicators = []
@@ -34,13 +124,11 @@ class Condition:
                             if isinstance(period, str) and period == '':
                                 period = None
                             if period is not None and int(period) > 0:
-                                indicators.append(
-                                    "{}_{}_{}".format(part['value'], period, part['timeframe'])
-                                )
+                                name = "{}_{}_{}".format(part['value'], period, part['timeframe'])
                             else:
-                                indicators.append(
-                                    "{}_{}".format(part['value'], part['timeframe'])
-                                )
+                                name = "{}_{}".format(part['value'], part['timeframe'])
+                            if name not in indicators:
+                                indicators.append(name)
         self.indicators = indicators
         return indicators
 
@@ -51,8 +139,9 @@ class Condition:
     # ----
     def get_stats_list(self, stats_dict):
         stats = []
-        for key, value in stats_dict.items():
-            if key not in self.indicators:
+        for key in self.indicators:
+            value = stats_dict.get(key)
+            if value is None:
                 continue
             last_value = self.get_last(value)
             if numpy.isnan(last_value):
@@ -63,11 +152,100 @@ class Condition:
         return stats
 
     def trail_to(self, start, end, pair, indicators):
-        return {'trail_from': round(start, 10),
-                'trail_to': round(end, 10),
-                **pair,
-                "stats": self.get_stats_list(indicators)
-                }
+        # entries are updated in place while a pair keeps trailing
+        entry = self.pairs_trailing.get(pair['symbol'])
+        if entry is None:
+            entry = TrailingEntry(pair['symbol'])
+
+        entry.update(round(start, 10), round(end, 10), self.get_stats_list(indicators))
+        return entry
+
+    # ----
+    def for_snapshot(self, pair_settings):
+        """
+        the unchanged strategy for a new config snapshot, see LiquiTrader.compile_strategies
+        a shallow copy sharing the trailing pairs, with its own pair settings and compiled conditions.
+        the instance the current snapshot holds isn't touched, a trade cycle running on it keeps its config
+        """
+        strategy = copy.copy(self)
+        strategy.pair_settings = pair_settings
+        strategy._compiled = None
+        strategy._encoded_fields = None
+        return strategy
+
+    # ----
+    def migrate_trailing(self, previous):
+        """
+        take over the trailing pairs of the strategy this one replaces, see LiquiTrader.compile_strategies
+        trail_to follows this strategy's trailing % on the next evaluation, pairs that no longer meet
+        the conditions are dropped then as usual
+        """
+        for symbol, entry in list(previous.pairs_trailing.items()):
+            if symbol not in self.pairs_trailing:
+                self.pairs_trailing[symbol] = TrailingEntry(entry.symbol, entry.trail_from, entry.trail_to,
+                                                            entry.stats)
+
+    # ----
+    def get_fields(self):
+        """
+        :return: the strategy's public attributes as the GUI shows them, trailing entries excluded
+        """
+        fields = {key: value for key, value in vars(self).items()
+                  if not key.startswith('_') and key != 'pairs_trailing'}
+        fields['pair_settings'] = self.pair_settings.pair_specific_settings
+        return fields
+
+    def get_trailing_view(self, pairs):
+        """
+        :param pairs: the exchange's pairs
+        :return: vars() of the strategy with trailing entries as dicts, built on request for the GUI
+        """
+        return {**self.get_fields(),
+                'pairs_trailing': {symbol: entry.to_dict(pairs.get(symbol))
+                                   for symbol, entry in list(self.pairs_trailing.items())}}
+
+    def get_trailing_json(self, pairs):
+        """
+        get_trailing_view encoded as JSON bytes, the strategy's fields and each entry are encoded once and
+        reused until they change, a request only encodes the pairs' closes
+        :param pairs: the exchange's pairs
+        """
+        encoded_fields = self._encoded_fields
+        if encoded_fields is None or encoded_fields[0] is not self.pair_settings:
+            # fields other than pair_settings are fixed once the strategy is built
+            encoded_fields = (self.pair_settings,
+                              JsonTools.dumpb(self.get_fields())[:-1] + b',"pairs_trailing":{')
+            self._encoded_fields = encoded_fields
+
+        dumpb = JsonTools.dumpb
+        entries = []
+        for symbol, entry in list(self.pairs_trailing.items()):
+            pair = pairs.get(symbol)
+            entries.append(entry.get_encoded() + dumpb(None if pair is None else pair.get('close')) + b'}')
+
+        return encoded_fields[1] + b','.join(entries) + b'}}'
+
+    # ----
+    def compile(self, store):
+        """
+        resolve the conditions' operands to columns of store once, statistics views of that store are then
+        evaluated from its array instead of by name, see check_conditions
+        :param store: StatisticsStore the strategy will be evaluated against
+        """
+        self._compiled = (store, [CompiledCondition(condition, store) for condition in self.conditions_list])
+
+    def check_conditions(self, pair, indicators, is_buy=True):
+        """
+        :param indicators: {statistic name: array} or a view of the store the strategy was compiled against
+        :return: False if any condition evaluates to False
+        """
+        compiled = self._compiled
+        if compiled is not None and type(indicators) is PairStatistics and indicators.store is compiled[0]:
+            pair_id = indicators.pair_id
+            return False not in (condition.evaluate(pair, pair_id, is_buy) for condition in compiled[1])
+
+        return False not in [evaluate_condition(condition, pair, indicators, is_buy) for condition in
+                             self.conditions_list]
 
     def evaluate(self, pair: dict, indicators: dict, balance):
         """
@@ -1,5 +1,4 @@
 from conditions.BuyCondition import Condition
-from conditions.condition_tools import evaluate_condition
 from utils.Utils import get_current_value, get_percent_change
 
 class DCABuyCondition(Condition):
@@ -60,15 +59,12 @@ class DCABuyCondition(Condition):
         # check percent change, if above trigger return none
         above_trigger = percent_change > float(self.get_dca_trigger(dca_level))
 
-        # evaluate all conditions return list of bools
-        analysis = [evaluate_condition(condition, pair, indicators) for condition in self.conditions_list]
-
-        # if any are false, result is false
-        res = False not in analysis and not above_trigger
+        # if any condition is false, result is false
+        res = self.check_conditions(pair, indicators) and not above_trigger
 
         # if we're already trailing, update trail_to if needed
         if res and symbol in self.pairs_trailing:
-            current_marker = self.pairs_trailing[symbol]['trail_from']
+            current_marker = self.pairs_trailing[symbol].trail_from
             marker = price if price < current_marker else current_marker
             trail_to = marker * (1 + (self.trailing_value/100))
             self.pairs_trailing[symbol] = self.trail_to(marker, trail_to, pair, indicators)
@@ -1,5 +1,4 @@
 from conditions.Condition import Condition
-from conditions.condition_tools import evaluate_condition
 from utils.Utils import get_current_value, get_percent_change
 
 import time
@@ -17,12 +16,11 @@ class SellCondition(Condition):
             return bought_price * ((1 + float(sell_value) + fee) / 100)
 
     def get_sell_value(self, pair):
-        pair_settings = self.pair_settings
-        id = pair.split("/")[0]
-        if pair_settings is None or id not in pair_settings or "sell" not in pair_settings[id]:
+        settings = self.pair_settings.get(pair)
+        if settings is None or settings.sell_value is None:
             return self.sell_value
         else:
-            return float(pair_settings[id]["sell"]["value"])
+            return settings.sell_value
 
 
     def evaluate(self, pair: dict, indicators: dict, balance: float=None, fee=0.075):
@@ -48,13 +46,12 @@ class SellCondition(Condition):
             return None
         percent_change = get_percent_change(current_value, total_cost) - fee
         pair['percent_change'] = percent_change
-        analysis = [evaluate_condition(condition, pair, indicators, is_buy=False) for condition in self.conditions_list]
 
         # check percent change, if above trigger return none
-        res = False not in analysis and percent_change > sell_value if sell_value >= 0 else percent_change < sell_value
+        res = self.check_conditions(pair, indicators, is_buy=False) and percent_change > sell_value if sell_value >= 0 else percent_change < sell_value
 
         if res and symbol in self.pairs_trailing:
-            current_marker = self.pairs_trailing[symbol]['trail_from']
+            current_marker = self.pairs_trailing[symbol].trail_from
             marker = price if price > current_marker else current_marker
             trail_to = marker * (1 - (self.trailing_value/100))
             self.pairs_trailing[symbol] = self.trail_to(marker, trail_to, pair, indicators)
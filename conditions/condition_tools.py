@@ -87,6 +87,19 @@ def get_buy_value(x, total_balance):
         return x
 
 
+# buy values are parsed once by the strategy / pair settings, then resolved against the balance on every buy
+def parse_buy_value(x):
+    if isinstance(x, str):
+        return percentToFloat(x), True
+    else:
+        return float(x), False
+
+
+def resolve_buy_value(parsed, total_balance):
+    value, is_percent = parsed
+    return total_balance * value if is_percent else value
+
+
 def percentToFloat(x):
     if x == '':
         raise Exception('error, required field in strategy may be missing')
@@ -0,0 +1,57 @@
+import itertools
+from types import MappingProxyType
+
+_versions = itertools.count(1)
+
+
+class ConfigSnapshot:
+    """
+    Everything the trader reads from the config, frozen at one point in time
+
+    Snapshots are built by the thread that changes the config and published by replacing LiquiTrader.snapshot,
+    a single reference assignment. The trader takes the current snapshot once per cycle, so a cycle never sees
+    half of an update and is never blocked by one
+    """
+
+    __slots__ = ('version', 'general_settings', 'trade_conditions', 'pair_settings', 'buy_strategies',
+                 'dca_buy_strategies', 'sell_strategies', 'indicators', 'timeframes', 'statistics_window')
+
+    def __init__(self, config, buy_strategies, dca_buy_strategies, sell_strategies):
+        """
+        :param config: Config, sections are copied so later changes to it don't leak into the snapshot
+        :param buy_strategies: compiled strategies, see LiquiTrader.load_strategies
+        """
+        values = {
+            'version': next(_versions),
+            'general_settings': MappingProxyType(dict(config.general_settings or {})),
+            # parsed objects are replaced as a whole on update, never modified
+            'trade_conditions': config.trade_conditions,
+            'pair_settings': config.pair_settings_table,
+            'buy_strategies': tuple(buy_strategies),
+            'dca_buy_strategies': tuple(dca_buy_strategies),
+            'sell_strategies': tuple(sell_strategies),
+            'indicators': tuple(MappingProxyType({**indicator, 'timeframes': tuple(indicator.get('timeframes', ()))})
+                                for indicator in config.indicators.values()),
+            'timeframes': frozenset(config.timeframes),
+            'statistics_window': config.statistics_window,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    # ----
+    def __setattr__(self, name, value):
+        raise AttributeError('ConfigSnapshot is immutable, publish a new one instead')
+
+    def __delattr__(self, name):
+        raise AttributeError('ConfigSnapshot is immutable, publish a new one instead')
+
+
+if __name__ == '__main__':
+    from config.config import Config
+
+    config = Config()
+    config.general_settings = {'trading_enabled': True}
+    snapshot = ConfigSnapshot(config, [], [], [])
+    config.general_settings['trading_enabled'] = False
+
+    print(snapshot.version, dict(snapshot.general_settings))
@@ -0,0 +1,91 @@
+from conditions.condition_tools import parse_buy_value
+
+
+def in_range(value, low, high):
+    """
+    same as utils.Utils.in_range on parsed limits, a limit of 0 is disabled
+    """
+    return (low == 0 or value > low) and (high == 0 or value < high)
+
+
+class GlobalTradeConditions:
+    """
+    GlobalTradeConditions.json parsed and validated once
+
+    Instances are never modified after they're built, a settings update builds a new one and replaces
+    Config.trade_conditions, so the trader's checks only read attributes
+    """
+
+    __slots__ = ('min_buy_balance', 'dca_min_buy_balance', 'max_pairs', 'min_change', 'max_change', 'max_spread',
+                 'dca_timeout', 'blacklist', 'whitelist', 'whitelist_all',
+                 'min_24h_quote_change', 'max_24h_quote_change', 'min_1h_quote_change', 'max_1h_quote_change',
+                 'min_24h_market_change', 'max_24h_market_change')
+
+    def __init__(self, global_trade_conditions=None):
+        """
+        :param global_trade_conditions: GlobalTradeConditions.json contents, missing limits are disabled (0)
+        :raises ValueError: when a value can't be parsed
+        """
+        conditions = global_trade_conditions or {}
+
+        def get_float(key):
+            value = conditions.get(key, 0)
+            try:
+                return float(value) if value != '' else 0.0
+            except (TypeError, ValueError):
+                raise ValueError('invalid global trade condition {}: {}'.format(key, value))
+
+        # (value, is percent of total current value), see LiquiTrader.pair_specific_buy_checks
+        self.min_buy_balance = self.parse_balance(conditions.get('min_buy_balance', 0))
+        self.dca_min_buy_balance = self.parse_balance(conditions.get('dca_min_buy_balance', 0))
+
+        self.max_pairs = int(get_float('max_pairs'))
+        self.min_change = get_float('min_change')
+        self.max_change = get_float('max_change')
+        self.max_spread = get_float('max_spread')
+        # seconds
+        self.dca_timeout = get_float('dca_timeout') * 60
+
+        self.blacklist = frozenset(conditions.get('blacklist') or ())
+        self.whitelist = frozenset(conditions.get('whitelist') or ())
+        self.whitelist_all = not self.whitelist or 'ALL' in self.whitelist or 'all' in self.whitelist
+
+        self.min_24h_quote_change = get_float('min_24h_quote_change')
+        self.max_24h_quote_change = get_float('max_24h_quote_change')
+        self.min_1h_quote_change = get_float('min_1h_quote_change')
+        self.max_1h_quote_change = get_float('max_1h_quote_change')
+        self.min_24h_market_change = get_float('min_24h_market_change')
+        self.max_24h_market_change = get_float('max_24h_market_change')
+
+    # ----
+    @staticmethod
+    def parse_balance(value):
+        if value == '':
+            return 0.0, False
+
+        try:
+            return parse_buy_value(value)
+        except (TypeError, ValueError):
+            raise ValueError('invalid global trade condition balance: {}'.format(value))
+
+    # ----
+    def is_tradeable(self, pair):
+        """
+        not blacklisted and whitelisted
+        """
+        return pair not in self.blacklist and (self.whitelist_all or pair in self.whitelist)
+
+    # ----
+    def in_change_range(self, change):
+        return in_range(change, self.min_change, self.max_change)
+
+    def below_max_pairs(self, current_pairs):
+        return current_pairs < self.max_pairs or self.max_pairs == 0
+
+
+if __name__ == '__main__':
+    conditions = GlobalTradeConditions({'max_pairs': '5', 'min_change': '-10', 'max_change': 10,
+                                        'blacklist': ['ADA/ETH'], 'whitelist': ['ALL'], 'min_buy_balance': '5%'})
+
+    print(conditions.is_tradeable('ADA/ETH'), conditions.is_tradeable('XRP/ETH'), conditions.in_change_range(15),
+          conditions.min_buy_balance, conditions.below_max_pairs(4))
@@ -0,0 +1,78 @@
+from conditions.condition_tools import parse_buy_value
+
+
+class PairSettings:
+    """
+    One coin's pair specific settings, parsed
+    buy_modifier multiplies the strategy's buy value ("modify"), buy_override replaces it ("override")
+    """
+
+    __slots__ = ('buy_modifier', 'buy_override', 'sell_value')
+
+    def __init__(self, buy_modifier=None, buy_override=None, sell_value=None):
+        self.buy_modifier = buy_modifier
+        self.buy_override = buy_override
+        self.sell_value = sell_value
+
+
+# ----
+def parse_pair_settings(settings):
+    """
+    :param settings: one coin's entry in PairSpecificSettings.json, ie {"buy": {"method": "modify", "value": 2}}
+    """
+    parsed = PairSettings()
+
+    buy = settings.get('buy')
+    if buy is not None:
+        if buy['method'] == 'modify':
+            parsed.buy_modifier = float(buy['value'])
+        elif buy['method'] == 'override':
+            parsed.buy_override = parse_buy_value(buy['value'])
+
+    sell = settings.get('sell')
+    if sell is not None:
+        parsed.sell_value = float(sell['value'])
+
+    return parsed
+
+
+# =============================
+class PairSettingsTable:
+    """
+    PairSpecificSettings.json parsed once, looked up by market symbol
+
+    Tables are never modified after they're built, a settings update builds a new one (see Config.load_pair_settings)
+    """
+
+    def __init__(self, pair_specific_settings=None):
+        """
+        :param pair_specific_settings: {coin: settings}, coins are the base currency, ie ADA for ADA/ETH
+        """
+        self.pair_specific_settings = pair_specific_settings or {}
+        self.settings = {}
+        self._symbols = {}
+
+        for coin, settings in self.pair_specific_settings.items():
+            try:
+                self.settings[coin] = parse_pair_settings(settings)
+
+            except (KeyError, TypeError, ValueError) as ex:
+                print('invalid pair specific settings for', coin, ex)
+
+    # ----
+    def get(self, symbol):
+        """
+        :return: PairSettings for the symbol's coin, None when it has none
+        """
+        try:
+            return self._symbols[symbol]
+
+        except KeyError:
+            settings = self._symbols[symbol] = self.settings.get(symbol.split('/')[0])
+            return settings
+
+
+if __name__ == '__main__':
+    table = PairSettingsTable({'ADA': {'buy': {'method': 'override', 'value': '5%'}, 'sell': {'value': '1.5'}}})
+    ada = table.get('ADA/ETH')
+    print(ada.buy_override, ada.sell_value, table.get('XRP/ETH'))
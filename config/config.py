@@ -1,7 +1,11 @@
 import json
+import threading
 
 from talib import get_functions as get_talib_functions
 
+from config.GlobalTradeConditions import GlobalTradeConditions
+from config.PairSettingsTable import PairSettingsTable
+
 BUY_STRATEGY_PATH = 'config/BuyStrategies.json'
 DCA_STRATEGY_PATH = 'config/DCABuyStrategies.json'
 GENERAL_SETTINGS_PATH = 'config/GeneralSettings.json'
@@ -11,6 +15,24 @@ SELL_STRATEGIES_PATH = 'config/SellStrategies.json'
 
 talib_funcs = get_talib_functions()
 
+
+def get_statistics_window(condition):
+    """
+    :return: indicator values the condition needs, the current one plus cross_candles / change_over candles back
+    """
+    lookbacks = [condition.get('cross_candles', 1)]
+    lookbacks += [part.get('change_over') for part in condition.values() if isinstance(part, dict)]
+
+    window = 2
+    for lookback in lookbacks:
+        try:
+            window = max(window, int(lookback) + 1)
+        except (TypeError, ValueError):
+            continue
+
+    return window
+
+
 class Config:
 
     def __init__(self, lt_callback=None):
@@ -19,15 +41,24 @@ class Config:
         self.sell_strategies = None
         self.general_settings = None
         self.pair_specific_settings = None
+        # parsed pair_specific_settings, replaced as a whole whenever they're loaded / updated
+        self.pair_settings_table = PairSettingsTable()
         self.global_trade_conditions = None
+        # parsed global_trade_conditions, replaced as a whole whenever they're loaded / updated
+        self.trade_conditions = GlobalTradeConditions()
         self.timeframes = set()
         self.indicators = {}
+        # indicator values conditions look back over, see get_statistics_window
+        self.statistics_window = 2
         self.update_lt_callback = lt_callback
+        # held while a section is written and the trader rebuilds its snapshot, see LiquiTrader.update_config
+        self.update_lock = threading.RLock()
 
     # ----
     def load_pair_settings(self):
         with open(PAIR_SPECIFIC_SETTINGS_PATH, 'r') as f:
             self.pair_specific_settings = json.load(f)
+        self.pair_settings_table = PairSettingsTable(self.pair_specific_settings)
         return self.pair_specific_settings
 
     # ----
@@ -57,6 +88,7 @@ class Config:
     def load_global_trade_conditions(self):
         with open(GLOBAL_TRADE_CONDITION_PATH, 'r') as f:
             self.global_trade_conditions = json.load(f)
+        self.trade_conditions = GlobalTradeConditions(self.global_trade_conditions)
 
     # ----
     def update_buy_strategies(self, json_data):
@@ -84,36 +116,49 @@ class Config:
 
     # ----
     def update_global_trade_conditions(self, json_data):
+        # parsed first, invalid conditions raise before anything is written
+        trade_conditions = GlobalTradeConditions(json_data)
         with open(GLOBAL_TRADE_CONDITION_PATH, 'w') as f:
             json.dump(json_data, f)
             self.global_trade_conditions = json_data
+            self.trade_conditions = trade_conditions
             
     # ----
     def update_pair_settings(self, json_data):
         with open(PAIR_SPECIFIC_SETTINGS_PATH, 'w') as f:
             json.dump(json_data, f)
             self.pair_specific_settings = json_data
+            self.pair_settings_table = PairSettingsTable(json_data)
 
     # ----
     def parse_indicators_from_strategy(self, strategies):
         for strategy in strategies:
             self.timeframes = set(self.timeframes)
             for condition in strategy['conditions']:
+                self.statistics_window = max(self.statistics_window, get_statistics_window(condition))
                 for key, part in condition.items():
                     if isinstance(part, dict):
                         if 'value' in part:
                             if part['value'] in talib_funcs:
                                 period = 0 if "candle_period" not in part else part["candle_period"]
-                                indicator = { "name": part['value'], "candle_period": period}
                                 # store in dict since we couldnt store a set of dicts
-                                hashvalue = "{}{}".format(*indicator.values())
-                                self.indicators[hashvalue] = indicator
+                                hashvalue = "{}{}".format(part['value'], period)
+                                indicator = self.indicators.setdefault(
+                                    hashvalue, {"name": part['value'], "candle_period": period, "timeframes": []}
+                                )
                                 if 'timeframe' in part:
                                     self.timeframes.add(part['timeframe'])
+                                    # run_ta only calculates the indicator on timeframes listed here
+                                    if part['timeframe'] not in indicator['timeframes']:
+                                        indicator['timeframes'].append(part['timeframe'])
         return self.indicators
 
     # ----
     def load_all_strategies(self):
+        # rebuilt from scratch so indicators removed from every strategy stop being calculated
+        self.indicators = {}
+        self.statistics_window = 2
+
         self.parse_indicators_from_strategy(self.load_buy_strategies())
 
         self.parse_indicators_from_strategy(self.load_dca_buy_strategies())
@@ -136,10 +181,11 @@ class Config:
             "global_trade_conditions": self.update_global_trade_conditions,
             "pair_specific": self.update_pair_settings,
         }
-        config_update_cases[section](data)
-        if self.update_lt_callback is not None:
-            print("updating config")
-            self.update_lt_callback(strategies='strategies' in section)
+        with self.update_lock:
+            config_update_cases[section](data)
+            if self.update_lt_callback is not None:
+                print("updating config")
+                self.update_lt_callback(strategies='strategies' in section)
 
     def get_config(self):
         self.timeframes = list(self.timeframes)
@@ -10,6 +10,7 @@ import asyncio
 from utils.CandleTools import candles_to_df, candle_tic_to_df
 # import SocketManager
 from exchanges.SocketManager import subscribe_ws
+from utils.Metrics import METRICS
 
 
 # TODO check last socket update time and restart if needed
@@ -20,9 +21,10 @@ class BinanceExchange(GenericExchange):
                  quote_currency: str,
                  starting_balance: float,
                  access_keys: typing.Dict[typing.Union[str, str], typing.Union[str, str]],
-                 candle_timeframes: typing.List[str]):
+                 candle_timeframes: typing.List[str],
+                 pool_settings: typing.Dict[str, int] = None):
 
-        super().__init__(exchange_id, quote_currency, starting_balance, access_keys, candle_timeframes)
+        super().__init__(exchange_id, quote_currency, starting_balance, access_keys, candle_timeframes, pool_settings)
         self._socket_upkeep_schedule = 60
 
         self.socket_manager = None
@@ -30,11 +32,22 @@ class BinanceExchange(GenericExchange):
         self.candle_socket = None
         self.ticker_socket = None
         self.depth_socket = None
+        # SocketRecorder logging ticker / depth / candle messages for SocketReplayer, see LiquiTrader.initialize_exchange
+        self.socket_recorder = None
 
         self.last_candle_update_time = None
         self.last_depth_update_time = None
         self.last_ticker_update_time = None
 
+        # private user data stream (execution reports, account updates)
+        self.user_socket = None
+        self.last_user_update_time = None
+        # while the user stream is live REST balance polling is only a safety net
+        self._user_stream_reconcile_schedule = 900
+        self._polling_balance_upkeep_schedule = self._balance_upkeep_call_schedule
+        # seconds before reopening a user stream that failed to open or died
+        self._user_stream_retry_schedule = 60
+
     # ----
     def _init_client_connection(self):
         super()._init_client_connection()
@@ -69,8 +82,13 @@ class BinanceExchange(GenericExchange):
         # renamed what used to be pair.price to pair['close'] to follow CCXT conventions
 
         if symbol in self.pairs:
-            data['close'] = float(data['info']['c'])
-            self.pairs[symbol].update(data)
+            # ccxt already parsed close from the payload, only fall back to the raw field if it's missing
+            close = data['close'] if data.get('close') is not None else data['info']['c']
+
+            # buffered, written into pairs by _ticker_flush_upkeep
+            self.ticker_ingest.push(symbol, data['bid'], data['ask'], close,
+                                    data['quoteVolume'], data['percentage'])
+            self.last_ticker_update_time = time.time()
 
         elif 'USDT' in symbol:
             self.quote_change = float(data['percentage'])
@@ -85,6 +103,133 @@ class BinanceExchange(GenericExchange):
             pair['asks'] = data['asks']
             pair['bids'] = data['bids']
 
+    # ----
+    def init_socket_manager(self, key, secret):
+        from binance.client import Client
+        from binance.websockets import BinanceSocketManager
+
+        self.socket_manager = BinanceSocketManager(Client(key, secret))
+
+    # ----
+    def start_user_socket(self):
+        """
+        subscribe to the private user data stream so fills and balances are applied as they happen
+        falls back to REST polling in _balances_upkeep while the stream can't be opened, and retries it
+        runs on the exchange loop
+        """
+        if self.is_paper:
+            return
+
+        try:
+            if self.socket_manager is None:
+                self.init_socket_manager(self._access_keys['public'], self._access_keys['secret'])
+            self.user_socket = self.socket_manager.start_user_socket(self.handle_user_socket)
+
+        except Exception as ex:
+            print('binance.start_user_socket: could not open user data stream, polling balances instead', ex)
+            self.user_socket = None
+
+        if not self.user_socket:
+            self.user_socket = None
+            self._loop.call_later(self._user_stream_retry_schedule, self.start_user_socket)
+            return
+
+        # the manager's (twisted) thread is started once, reopened streams are added to it
+        if self.socket_manager.ident is None:
+            self.socket_manager.start()
+        self._balance_upkeep_call_schedule = self._user_stream_reconcile_schedule
+
+    # ----
+    def handle_user_socket(self, msg):
+        """
+        called on the socket manager's thread, messages are handled on the exchange loop which owns pairs
+        """
+        self._loop.call_soon_threadsafe(self.process_user_message, msg)
+
+    @METRICS.timed('socket_handler_seconds', event='user')
+    def process_user_message(self, msg):
+        event = msg.get('e')
+
+        if event == 'executionReport':
+            self.handle_execution_report(msg)
+
+        elif event in ('outboundAccountInfo', 'outboundAccountPosition'):
+            self.handle_account_update(msg)
+
+        elif event == 'error':
+            # stream died, poll balances until it's reopened
+            print('binance.handle_user_socket', msg.get('m'))
+            self.close_user_socket()
+            self._balance_upkeep_call_schedule = self._polling_balance_upkeep_schedule
+            self._loop.call_later(self._user_stream_retry_schedule, self.start_user_socket)
+
+    def close_user_socket(self):
+        if self.user_socket is not None and self.socket_manager is not None:
+            try:
+                self.socket_manager.stop_socket(self.user_socket)
+            except Exception as ex:
+                print('binance.close_user_socket', ex)
+        self.user_socket = None
+
+    # ----
+    def handle_execution_report(self, msg):
+        """
+        apply a fill from an execution report, skipped if place_order already applied it from the REST response
+        i: order id, z: cumulative filled qty, l: last executed qty, L: last executed price, n: commission,
+        N: commission asset, S: side
+        """
+        self.last_user_update_time = time.time()
+
+        # only TRADE executions move position / balance
+        if msg['x'] != 'TRADE':
+            return
+
+        symbol = self.parse_market_id(msg['s'])
+        if symbol not in self.pairs:
+            return
+
+        filled = float(msg['l'])
+        cost = filled * float(msg['L'])
+        fee_currency = msg['N']
+        fee_cost = float(msg['n']) if fee_currency is not None else 0
+
+        self._apply_order_fill(msg['i'], symbol, msg['S'], float(msg['z']), filled, cost, fee_currency, fee_cost)
+
+    # ----
+    def handle_account_update(self, msg):
+        """
+        account updates carry the exchange's view of free / locked per asset, these overwrite our running totals
+        a position's cost follows its new total at the same average price, positions without an average are
+        left to the REST reconciliation in _balances_upkeep
+        """
+        self.last_user_update_time = time.time()
+        self.state_version += 1
+
+        with self._fills_lock:
+            for asset in msg['B']:
+                free = float(asset['f'])
+                used = float(asset['l'])
+
+                if asset['a'] == self.quote_currency:
+                    self.balance = free + used
+                    continue
+
+                symbol = asset['a'] + '/' + self.quote_currency
+                if symbol in self.pairs:
+                    pair = self.pairs[symbol]
+                    total = free + used
+                    pair['free'] = free
+                    pair['used'] = used
+                    pair['total'] = total
+                    pair['amount'] = total
+
+                    if pair.get('avg_price') is not None:
+                        if total > 0:
+                            pair['total_cost'] = pair['avg_price'] * total
+                        else:
+                            pair['total_cost'] = 0
+                            pair['avg_price'] = None
+
     # ----
     def get_depth(self, symbol, side):
         """
@@ -115,14 +260,17 @@ class BinanceExchange(GenericExchange):
     async def initialize(self):
         # this may want to be split up
         self._init_client_connection()
-        self._client.load_markets()
+        await self._run_blocking(self._client.load_markets)
 
         await super().initialize()
 
-        time.sleep(1)
+        await asyncio.sleep(1)
         # self.start_sockets()
 
-        self.update_balances()
+        # paper balances only change through place_order
+        if not self.is_paper:
+            balances, trades = await self._run_blocking(self.fetch_balances)
+            self.apply_balances(balances, trades)
 
     # ----
     def start(self):
@@ -134,23 +282,38 @@ class BinanceExchange(GenericExchange):
         if not self._loop:
             self._loop = asyncio.get_event_loop()
 
+        self._loop.create_task(self._loop_lag_upkeep())
+        self._loop.create_task(self._ticker_flush_upkeep())
         self._loop.create_task(self._quote_change_upkeep())
         self._loop.create_task(self._balances_upkeep())
         self._loop.create_task(self._socket_upkeep())
 
+        self.start_user_socket()
+
         pairs_list = list(self.pairs.keys())
-        self._loop.create_task(subscribe_ws('ob', self._client_async, pairs_list, callback=self.handle_depth_socket))
-        self._loop.create_task(subscribe_ws('ticker', self._client_async, pairs_list, callback=self.handle_ticker_socket))
+        recorder = self.socket_recorder
+        self._loop.create_task(subscribe_ws('ob', self._client_async, pairs_list, callback=self.handle_depth_socket,
+                                            recorder=recorder))
+        self._loop.create_task(subscribe_ws('ticker', self._client_async, pairs_list,
+                                            callback=self.handle_ticker_socket, recorder=recorder))
 
         for interval in self._candle_timeframes:
             self._loop.create_task(subscribe_ws('ohlcv', self._client_async, pairs_list, interval=interval,
-                                                callback=self.handle_candle_socket))
+                                                callback=self.handle_candle_socket, recorder=recorder))
         self._loop.run_forever()
 
     # ----
     def stop(self):
         from twisted.internet import reactor
 
+        if self.socket_manager is not None:
+            self.socket_manager.close()
+
+        if self.socket_recorder is not None:
+            self.socket_recorder.close()
+
+        self._executor.shutdown(wait=False)
+
         # Kill Binance library's Twisted server
         reactor.callFromThread(lambda: reactor.stop())
 
@@ -166,7 +329,12 @@ class BinanceExchange(GenericExchange):
         # split the stream name to get and format symbol for dict access
         # need to find better way to fix removed / changed names for main net swaps
         stream = stream_name.split('@')[0]
-        return self._client.markets_by_id[stream.upper()]['symbol']
+        return self.parse_market_id(stream)
+
+    # ----
+    def parse_market_id(self, market_id):
+        # binance market id (ADAETH) to ccxt symbol (ADA/ETH)
+        return self._client.markets_by_id[market_id.upper()]['symbol']
 
     # ----
     @staticmethod
@@ -1,20 +1,42 @@
 import asyncio
+import collections
+import functools
 import typing
 import itertools
+import threading
 import time
 import os
 import sys
 import json
+import ssl
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 
 import ccxt
 import ccxt.async_support as ccxt_async
 
 from utils.CandleTools import candles_to_df, candle_tic_to_df, get_change_between_candles
 from utils.AverageCalcs import calc_average_price_from_hist, calculate_from_existing
+from utils.Metrics import Histogram, LatencyTracker
+from exchanges.TickerIngest import TickerIngest
+from utils import JsonTools
 
 # TODO async update balances every min
 
 
+# shared HTTP connection pool defaults, override with the pool_settings arg
+DEFAULT_POOL_SETTINGS = {
+    'pool_size': 20,  # max open connections per client
+    'keepalive_timeout': 30,  # seconds an idle async connection is kept open
+    'dns_cache_ttl': 300,  # seconds async DNS lookups are cached
+}
+
+# orders whose applied fills are remembered, a streamed report arrives seconds after its order at most
+MAX_TRACKED_ORDERS = 500
+
 # DEFAULT_WALLET_VALUES = [('free',0),( 'used',0),('total',0),('current_value',0),( 'trades',None),( 'last_id',0), ('current_average', None) ]
 
 class GenericExchange:
@@ -46,7 +68,8 @@ class GenericExchange:
                  quote_currency: str,
                  starting_balance: float,
                  access_keys: typing.Dict[typing.Union[str, str], typing.Union[str, str]],
-                 candle_timeframes: typing.List[str]):
+                 candle_timeframes: typing.List[str],
+                 pool_settings: typing.Dict[str, int] = None):
 
         self.pairs = {}
         # moved candles to a seperate dict to make working with pairs easier / cheaper
@@ -73,6 +96,14 @@ class GenericExchange:
         self._client = None
         self._client_async = None
 
+        # HTTP sessions are kept for the lifetime of the exchange so restart() reuses warm connections
+        self._pool_settings = {**DEFAULT_POOL_SETTINGS, **(pool_settings or {})}
+        self._session = None
+        self._async_session = None
+
+        # per REST endpoint request latency, keyed by ccxt api path ie 'depth', 'klines'
+        self.latency = LatencyTracker()
+
         self.balance = starting_balance
         self.quote_price = 0
         self.quote_change = 0
@@ -83,6 +114,29 @@ class GenericExchange:
         self._candle_upkeep_call_schedule = 60  # Call candle_upkeep() every 60s
         self._quote_change_upkeep_call_schedule = 60  # Call quote_change_upkeep() every 60s
         self._balance_upkeep_call_schedule = 65
+        self._loop_lag_check_schedule = 0.5  # Call loop_lag_upkeep() every 0.5s
+        self._ticker_flush_call_schedule = 0.25  # Call ticker_flush_upkeep() every 0.25s
+
+        # parses / coalesces ticker updates before they're written into self.pairs
+        self.ticker_ingest = TickerIngest()
+
+        # blocking (sync ccxt) calls made from coroutines run here instead of on the event loop
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='exchange-io')
+        self._pending_candle_reloads = set()
+        self._pending_candle_reloads_lock = threading.Lock()
+
+        # report when a callback holds the event loop longer than this
+        self.loop_lag_threshold_ms = 100
+        self.loop_lag = Histogram()
+        self.max_loop_lag = 0
+
+        # bumped whenever tickers or positions change, see LiquiTrader.get_state_version
+        self.state_version = 0
+
+        # {order id: base quantity applied}, REST responses and streamed execution reports report the same fills
+        # whichever lands first applies them, see _apply_order_fill
+        self._applied_fills = collections.OrderedDict()
+        self._fills_lock = threading.Lock()
 
         self.quote_change_info = {'1h': 0, '4h': 0, '24h': 0, '6h': 0, '12h': 0}
         self.is_paper = False
@@ -105,6 +159,7 @@ class GenericExchange:
             'timeout': 50000,
             'enableRateLimit': True,
             'parseOrderToPrecision': True,
+            'session': self._get_http_session(),
         })
 
         async_params = {
@@ -117,21 +172,118 @@ class GenericExchange:
         }
 
         if hasattr(sys, 'frozen'):
-            async_params['cafile'] = os.path.join(os.path.dirname(sys.executable), 'lib', 'cacert.pem')
+            async_params['cafile'] = self._get_cafile()
+
+        # the async session needs a running loop, it gets attached in _open_async_session
+        if self._async_session is not None and not self._async_session.closed:
+            async_params['session'] = self._async_session
 
         # initialize async client
         self._client_async = self._exchange_class_async(async_params)
 
+        self._time_requests(self._client)
+        self._time_requests_async(self._client_async)
+
+        JsonTools.install_fast_parser(self._client)
+        JsonTools.install_fast_parser(self._client_async)
+
+    # ----
+    @staticmethod
+    def _get_cafile():
+        return os.path.join(os.path.dirname(sys.executable), 'lib', 'cacert.pem')
+
+    # ----
+    def _get_http_session(self):
+        """
+        pooled keep-alive session shared by every synchronous client this exchange creates
+        """
+        if self._session is None:
+            pool_size = int(self._pool_settings['pool_size'])
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+            self._session = requests.Session()
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+
+        return self._session
+
+    # ----
+    async def _open_async_session(self):
+        """
+        pooled keep-alive session with DNS caching for the async client
+        ccxt won't close a session it was handed, so it survives restart()
+        """
+        if self._async_session is None or self._async_session.closed:
+            pool_size = int(self._pool_settings['pool_size'])
+
+            if hasattr(sys, 'frozen'):
+                ssl_context = ssl.create_default_context(cafile=self._get_cafile())
+            else:
+                ssl_context = ssl.create_default_context()
+
+            connector = aiohttp.TCPConnector(limit=pool_size,
+                                             limit_per_host=pool_size,
+                                             ttl_dns_cache=int(self._pool_settings['dns_cache_ttl']),
+                                             keepalive_timeout=float(self._pool_settings['keepalive_timeout']),
+                                             ssl=ssl_context,
+                                             enable_cleanup_closed=True)
+
+            self._async_session = aiohttp.ClientSession(connector=connector)
+
+        self._client_async.session = self._async_session
+        self._client_async.own_session = False
+
+    # ----
+    def _time_requests(self, client):
+        request = client.request
+        observe = self.latency.observe
+
+        def timed_request(path, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return request(path, *args, **kwargs)
+            finally:
+                observe(path, time.perf_counter() - start)
+
+        client.request = timed_request
+
+    # --
+    def _time_requests_async(self, client):
+        request = client.request
+        observe = self.latency.observe
+
+        async def timed_request(path, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await request(path, *args, **kwargs)
+            finally:
+                observe(path, time.perf_counter() - start)
+
+        client.request = timed_request
+
+    # ----
+    def get_latency_stats(self):
+        return self.latency.get_stats()
+
     # ----
     async def initialize(self):
         # Mandatory to call this before any other calls are made to Bittrex
+        await self._open_async_session()
         await self._client_async.load_markets()
         self.load()
-        self._initialize_pairs()
+        await self._run_blocking(self._initialize_pairs)
         await self.load_all_candle_histories(num_candles=500)
 
+    # ----
+    async def _run_blocking(self, func, *args, **kwargs):
+        """
+        run a blocking call (sync ccxt client, file io) on the exchange executor so it doesn't stall the loop
+        """
+        return await self._loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
     # ----
     def start(self):
+        self._loop.create_task(self._loop_lag_upkeep())
         self._loop.create_task(self._candle_upkeep())
         self._loop.create_task(self._ticker_upkeep())
         self._loop.create_task(self._quote_change_upkeep())
@@ -148,6 +300,7 @@ class GenericExchange:
 
         self._loop = asyncio.get_event_loop()
         self._init_client_connection()
+        await self._open_async_session()
         self._loop.run_until_complete(self._client_async.load_markets())
 
         self.start()
@@ -165,8 +318,38 @@ class GenericExchange:
         if we already own the pair calculate from previous bought price, else calculate from full history
         average calc dict format: {'total_cost': total_cost, 'amount': end_amount, 'avg_price': avg_price, 'last_id': last_buy_id}
         """
+        self.apply_balances(*self.fetch_balances())
+
+    # --
+    def _balance_needs_trades(self, symbol, amount):
+        pair = self.pairs[symbol]
 
+        # if we already have average data, only recalculate when the amount changed
+        if pair['total_cost'] != 0:
+            return amount != pair['total']
+
+        # skip wicked small values
+        return amount >= pair['limits']['amount']['min']
+
+    def fetch_balances(self):
+        """
+        blocking REST half of update_balances, safe to run off the event loop as it doesn't modify pairs
+        :return: (balances, {symbol: trade history} for the pairs whose average has to be recalculated)
+        """
         balances = self._client.fetchBalance()
+        trades = {}
+        for key in balances:
+            symbol = key + '/' + self.quote_currency
+            if key != self.quote_currency and symbol in self.pairs \
+                    and self._balance_needs_trades(symbol, balances[key]['total']):
+                trades[symbol] = self._client.fetchMyTrades(symbol)
+
+        return balances, trades
+
+    def apply_balances(self, balances, trades):
+        """
+        write fetch_balances' result into pairs, runs on the thread that owns pairs (the exchange loop)
+        """
         for key in balances:
             if key == self.quote_currency:
                 self.balance = balances[key]['total']
@@ -176,14 +359,17 @@ class GenericExchange:
             if symbol in self.pairs:
                 amount = balances[key]['total']
 
-                # if we already have average data, calculate from existing
-                if symbol in self.pairs and self.pairs[symbol]['total_cost'] != 0:
-                    if amount != self.pairs[symbol]['total']:
-                        trades = self._client.fetchMyTrades(symbol)
+                if self._balance_needs_trades(symbol, amount):
+                    if symbol not in trades:
+                        # the position changed since the fetch, the next update picks it up
+                        continue
+
+                    # if we already have average data, calculate from existing
+                    if self.pairs[symbol]['total_cost'] != 0:
                         # update free, used, total
                         self.pairs[symbol].update(balances[key])
                         # update with new average data
-                        new_average_data = calc_average_price_from_hist(trades, amount)
+                        new_average_data = calc_average_price_from_hist(trades[symbol], amount)
 
                         if new_average_data is None:
                             self.pairs[symbol]['total_cost'] = None
@@ -193,27 +379,26 @@ class GenericExchange:
                         else:
                             self.pairs[symbol].update(new_average_data)
 
-                # if we don't have average data / trade history, add new
-                else:
-                    # skip wicked small values
-                    if amount < self.pairs[symbol]['limits']['amount']['min']:
-                        continue
+                    # if we don't have average data / trade history, add new
+                    else:
+                        # calculate average data
+                        average_data = calc_average_price_from_hist(trades[symbol], amount)
 
-                    # fetch trades for symbol from API
-                    trades = self._client.fetchMyTrades(symbol)
-                    # calculate average data
-                    average_data = calc_average_price_from_hist(trades, amount)
+                        if average_data is None:
+                            continue
 
-                    if average_data is None:
-                        # if we cant calculate teh avg, print out some datas to help with debugging
-                        continue
+                        self.pairs[symbol].update(average_data)
+                        self.pairs[symbol].update(balances[key])
 
-                    self.pairs[symbol].update(average_data)
-                    self.pairs[symbol].update(balances[key])
+                elif self.pairs[symbol]['total_cost'] == 0:
+                    # wicked small value without average data
+                    continue
 
                 self.pairs[symbol]['total'] = amount
                 self.pairs[symbol]['amount'] = amount
 
+        self.state_version += 1
+
     # ----
     def _initialize_pairs(self):
         # TODO: Make async?
@@ -258,43 +443,90 @@ class GenericExchange:
         if bought_price is not None:
             order['bought_price'] = bought_price
 
-        if 'total' not in self.pairs[symbol]:
-            self.pairs[symbol]['total'] = 0
-        filled = order['filled']
+        # applied right away so the next cycle sees the position, a streamed report for the same order is skipped
+        self._apply_order_fill(order['id'], symbol, side, order['filled'], order['filled'], order['cost'],
+                               order['fee']['currency'], order['fee']['cost'])
+
+        # temp - will manually calc avg instead of calling update
+        # self.update_balances()
+
+        return order
+
+    # ----
+    def _apply_order_fill(self, order_id, symbol, side, filled_to, filled, cost, fee_currency, fee_cost):
+        """
+        apply the part of an order's fill that wasn't applied yet, safe to call from any thread
+        :param order_id: exchange order id
+        :param filled_to: order's cumulative filled quantity after this fill
+        :param filled: quantity of this fill, it covers filled_to - filled up to filled_to
+        :param cost: quote cost of this fill
+        :return: True if anything was applied
+        """
+        order_id = str(order_id)
+
+        with self._fills_lock:
+            applied = self._applied_fills.get(order_id, 0)
+            new = filled_to - max(applied, filled_to - filled)
+            if new <= 0 or filled <= 0:
+                return False
+
+            self._applied_fills[order_id] = filled_to
+            self._applied_fills.move_to_end(order_id)
+            if len(self._applied_fills) > MAX_TRACKED_ORDERS:
+                self._applied_fills.popitem(last=False)
+
+            share = new / filled
+            self._apply_fill(symbol, side, new, cost * share, fee_currency, fee_cost * share)
+            return True
+
+    def _apply_fill(self, symbol, side, filled, cost, fee_currency, fee_cost):
+        """
+        apply a single fill to the pair's position and the quote balance
+        used by place_order and by streamed execution reports
+        :param symbol: pair symbol ie ADA/ETH
+        :param side: buy/sell
+        :param filled: base quantity filled
+        :param cost: quote cost of the fill
+        :param fee_currency: currency the fee was paid in
+        :param fee_cost: fee amount
+        :return:
+        """
+        pair = self.pairs[symbol]
+        side = side.lower()
+        self.state_version += 1
+
+        if 'total' not in pair:
+            pair['total'] = 0
 
         # fee will only be currency
-        if self.pairs[symbol]['base'] == order['fee']['currency']:
-            filled -= order['fee']['cost']
+        if pair['base'] == fee_currency:
+            filled -= fee_cost
 
         # increment or decrement 'total' (quantity owned)
-        self.pairs[symbol]['total'] += filled if side == 'buy' else - filled
+        pair['total'] += filled if side == 'buy' else - filled
 
         # if total cost is none set to 0 to avoid nonetype + float err
-        if self.pairs[symbol]['total_cost'] is None:
-            self.pairs[symbol]['total_cost'] = 0
+        if pair['total_cost'] is None:
+            pair['total_cost'] = 0
 
         # increment or decrement total cost
-        self.pairs[symbol]['total_cost'] += order['cost'] if side == 'buy' else - order['cost']
+        pair['total_cost'] += cost if side == 'buy' else - cost
 
         # if we sell at a profit reset total cost to 0
-        if self.pairs[symbol]['total_cost'] < 0:
-            self.pairs[symbol]['total_cost'] = 0
+        if pair['total_cost'] < 0:
+            pair['total_cost'] = 0
 
         # recalculate average price from total cost and amount
         try:
-            if side.lower() == 'buy':
-                self.pairs[symbol]['avg_price'] = self.pairs[symbol]['total_cost'] / self.pairs[symbol]['total']
+            if side == 'buy':
+                pair['avg_price'] = pair['total_cost'] / pair['total']
         except ZeroDivisionError:
-            self.pairs[symbol]['avg_price'] = None
+            pair['avg_price'] = None
 
         # update quote balance
-        self.balance -= order['cost'] if side == 'buy' else - order['cost']
+        self.balance -= cost if side == 'buy' else - cost
         # update last order time
-        self.pairs[symbol]['last_order_time'] = int(time.time())
-        # temp - will manually calc avg instead of calling update
-        # self.update_balances()
-
-        return order
+        pair['last_order_time'] = int(self.get_time())
 
     # ----
     def get_depth(self, symbol, side):
@@ -322,6 +554,7 @@ class GenericExchange:
                 return await self._client_async.fetchOHLCV(symbol, timeframe=timeframe, limit=limit)
 
             except Exception as ex:
+                counter += 1
                 print(f'Got {ex} during safe_fetch_ohlcv(), retrying ({counter}/10)')
 
     # ----
@@ -408,9 +641,35 @@ class GenericExchange:
         """
 
         while 1:
-            self.update_balances()
+            # paper balances only change through place_order
+            if not self.is_paper:
+                # REST calls on the executor, pairs are only written here on the loop
+                balances, trades = await self._run_blocking(self.fetch_balances)
+                self.apply_balances(balances, trades)
+
             await asyncio.sleep(self._balance_upkeep_call_schedule)
 
+    # --
+    async def _loop_lag_upkeep(self):
+        """
+        measure how late the loop wakes this task up, anything past the sleep interval is time
+        another callback spent holding the loop
+        """
+
+        while 1:
+            interval = self._loop_lag_check_schedule
+            start = self._loop.time()
+            await asyncio.sleep(interval)
+            lag = self._loop.time() - start - interval
+
+            self.loop_lag.observe(lag)
+            if lag > self.max_loop_lag:
+                self.max_loop_lag = lag
+
+            if lag * 1000 > self.loop_lag_threshold_ms:
+                print(f'Exchange event loop was blocked for {lag * 1000:.0f}ms '
+                      f'(threshold {self.loop_lag_threshold_ms}ms)')
+
     # ----
     async def _ticker_upkeep(self):
         """
@@ -423,14 +682,35 @@ class GenericExchange:
         while 1:
             tickers = await self._client_async.fetchTickers()
 
+            ingest = self.ticker_ingest
             for ticker_info in tickers.values():
                 symbol = ticker_info['symbol']
 
                 if symbol in self.pairs:
-                    self.pairs[symbol].update(ticker_info)
+                    ingest.push_ticker(symbol, ticker_info)
+
+            self.flush_tickers()
 
             await asyncio.sleep(self._ticker_upkeep_call_schedule)
 
+    # --
+    async def _ticker_flush_upkeep(self):
+        """
+        write ticker updates buffered by the ticker socket into pairs once per flush window
+        """
+
+        while 1:
+            self.flush_tickers()
+            await asyncio.sleep(self._ticker_flush_call_schedule)
+
+    def flush_tickers(self):
+        if self.ticker_ingest.flush(self.pairs):
+            self.state_version += 1
+
+    def get_time(self):
+        # exchange clock in seconds, simulated exchanges (backtesting) override this
+        return time.time()
+
     def get_min_cost(self, symbol):
         limits = self.pairs[symbol]['limits']
         if 'cost' in limits:
@@ -439,27 +719,58 @@ class GenericExchange:
             return limits['amount']['min'] * limits['price']['min']
 
     def reload_single_candle_history(self, symbol):
+        """
+        schedule a candle history refetch for symbol on the exchange loop, safe to call from any thread
+        calls for a symbol that already has a reload pending are dropped, as are calls while the loop isn't running
+        """
+        if not self._loop.is_running():
+            print('exchange: loop not running, candle reload dropped for', symbol)
+            return
+
+        with self._pending_candle_reloads_lock:
+            if symbol in self._pending_candle_reloads:
+                return
+            self._pending_candle_reloads.add(symbol)
+
+        coroutine = self._reload_single_candle_history(symbol)
+        try:
+            future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+        except RuntimeError as ex:
+            # loop closed between the check and scheduling
+            coroutine.close()
+            self._discard_pending_candle_reload(symbol)
+            print('exchange: could not schedule candle reload for', symbol, ex)
+            return
+
+        # done however the reload ends, including cancellation when the loop stops
+        future.add_done_callback(lambda _: self._discard_pending_candle_reload(symbol))
+
+    def _discard_pending_candle_reload(self, symbol):
+        with self._pending_candle_reloads_lock:
+            self._pending_candle_reloads.discard(symbol)
+
+    # --
+    async def _reload_single_candle_history(self, symbol):
         for period in self._candle_timeframes:
-            candlesticks = self._client.fetchOHLCV(symbol, timeframe=period, limit=300)
+            candlesticks = await self.safe_fetch_ohlcv(symbol, period, 300)
             self.candles[symbol][period] = candles_to_df(candlesticks)
 
     def save(self):
         fp = 'exchange.json'
         name = self.name + '-paper' if self.is_paper else self.name
-        with open(fp, 'w') as f:
-            json.dump({
-                name: {
-                    "pairs": self.pairs,
-                    "balance": self.balance
-                }
-            }, f)
+        JsonTools.dump_file({
+            name: {
+                "pairs": self.pairs,
+                "balance": self.balance
+            }
+        }, fp)
 
     def load(self):
         try:
             fp = 'exchange.json'
             name = self.name + '-paper' if self.is_paper else self.name
-            with open(fp, 'r') as f:
-                data = json.load(f)
+            data = JsonTools.load_file(fp)
             if name in data:
                 data = data[name]
                 self.pairs = data['pairs']
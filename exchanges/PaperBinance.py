@@ -64,9 +64,10 @@ class PaperBinance(BinanceExchange):
                  quote_currency: str,
                  starting_balance: float,
                  access_keys: typing.Dict[typing.Union[str, str], typing.Union[str, str]],
-                 candle_timeframes: typing.List[str]):
+                 candle_timeframes: typing.List[str],
+                 pool_settings: typing.Dict[str, int] = None):
 
-        super().__init__(exchange_id, quote_currency, starting_balance, access_keys, candle_timeframes)
+        super().__init__(exchange_id, quote_currency, starting_balance, access_keys, candle_timeframes, pool_settings)
         self.order_id = 0
         self.balance = starting_balance
         self.errors = []
@@ -114,7 +115,8 @@ class PaperBinance(BinanceExchange):
         self.balance -= order['cost'] if side == 'buy' else - order['cost']
 
         # update last order time
-        self.pairs[symbol]['last_order_time'] = int(time.time())
+        self.pairs[symbol]['last_order_time'] = int(self.get_time())
+        self.state_version += 1
         # temp - will manually calc avg instead of calling update
         # self.update_balances()
 
@@ -1,7 +1,9 @@
 import traceback
 import datetime
 
-async def subscribe_ws(event, exchange, symbols, limit=20, debug=False, verbose=False, order_books=None, callback=None, interval=None):
+from utils.Metrics import METRICS
+
+async def subscribe_ws(event, exchange, symbols, limit=20, debug=False, verbose=False, order_books=None, callback=None, interval=None, recorder=None):
     """
     Subscribe websockets channels of many symbols in the same exchange
     :param event: 'ob' for orderbook updates, 'ticker' for ticker, 'trade' for trades, refer to CCXT WS documentation
@@ -13,6 +15,7 @@ async def subscribe_ws(event, exchange, symbols, limit=20, debug=False, verbose=
     :param order_books: "buffer" dictionary containing the order books (it is used to update the DB)
     :param callback: function, params symbol, data
     :param interval: applies to  OHLCV socket to set candle interval
+    :param recorder: SocketRecorder, every message is logged before the callback sees it
     :return:
     """
 
@@ -24,10 +27,14 @@ async def subscribe_ws(event, exchange, symbols, limit=20, debug=False, verbose=
 
     @exchange.on(event)
     def websocket_ob(symbol, data):
-        if interval:
-            callback(symbol, data, interval)
-        else:
-            callback(symbol, data)
+        if recorder is not None:
+            recorder.record(event, symbol, data, interval)
+
+        with METRICS.time('socket_handler_seconds', event=event):
+            if interval:
+                callback(symbol, data, interval)
+            else:
+                callback(symbol, data)
 
     eventSymbols = []
     for symbol in symbols:
@@ -0,0 +1,195 @@
+"""
+Record websocket messages to a compact binary log and feed them back into an exchange's socket handlers
+
+Log layout: MAGIC, then one record per message
+    struct RECORD_HEADER (receive time as unix seconds, event code, payload length) + JSON payload [symbol, data, interval]
+"""
+import struct
+import threading
+import time
+
+from utils import JsonTools
+
+MAGIC = b'LTSOCK1\n'
+RECORD_HEADER = struct.Struct('<dBI')
+
+EVENT_CODES = {'ticker': 1, 'ob': 2, 'ohlcv': 3}
+EVENT_NAMES = {code: event for event, code in EVENT_CODES.items()}
+
+
+class SocketRecorder:
+    """
+    Appends socket messages to a log, pass as subscribe_ws(recorder=...)
+    """
+
+    def __init__(self, path, flush_interval=1.0):
+        """
+        :param flush_interval: seconds between flushes to disk, a crash loses at most this much
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    # ----
+    def record(self, event, symbol, data, interval=None, timestamp=None):
+        """
+        :param event: subscribe_ws event, 'ticker', 'ob' or 'ohlcv'
+        """
+        now = time.time() if timestamp is None else timestamp
+        payload = JsonTools.dumpb([symbol, data, interval])
+
+        with self._lock:
+            if self._file is None:
+                return
+
+            self._file.write(RECORD_HEADER.pack(now, EVENT_CODES[event], len(payload)))
+            self._file.write(payload)
+            self.count += 1
+
+            if now - self._last_flush > self.flush_interval:
+                self._file.flush()
+                self._last_flush = now
+
+    # ----
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ----
+def read_records(path):
+    """
+    :return: generator of (timestamp, event, symbol, data, interval), a record cut short by a crash ends the log
+    :raises ValueError: if the file isn't a socket log
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a socket recording')
+
+        header_size = RECORD_HEADER.size
+        while True:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                return
+
+            timestamp, code, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+
+            symbol, data, interval = JsonTools.loads(payload)
+            yield timestamp, EVENT_NAMES[code], symbol, data, interval
+
+
+# =============================
+class SocketReplayer:
+    """
+    Feeds a recording into an exchange's handle_*_socket methods, as BinanceExchange.start's subscriptions would
+
+    Ticker updates are buffered by the exchange (see TickerIngest), they're flushed into pairs every
+    exchange._ticker_flush_call_schedule seconds of recorded time so a replay is deterministic at any speed
+    """
+
+    def __init__(self, exchange, path, speed=1.0, on_flush=None):
+        """
+        :param speed: 1 for real time, N for N times faster, 0 / None to replay as fast as possible
+        :param on_flush: called with (exchange, recorded timestamp) after each ticker flush, ie to run a trade cycle
+        """
+        self.exchange = exchange
+        self.path = path
+        self.speed = speed
+        self.on_flush = on_flush
+
+        self.handlers = {
+            'ticker': exchange.handle_ticker_socket,
+            'ob': exchange.handle_depth_socket,
+            'ohlcv': exchange.handle_candle_socket,
+        }
+
+    # ----
+    def flush(self, timestamp):
+        self.exchange.flush_tickers()
+        if self.on_flush is not None:
+            self.on_flush(self.exchange, timestamp)
+
+    # ----
+    def replay(self, limit=None):
+        """
+        :param limit: stop after this many messages
+        :return: {'messages', 'elapsed', 'recorded', 'per_event'}, elapsed wall time vs recorded time span
+        """
+        handlers = self.handlers
+        speed = self.speed
+        flush_schedule = self.exchange._ticker_flush_call_schedule
+
+        per_event = dict.fromkeys(handlers, 0)
+        messages = 0
+        first = last = next_flush = None
+        start = time.perf_counter()
+
+        for timestamp, event, symbol, data, interval in read_records(self.path):
+            if limit is not None and messages >= limit:
+                break
+
+            if first is None:
+                first = timestamp
+                next_flush = timestamp + flush_schedule
+
+            if speed:
+                delay = (timestamp - first) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            while timestamp >= next_flush:
+                self.flush(next_flush)
+                next_flush += flush_schedule
+
+            if interval:
+                handlers[event](symbol, data, interval)
+            else:
+                handlers[event](symbol, data)
+
+            per_event[event] += 1
+            messages += 1
+            last = timestamp
+
+        if first is not None:
+            self.flush(last)
+
+        return {
+            'messages': messages,
+            'elapsed': time.perf_counter() - start,
+            'recorded': last - first if first is not None else 0,
+            'per_event': per_event,
+        }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='summarize a socket recording')
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    counts = {}
+    first = last = None
+    for timestamp, event, symbol, _, _ in read_records(args.path):
+        counts[event] = counts.get(event, 0) + 1
+        first = timestamp if first is None else first
+        last = timestamp
+
+    print(counts, f'{last - first:.1f}s recorded' if first is not None else 'empty')
@@ -0,0 +1,85 @@
+# ticker fields the engine reads from a pair, in storage order
+TICKER_FIELDS = ('bid', 'ask', 'close', 'quoteVolume', 'percentage')
+
+
+def _to_float(value):
+    if value is None:
+        return None
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TickerIngest:
+    """
+    Sits between ticker sources (REST fetchTickers, ticker socket) and the pairs dict
+
+    Only TICKER_FIELDS are parsed, each symbol's latest values are held as one tuple until the next flush,
+    so a burst of socket messages for a symbol costs a single write per flush window.
+    flush() only assigns fields whose value actually changed
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+        # counters, mostly to see how much the coalescing saves
+        self.received = 0
+        self.coalesced = 0
+        self.field_writes = 0
+
+    # ----
+    def push(self, symbol, bid, ask, close, quote_volume, percentage):
+        if symbol in self._pending:
+            self.coalesced += 1
+
+        self._pending[symbol] = (_to_float(bid), _to_float(ask), _to_float(close),
+                                 _to_float(quote_volume), _to_float(percentage))
+        self.received += 1
+
+    # --
+    def push_ticker(self, symbol, ticker):
+        # ccxt unified ticker dict
+        self.push(symbol, ticker.get('bid'), ticker.get('ask'), ticker.get('close'),
+                  ticker.get('quoteVolume'), ticker.get('percentage'))
+
+    # ----
+    def flush(self, pairs):
+        """
+        write pending ticker values into pairs
+        :param pairs: exchange pairs dict
+        :return: number of pairs that changed
+        """
+        pending, self._pending = self._pending, {}
+        changed_pairs = 0
+
+        for symbol, values in pending.items():
+            pair = pairs.get(symbol)
+            if pair is None:
+                continue
+
+            changed = False
+            for field, value in zip(TICKER_FIELDS, values):
+                if value is not None and pair.get(field) != value:
+                    pair[field] = value
+                    changed = True
+                    self.field_writes += 1
+
+            changed_pairs += changed
+
+        return changed_pairs
+
+    # ----
+    def pending_count(self):
+        return len(self._pending)
+
+
+if __name__ == '__main__':
+    ingest = TickerIngest()
+    pairs = {'ADA/ETH': {'symbol': 'ADA/ETH'}}
+
+    for close in (1, 1.1, 1.2):
+        ingest.push('ADA/ETH', close, close, close, 1000, 2.5)
+
+    print(ingest.flush(pairs), pairs, ingest.received, ingest.coalesced)
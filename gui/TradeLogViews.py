@@ -0,0 +1,54 @@
+import pandas as pd
+
+
+class TradeLogViews:
+    """
+    Buy / sell log frames built from the trade history, only rebuilt when it changed
+
+    The history is append only (a reload replaces the list), so its identity and length tell whether it did
+    """
+
+    BUY_COLUMNS = ['timestamp', 'symbol', 'price', 'amount', 'side', 'status', 'remaining', 'filled']
+    SELL_COLUMNS = ['timestamp', 'symbol', 'bought_price', 'price', 'cost', 'bought_cost', 'amount', 'side', 'status',
+                    'remaining', 'filled', 'gain']
+
+    def __init__(self):
+        # (key, buy log, sell log), replaced as a whole so request threads never see half of a rebuild
+        self._views = (None, None, None)
+
+    # ----
+    def get(self, trade_history):
+        """
+        :return: (buy log, sell log), None for a log that can't be built yet
+        """
+        key = (id(trade_history), len(trade_history))
+        views = self._views
+        if views[0] != key:
+            views = self._views = (key, *self.build(trade_history))
+        return views[1], views[2]
+
+    # ----
+    @classmethod
+    def build(cls, trade_history):
+        df = pd.DataFrame(trade_history)
+
+        if len(df) < 1:
+            return None, None
+
+        buy_log = df[df.side == 'buy'][cls.BUY_COLUMNS]
+
+        if 'bought_price' not in df:
+            return buy_log, None
+
+        df['bought_cost'] = df.bought_price * df.filled
+        df['gain'] = (df.cost - df.bought_cost) / df.bought_cost * 100
+
+        return buy_log, df[df.side == 'sell'][cls.SELL_COLUMNS].dropna()
+
+
+if __name__ == '__main__':
+    views = TradeLogViews()
+    history = [{'timestamp': 1, 'symbol': 'ADA/ETH', 'price': 1, 'amount': 1, 'side': 'buy', 'status': 'closed',
+                'remaining': 0, 'filled': 1, 'cost': 1}]
+    buy_log, sell_log = views.get(history)
+    print(buy_log, sell_log, views.get(history)[0] is buy_log)
@@ -0,0 +1,62 @@
+import threading
+
+
+class UserCache:
+    """
+    Roles of the GUI's users by id, loaded from the user table once and kept until invalidated
+
+    JWT identity and admin checks run on every API request, the dashboard fires several in parallel per refresh,
+    these are answered from memory instead of the database. Anything that changes the user table
+    (ie gui_server.add_user) must call invalidate()
+    """
+
+    def __init__(self, load):
+        """
+        :param load: called without arguments, returns {user id: role} for every user
+        """
+        self._load = load
+        self._roles = None
+        # bumped by invalidate, a load that raced an invalidation is used once but not kept
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    # ----
+    def get_roles(self):
+        roles = self._roles
+        if roles is None:
+            with self._lock:
+                # another request may have loaded it while this one waited
+                roles = self._roles
+                if roles is None:
+                    generation = self._generation
+                    roles = dict(self._load())
+                    if generation == self._generation:
+                        self._roles = roles
+        return roles
+
+    # ----
+    def get_role(self, user_id):
+        """
+        :return: the user's role, None for an unknown user
+        """
+        try:
+            return self.get_roles().get(int(user_id))
+        except (TypeError, ValueError):
+            return None
+
+    def user_exists(self, user_id):
+        return self.get_role(user_id) is not None
+
+    def users_exist(self):
+        return len(self.get_roles()) > 0
+
+    # ----
+    def invalidate(self):
+        self._generation += 1
+        self._roles = None
+
+
+if __name__ == '__main__':
+    loads = []
+    cache = UserCache(lambda: loads.append(1) or {1: 'admin', 2: 'guest'})
+    print(cache.get_role(1), cache.get_role('2'), cache.user_exists(3), cache.users_exist(), len(loads))
@@ -5,11 +5,12 @@ import os
 # from io import BytesIO
 import pathlib
 import sys
+import time
 
 from datetime import timedelta
 from functools import wraps
 
-from liquitrader import FRIENDLY_MARKET_COLUMNS
+from liquitrader import FRIENDLY_MARKET_COLUMNS, COLUMN_ALIASES
 from config.config import Config
 
 from cheroot.wsgi import Server as WSGIServer, PathInfoDispatcher
@@ -33,6 +34,12 @@ import pandas as pd
 # import pyqrcode
 
 from utils.FormattingTools import eight_decimal_format, decimal_with_usd
+from utils.Metrics import METRICS
+from utils import Profiler
+from utils.Pagination import paginate, parse_page_args, to_page_json
+from utils.ResponseCache import ResponseCache
+from gui.TradeLogViews import TradeLogViews
+from gui.UserCache import UserCache
 from utils.path import APP_DIR
 from utils.column_labels import *
 
@@ -70,6 +77,9 @@ database_models.migrate_table(_database)
 
 _app.config['JWT_EXPIRATION_DELTA'] = timedelta(seconds=604800)
 
+# roles by user id, the auth checks every API request runs read this instead of the user table
+_user_cache = UserCache(lambda: {user.id: user.role for user in _UserModel.query.all()})
+
 
 def add_keys(public, private):
     """
@@ -105,6 +115,7 @@ def add_user(username, password, role='admin'):
 
     _database.session.add(_UserModel(username=username, password=password, role=role))
     _database.session.commit()
+    _user_cache.invalidate()
 
     return True
 
@@ -115,7 +126,7 @@ def user_exists(user_id):
     :return: Bool
     """
 
-    return _UserModel.query.get(user_id) is not None
+    return _user_cache.user_exists(user_id)
 
 
 def users_exist():
@@ -124,7 +135,7 @@ def users_exist():
     :return: Bool
     """
 
-    return len(_UserModel.query.all()) > 0
+    return _user_cache.users_exist()
 
 
 # ----
@@ -139,10 +150,10 @@ def user_authenticate(username=None, password=None):
 
 def user_identity(payload):
     # For JWT
-    user = _UserModel.query.filter_by(id=payload['identity']).first()
+    user_id = payload['identity']
 
-    if user is not None:
-        return user.id
+    if _user_cache.user_exists(user_id):
+        return int(user_id)
 
 
 # --
@@ -156,6 +167,24 @@ def before_request_handler():
     if '..' in path:
         return Response(status=400)
 
+    if METRICS.enabled:
+        flask.g.request_start = time.perf_counter()
+
+
+@_app.after_request
+def after_request_handler(response):
+    """
+    Times the request by route (the rule, not the path, so /<path:path> is one series)
+    """
+
+    start = flask.g.get('request_start')
+    if start is not None:
+        rule = flask.request.url_rule
+        METRICS.observe('gui_request_seconds', time.perf_counter() - start,
+                        route=rule.rule if rule is not None else 'unmatched', method=flask.request.method)
+
+    return response
+
 
 # --------
 def to_usd(val):
@@ -164,7 +193,7 @@ def to_usd(val):
 
 # ----
 def get_role(id):
-    return _UserModel.query.filter_by(id=int(id)).first().role
+    return _user_cache.get_role(id)
 
 
 
@@ -177,6 +206,32 @@ def admin_required(fn):
     return wrapper
 
 
+# ----
+_response_cache = ResponseCache()
+
+
+def cached_route(key, *state):
+    """
+    Reuse the route's response while the engine state it shows is unchanged (see utils.ResponseCache)
+    Goes below the auth decorators so every request is still authorized, TTLs come from "response_cache_ttls"
+    :param state: the kinds of engine state the response is built from, see LiquiTrader.get_state_version
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            def build():
+                response = _app.make_response(fn(*args, **kwargs))
+                return response.get_data(), response.status_code, response.mimetype
+
+            ttl = (LT_ENGINE.config.general_settings.get('response_cache_ttls') or {}).get(key)
+            data, status, mimetype = _response_cache.get(key, LT_ENGINE.get_state_version(*state), build, ttl)
+            return Response(data, status=status, mimetype=mimetype)
+
+        return wrapper
+
+    return decorator
+
+
 class GUIServer:
 
     def __init__(self, shutdown_handler, host='localhost', port=5000, ssl=False):
@@ -420,6 +475,7 @@ def first_run():
 # ----
 @_app.route("/api/holding")
 @jwt_required()
+@cached_route('holding', 'exchange', 'trades')
 def get_holding():
     df = LT_ENGINE.pairs_to_df(friendly=True, holding=True)
 
@@ -429,43 +485,94 @@ def get_holding():
     return jsonify(df.dropna().to_json(orient='records'))
 
 
+# ----
+def get_page_request(aliases=None):
+    """
+    :return: PageRequest for the request's query arguments, None for the legacy (unpaged) response
+    :raises ValueError: on malformed arguments
+    """
+    return parse_page_args(flask.request.args, aliases)
+
+
+def page_response(df, page_request, filter_column='symbol'):
+    """
+    paged rows in a single JSON encoding, the legacy responses are a JSON string of JSON
+    """
+    try:
+        total, page = paginate(df, page_request, filter_column)
+
+    except ValueError as ex:
+        return jsonify(msg=str(ex)), 400
+
+    return Response(to_page_json(page, total, page_request), mimetype='application/json')
+
+
+# presorted (history order) buy / sell logs, see gui.TradeLogViews
+_trade_log_views = TradeLogViews()
+
+
 # ----
 @_app.route("/api/market")
 @jwt_required()
 def get_market():
-    df = LT_ENGINE.pairs_to_df(friendly=True)
+    try:
+        page_request = get_page_request(COLUMN_ALIASES)
+    except ValueError as ex:
+        return jsonify(msg=str(ex)), 400
+
+    if page_request is None:
+        df = LT_ENGINE.pairs_to_df(friendly=True)
+        return jsonify(df[FRIENDLY_MARKET_COLUMNS].to_json(orient='records'))
 
-    return jsonify(df[FRIENDLY_MARKET_COLUMNS].to_json(orient='records'))
+    # filter / sort the raw values and only format the page
+    df = LT_ENGINE.pairs_to_df()
+    try:
+        total, df = paginate(df, page_request)
+    except ValueError as ex:
+        return jsonify(msg=str(ex)), 400
+
+    df = LT_ENGINE.format_pairs_df(df.copy())
+    return Response(to_page_json(df[FRIENDLY_MARKET_COLUMNS], total, page_request), mimetype='application/json')
 
 
 # ----
 @_app.route("/api/buy_log")
 @jwt_required()
 def get_buy_log_frame():
-    df = pd.DataFrame(LT_ENGINE.trade_history)
+    try:
+        page_request = get_page_request()
+    except ValueError as ex:
+        return jsonify(msg=str(ex)), 400
 
-    if len(df) < 1:
-        return jsonify([])
+    df, _ = _trade_log_views.get(LT_ENGINE.trade_history)
+
+    if page_request is not None:
+        return page_response(df if df is not None else pd.DataFrame(columns=TradeLogViews.BUY_COLUMNS), page_request)
 
-    cols = ['timestamp', 'symbol', 'price', 'amount', 'side', 'status', 'remaining', 'filled']
+    if df is None:
+        return jsonify([])
 
-    return jsonify(df[df.side == 'buy'][cols].to_json(orient='records'))
+    return jsonify(df.to_json(orient='records'))
 
 
 # ----
 @_app.route("/api/sell_log")
 @jwt_required()
 def get_sell_log_frame():
-    df = pd.DataFrame(LT_ENGINE.trade_history)
+    try:
+        page_request = get_page_request()
+    except ValueError as ex:
+        return jsonify(msg=str(ex)), 400
 
-    if 'bought_price' not in df:
-        return jsonify([])
+    _, df = _trade_log_views.get(LT_ENGINE.trade_history)
 
-    df['bought_cost'] = df.bought_price * df.filled
-    df['gain'] = (df.cost - df.bought_cost) / df.bought_cost * 100
-    cols = ['timestamp', 'symbol', 'bought_price', 'price', 'cost', 'bought_cost', 'amount', 'side', 'status', 'remaining', 'filled', 'gain']
+    if page_request is not None:
+        return page_response(df if df is not None else pd.DataFrame(columns=TradeLogViews.SELL_COLUMNS), page_request)
 
-    return jsonify(df[df.side == 'sell'][cols].dropna().to_json(orient='records'))
+    if df is None:
+        return jsonify([])
+
+    return jsonify(df.to_json(orient='records'))
 
 
 # ----
@@ -554,6 +661,7 @@ def update_config():
 @_app.route("/api/config")
 @jwt_required()
 @admin_required
+@cached_route('config', 'config')
 def get_config():
     return LT_ENGINE.config.get_config()
     #return jsonify(LT_ENGINE.config.get_config())  TODO :: Make frontend receive JSON
@@ -562,15 +670,76 @@ def get_config():
 # ----
 @_app.route("/api/analyzers")
 @jwt_required()
+@cached_route('analyzers', 'exchange', 'stats', 'config')
 def get_analyzers():
-    return jsonify(LT_ENGINE.get_trailing_pairs())
+    return Response(LT_ENGINE.get_trailing_json(), mimetype='application/json')
 
 
 # ----
 @_app.route("/api/stats")
 @jwt_required()
+@cached_route('stats', 'stats')
 def get_statistics():
-    return pd.DataFrame(LT_ENGINE.statistics.values()).to_json(orient="records")
+    return pd.DataFrame(LT_ENGINE.statistics.to_records()).to_json(orient="records")
+
+# ----
+def get_exchange_histograms(exchange):
+    """
+    :return: the exchange's own REST latency / event loop lag histograms for METRICS.to_prometheus
+    """
+    if exchange is None:
+        return []
+
+    histograms = [('exchange_request_seconds', {'endpoint': endpoint}, histogram)
+                  for endpoint, histogram in list(exchange.latency.histograms.items())]
+    histograms.append(('exchange_loop_lag_seconds', {}, exchange.loop_lag))
+    return histograms
+
+
+@_app.route("/api/metrics")
+@jwt_required()
+def get_metrics():
+    """
+    Prometheus text format, hot path timers are only collected with the general setting "metrics_enabled",
+    response cache hits / misses are always included
+    """
+    text = METRICS.to_prometheus(get_exchange_histograms(LT_ENGINE.exchange), _response_cache.get_counters())
+    return Response(text, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+# ----
+# threads liquitrader.main starts (the exchange's executor threads are "exchange-io_N"), plus cheroot's request workers
+PROFILED_THREADS = ('trader', 'exchange', 'gui', 'CP Server')
+
+
+@_app.route("/api/profile")
+@jwt_required()
+@admin_required
+def get_profile():
+    """
+    Sample the running bot's threads, ?seconds=10&interval=0.005&threads=trader,exchange
+    Returns collapsed stacks for flamegraph.pl / speedscope, blocks for the whole duration
+    With "gui_process" the engine process is profiled, the GUI's own threads (gui, CP Server) aren't in it
+    """
+    args = flask.request.args
+    threads = args.get('threads')
+
+    try:
+        collapsed = LT_ENGINE.profile(float(args.get('seconds', 10)),
+                                      float(args.get('interval', Profiler.DEFAULT_INTERVAL)),
+                                      threads.split(',') if threads else PROFILED_THREADS)
+
+    except ValueError as ex:
+        return jsonify(msg=str(ex)), 400
+
+    except (ConnectionError, RuntimeError) as ex:
+        # engine process unreachable or failed the profile, see state_channel.EngineMirror
+        return jsonify(msg=str(ex)), 503
+
+    if collapsed is None:
+        return jsonify(msg='A profile is already running'), 409
+
+    return Response(collapsed, mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename=liquitrader.collapsed'})
 
 #---
 @_app.route('/api/add_user', methods=['POST'])
@@ -0,0 +1,403 @@
+"""
+Run the web / API tier in its own process (general setting "gui_process")
+
+The engine process serves its state over a local multiprocessing connection (StatePublisher), the GUI process
+mirrors it (EngineMirror) and gui_server's routes read the mirror exactly as they'd read the engine. Dashboard
+polling then costs the engine at most one state build per StatePublisher.min_interval instead of a GIL share
+per request, and config updates are forwarded to the engine to be applied there
+"""
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from multiprocessing.connection import Client, Listener
+
+from liquitrader import LiquiTrader, ShutdownHandler
+from utils import JsonTools, Profiler
+from utils.Metrics import METRICS, Histogram, LatencyTracker
+
+# pair fields the GUI never reads, order books are most of a pair's size
+DEPTH_KEYS = ('asks', 'bids')
+QUOTE_CANDLES = 48
+
+
+def build_engine_state(lt_engine):
+    """
+    :return: everything gui_server reads from the engine as plain (picklable) data, the trade history excluded
+    """
+    exchange = lt_engine.exchange
+    # not set for USD quoted markets, nor before the first quote change upkeep
+    quote_candles = getattr(exchange, 'quote_candles', None)
+    pairs = {}
+    min_costs = {}
+    for symbol, pair in list(exchange.pairs.items()):
+        pairs[symbol] = {key: value for key, value in pair.items() if key not in DEPTH_KEYS}
+        try:
+            min_costs[symbol] = exchange.get_min_cost(symbol)
+        except (KeyError, TypeError):
+            min_costs[symbol] = 0
+
+    return {
+        'time': time.time(),
+        'state_versions': dict(lt_engine.state_versions),
+        'exchange_state_version': exchange.state_version,
+        'pairs': pairs,
+        'min_costs': min_costs,
+        'balance': exchange.balance,
+        'quote_price': exchange.quote_price,
+        'quote_change_info': dict(exchange.quote_change_info),
+        'quote_candles': quote_candles.tail(QUOTE_CANDLES).copy() if quote_candles is not None else None,
+        'market_change_24h': lt_engine.market_change_24h,
+        'below_max_pairs': lt_engine.below_max_pairs,
+        'check_1h_quote_change': getattr(lt_engine, 'check_1h_quote_change', None),
+        'check_24h_quote_change': getattr(lt_engine, 'check_24h_quote_change', None),
+        'check_24h_market_change': getattr(lt_engine, 'check_24h_market_change', None),
+        'general_settings': dict(lt_engine.config.general_settings),
+        'config': lt_engine.config.get_config(),
+        'trailing': lt_engine.get_trailing_json() if lt_engine.snapshot is not None else b'{}',
+        'statistics': lt_engine.statistics.to_records(),
+        'metrics': METRICS.snapshot(),
+        'exchange_latency': exchange.latency.get_stats(),
+        'loop_lag': exchange.loop_lag.snapshot(),
+    }
+
+
+def get_reply_value(reply):
+    """
+    :raises RuntimeError: for an ('error', message) reply
+    """
+    status, value = reply
+    if status == 'error':
+        raise RuntimeError(value)
+    return value
+
+
+# =============================
+class StatePublisher:
+    """
+    Engine side, answers the GUI process' requests on a background thread
+
+    Requests are tuples:
+        ('state', history generation, trades already mirrored) -> (state, history generation, new trades)
+        ('update_config', section, data) -> None, Config.update_config run in the engine process
+        ('profile', seconds, interval, thread prefixes) -> collapsed stacks of the engine process' threads,
+            None while another profile runs (see Profiler.profile)
+    Replies are ('ok', value) or ('error', message)
+    """
+
+    def __init__(self, lt_engine, address=('localhost', 0), authkey=None, min_interval=0.5):
+        """
+        :param address: port 0 picks a free port, see self.address
+        :param min_interval: seconds a built state is served for, bounds the engine's cost of GUI polling
+        """
+        self.lt_engine = lt_engine
+        self.authkey = authkey or os.urandom(32)
+        self.min_interval = min_interval
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+
+        self._state = None
+        self._state_time = 0
+        self._state_lock = threading.Lock()
+        self._closed = False
+
+    # ----
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='state-channel', daemon=True).start()
+
+    def serve_forever(self):
+        while not self._closed:
+            try:
+                connection = self.listener.accept()
+
+            except Exception as ex:
+                if self._closed:
+                    return
+                print('state_channel: GUI process connection failed', ex)
+                continue
+
+            threading.Thread(target=self.handle_connection, args=(connection,), name='state-channel-client',
+                             daemon=True).start()
+
+    # ----
+    def handle_connection(self, connection):
+        with connection:
+            while not self._closed:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    reply = ('ok', self.handle_request(*request))
+
+                except Exception as ex:
+                    print('state_channel: request failed', traceback.format_exc())
+                    reply = ('error', repr(ex))
+
+                try:
+                    connection.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    def handle_request(self, name, *args):
+        if name == 'state':
+            return self.get_state(*args)
+
+        if name == 'update_config':
+            section, data = args
+            self.lt_engine.config.update_config(section, data)
+            return None
+
+        if name == 'profile':
+            return self.lt_engine.profile(*args)
+
+        raise ValueError(f'unknown state channel request {name}')
+
+    # ----
+    def get_state(self, history_generation=None, mirrored_trades=0):
+        with self._state_lock:
+            if self._state is None or time.time() - self._state_time > self.min_interval:
+                self._state = build_engine_state(self.lt_engine)
+                self._state_time = time.time()
+            state = self._state
+
+        # the history is append only, a reload replaces the list and starts a new generation
+        generation, trade_history = self.lt_engine.get_trade_history_generation()
+        if history_generation != generation:
+            mirrored_trades = 0
+
+        return state, generation, trade_history[mirrored_trades:]
+
+    # ----
+    def close(self):
+        self._closed = True
+        self.listener.close()
+
+
+# =============================
+class ExchangeState:
+    """
+    The GenericExchange attributes gui_server reads, from the latest engine state
+    """
+
+    def __init__(self):
+        self.pairs = {}
+        self.min_costs = {}
+        self.balance = 0
+        self.quote_price = 0
+        self.quote_change_info = {'1h': 0, '4h': 0, '24h': 0, '6h': 0, '12h': 0}
+        self.quote_candles = None
+        self.latency = LatencyTracker()
+        self.loop_lag = Histogram()
+        self.state_version = 0
+
+    def get_min_cost(self, symbol):
+        return self.min_costs.get(symbol, 0)
+
+
+class ConfigMirror:
+    """
+    Config as the GUI sees it, updates are applied by the engine
+    """
+
+    def __init__(self, engine):
+        self._engine = engine
+        self.general_settings = {}
+        self.config_json = '{}'
+
+    def get_config(self):
+        return self.config_json
+
+    def update_config(self, section, data):
+        self._engine.request('update_config', section, data)
+        # show the result on the next request instead of the cached state
+        self._engine.last_refresh = 0
+
+
+class StatisticsRecords:
+    def __init__(self):
+        self.records = []
+
+    def to_records(self):
+        return self.records
+
+
+# =============================
+class EngineMirror(LiquiTrader):
+    """
+    GUI process stand-in for the engine, LiquiTrader's reporting methods (pairs_to_df, profit data, ...) run
+    on state refreshed from the engine process at most every max_age seconds
+    """
+
+    def __init__(self, address, authkey, max_age=1.0):
+        super().__init__(ShutdownHandler())
+        self.address = address
+        self.authkey = authkey
+        self.max_age = max_age
+        self.last_refresh = 0
+
+        self.exchange = ExchangeState()
+        self.config = ConfigMirror(self)
+        self.statistics = StatisticsRecords()
+        self.trailing = b'{}'
+        self.history_generation = None
+
+        self._connection = None
+        self._lock = threading.Lock()
+
+    # ----
+    def request(self, *request):
+        """
+        :raises ConnectionError: engine process unreachable
+        :raises RuntimeError: the engine failed the request
+        """
+        with self._lock:
+            try:
+                if self._connection is None:
+                    self._connection = Client(self.address, authkey=self.authkey)
+                self._connection.send(request)
+                reply = self._connection.recv()
+
+            except (EOFError, OSError) as ex:
+                self._connection = None
+                raise ConnectionError(f'engine process unreachable: {ex}')
+
+        return get_reply_value(reply)
+
+    def request_once(self, *request):
+        """
+        request on a connection of its own, for long running requests that mustn't hold up state refreshes
+        :raises ConnectionError: engine process unreachable
+        :raises RuntimeError: the engine failed the request
+        """
+        try:
+            with Client(self.address, authkey=self.authkey) as connection:
+                connection.send(request)
+                reply = connection.recv()
+
+        except (EOFError, OSError) as ex:
+            raise ConnectionError(f'engine process unreachable: {ex}')
+
+        return get_reply_value(reply)
+
+    # ----
+    def refresh(self):
+        """
+        fetch the engine's state if the mirrored one is older than max_age, keeps the last one if it can't
+        """
+        if time.time() - self.last_refresh < self.max_age:
+            return
+
+        try:
+            state, history_generation, trades = self.request('state', self.history_generation,
+                                                             len(self.trade_history))
+
+        except (ConnectionError, RuntimeError) as ex:
+            # unreachable, or the engine failed to build its state
+            print('state_channel:', ex)
+            return
+
+        self.apply_state(state, history_generation, trades)
+        self.last_refresh = time.time()
+
+    def apply_state(self, state, history_generation, trades):
+        exchange = self.exchange
+        exchange.pairs = state['pairs']
+        exchange.min_costs = state['min_costs']
+        exchange.balance = state['balance']
+        exchange.quote_price = state['quote_price']
+        exchange.quote_change_info = state['quote_change_info']
+        exchange.quote_candles = state['quote_candles']
+        exchange.latency.histograms = {name: Histogram.from_snapshot(histogram)
+                                       for name, histogram in state['exchange_latency'].items()}
+        exchange.loop_lag = Histogram.from_snapshot(state['loop_lag'])
+
+        exchange.state_version = state['exchange_state_version']
+        self.state_versions = state['state_versions']
+        self.market_change_24h = state['market_change_24h']
+        self.below_max_pairs = state['below_max_pairs']
+        self.check_1h_quote_change = state['check_1h_quote_change']
+        self.check_24h_quote_change = state['check_24h_quote_change']
+        self.check_24h_market_change = state['check_24h_market_change']
+
+        self.config.general_settings = state['general_settings']
+        self.config.config_json = state['config']
+        self.trailing = state['trailing']
+        self.statistics.records = state['statistics']
+
+        METRICS.enabled = bool(state['general_settings'].get('metrics_enabled', False))
+        METRICS.merge_snapshot(state['metrics'])
+
+        # keep the list (and gui.TradeLogViews' cache) while the engine's history only grows
+        if history_generation != self.history_generation:
+            self.trade_history = list(trades)
+            self.history_generation = history_generation
+        else:
+            self.trade_history.extend(trades)
+
+    # ----
+    def get_trailing_json(self):
+        return self.trailing
+
+    def get_trailing_pairs(self):
+        return JsonTools.loads(self.trailing)
+
+    def global_buy_checks(self, snapshot=None):
+        # computed by the engine, mirrored in apply_state
+        return None
+
+    def profile(self, duration, interval=Profiler.DEFAULT_INTERVAL, thread_prefixes=None):
+        """
+        profile the engine process, the trader / exchange threads don't run in this one
+        """
+        Profiler.check_arguments(duration, interval)
+        return self.request_once('profile', duration, interval,
+                                 tuple(thread_prefixes) if thread_prefixes is not None else None)
+
+
+# ----
+def run_gui_process(address, authkey, host, port, ssl):
+    """
+    GUI process entry point, gui_server's routes read an EngineMirror as LT_ENGINE
+    """
+    import gui.gui_server
+
+    mirror = EngineMirror(address, authkey)
+    mirror.refresh()
+    gui.gui_server.LT_ENGINE = mirror
+
+    @gui.gui_server._app.before_request
+    def refresh_engine_state():
+        mirror.refresh()
+
+    gui.gui_server.GUIServer(ShutdownHandler(), host=host, port=port, ssl=ssl).run()
+
+
+class GUIProcess:
+    """
+    Drop in for GUIServer in liquitrader.main: run() blocks while the GUI process runs, stop() ends it
+    """
+
+    def __init__(self, lt_engine, shutdown_handler, host='localhost', port=5000, ssl=False):
+        self.publisher = StatePublisher(lt_engine)
+        self._shutdown_handler = shutdown_handler
+        self._args = (self.publisher.address, self.publisher.authkey, host, port, ssl)
+        # spawn, forking a process that runs the exchange loop and holds sqlite connections isn't safe
+        self._process = multiprocessing.get_context('spawn').Process(target=run_gui_process, args=self._args,
+                                                                     name='gui', daemon=True)
+
+    # ----
+    def run(self):
+        self._shutdown_handler.add_task()
+        self.publisher.start()
+        self._process.start()
+        self._process.join()
+
+    def stop(self):
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(5)
+        self.publisher.close()
+        self._shutdown_handler.remove_task()
@@ -13,23 +13,33 @@ import arrow
 
 
 from config.config import Config
+from config.ConfigSnapshot import ConfigSnapshot
 from exchanges import BinanceExchange
 from exchanges import GenericExchange
 from exchanges import GenericPaper
 from utils.DepthAnalyzer import *
 
 from exchanges import PaperBinance
+from exchanges.SocketRecorder import SocketRecorder
 from analyzers.TechnicalAnalysis import run_ta
+from analyzers.IndicatorCache import IndicatorCache
+from analyzers.StatisticsStore import StatisticsStore
 from conditions.BuyCondition import BuyCondition
 from conditions.DCABuyCondition import DCABuyCondition
 from conditions.SellCondition import SellCondition
+from conditions.Condition import get_strategy_key
 from utils.Utils import *
-from conditions.condition_tools import get_buy_value, percentToFloat
+from config.GlobalTradeConditions import in_range as in_trade_range
 from utils.FormattingTools import prettify_dataframe
+from utils import JsonTools
+from utils import Profiler
+from utils.Metrics import METRICS
 
 
 # ======
 LT_ENGINE = None
+# engine state versioned separately so cached GUI responses only follow what they show, see get_state_version
+STATE_KINDS = ('config', 'stats', 'trades')
 
 APP_DIR = ''
 if hasattr(sys, 'frozen'):
@@ -60,6 +70,12 @@ COLUMN_ALIASES = {'last_order_time': 'Last Purchase Time',
 
 FRIENDLY_MARKET_COLUMNS = ['Symbol', 'Price', 'Volume', 'Amount', '24h Change']
 
+# exchange HTTP connection pool setting -> GeneralSettings.json key
+POOL_SETTING_KEYS = {'pool_size': 'http_pool_size',
+                     'keepalive_timeout': 'http_keepalive_timeout',
+                     'dns_cache_ttl': 'dns_cache_ttl'
+                     }
+
 
 # =============================
 class ShutdownHandler:
@@ -116,13 +132,18 @@ class LiquiTrader:
         self.shutdown_handler = shutdown_handler
         self.market_change_24h = 0
         self.exchange = None
-        self.statistics = {}
+        self.statistics = StatisticsStore()
         self.config = None
-        self.buy_strategies = None
-        self.sell_strategies = None
-        self.dca_buy_strategies = None
-        self.trade_history = []
+        # current ConfigSnapshot, only ever replaced as a whole (see publish_snapshot)
+        self.snapshot = None
+        # snapshot the statistics were last calculated for
+        self.analysed_snapshot = None
+        # bumped on config, statistics and trade history changes, see get_state_version
+        self.state_versions = dict.fromkeys(STATE_KINDS, 0)
+        # (generation, trade history list), see the trade_history property
+        self._trade_history = (0, [])
         self.indicators = None
+        self.indicator_cache = IndicatorCache()
         self.timeframes = None
         self.owned = []
         self.possible_trades = []
@@ -136,16 +157,24 @@ class LiquiTrader:
         self.config.load_pair_settings()
         self.indicators = self.config.get_indicators()
         self.timeframes = self.config.timeframes
+        METRICS.enabled = bool(self.config.general_settings.get('metrics_enabled', False))
 
     # ----
     def update_config(self, strategies=False):
-        old_timeframes = self.timeframes
-        self.config.load_general_settings()
-        self.config.load_global_trade_conditions()
-        self.config.load_pair_settings()
-        self.timeframes = self.config.timeframes
-        self.load_strategies()
-        self.indicators = self.config.get_indicators()
+        """
+        reload every config section and publish a new snapshot, runs on the thread that changed the config.
+        the trader keeps using the previous snapshot until its next cycle
+        """
+        with self.config.update_lock:
+            old_timeframes = self.timeframes
+            self.config.load_general_settings()
+            self.config.load_global_trade_conditions()
+            self.config.load_pair_settings()
+            self.indicators = self.config.get_indicators()
+            self.timeframes = self.config.timeframes
+            self.load_strategies()
+            METRICS.enabled = bool(self.config.general_settings.get('metrics_enabled', False))
+
         #todo fix and make more efficient, currently always updating
         timeframes_changed = False
         for tf in self.config.timeframes:
@@ -161,6 +190,9 @@ class LiquiTrader:
         general_settings['starting_balance'] = float(general_settings['starting_balance'])
         from gui.gui_server import get_keys
         keys = get_keys()
+        pool_settings = {key: general_settings[setting]
+                         for key, setting in POOL_SETTING_KEYS.items()
+                         if general_settings.get(setting) not in (None, '')}
         if general_settings["start_delay"]:
             time.sleep(int(general_settings["start_delay"]))
         if general_settings['exchange'].lower() == 'binance' and general_settings['paper_trading']:
@@ -168,7 +200,8 @@ class LiquiTrader:
                                                       general_settings['market'].upper(),
                                                       general_settings['starting_balance'],
                                                       keys,
-                                                      self.timeframes)
+                                                      self.timeframes,
+                                                      pool_settings=pool_settings)
 
         # use USDT in tests to decrease API calls (only ~12 pairs vs 100+)
         elif general_settings['exchange'].lower() == 'binance':
@@ -176,20 +209,27 @@ class LiquiTrader:
                                                             general_settings['market'].upper(),
                                                             general_settings['starting_balance'],
                                                             keys,
-                                                            self.timeframes)
+                                                            self.timeframes,
+                                                            pool_settings=pool_settings)
 
         elif general_settings['paper_trading']:
             self.exchange = GenericPaper.PaperGeneric(general_settings['exchange'].lower(),
                                                       general_settings['market'].upper(),
                                                       general_settings['starting_balance'],
                                                       keys,
-                                                      self.timeframes)
+                                                      self.timeframes,
+                                                      pool_settings=pool_settings)
         else:
             self.exchange = GenericExchange.GenericExchange(general_settings['exchange'].lower(),
                                                             general_settings['market'].upper(),
                                                             general_settings['starting_balance'],
                                                             keys,
-                                                            self.timeframes)
+                                                            self.timeframes,
+                                                            pool_settings=pool_settings)
+
+        # record socket traffic for offline replay (see exchanges.SocketRecorder)
+        if general_settings.get('socket_record_path') and isinstance(self.exchange, BinanceExchange.BinanceExchange):
+            self.exchange.socket_recorder = SocketRecorder(general_settings['socket_record_path'])
 
         asyncio.get_event_loop().run_until_complete(self.exchange.initialize())
 
@@ -238,23 +278,101 @@ class LiquiTrader:
 
     # ----
     def load_strategies(self):
-        # TODO get candle periods and indicators here or in load config
-        # instantiate strategies
-        buy_strategies = []
-        for strategy in self.config.buy_strategies:
-            buy_strategies.append(BuyCondition(strategy, pair_settings=self.config.pair_specific_settings))
+        """
+        compile the config's strategies and publish them with the rest of the config as a new snapshot
+        """
+        with self.config.update_lock:
+            previous = self.snapshot
+            buy_strategies = self.compile_strategies(BuyCondition, self.config.buy_strategies,
+                                                     previous and previous.buy_strategies)
+
+            dca_buy_strategies = self.compile_strategies(DCABuyCondition, self.config.dca_buy_strategies,
+                                                         previous and previous.dca_buy_strategies)
+
+            sell_strategies = self.compile_strategies(SellCondition, self.config.sell_strategies,
+                                                      previous and previous.sell_strategies)
+
+            self.publish_snapshot(ConfigSnapshot(self.config, buy_strategies, dca_buy_strategies, sell_strategies))
+
+    # ----
+    def compile_strategies(self, condition_class, strategy_configs, previous=None):
+        """
+        instantiate a section's strategies, keeping trailing state across reloads:
+        strategies whose config is unchanged (same strategy_key) carry on as copies sharing their trailing pairs
+        (see Condition.for_snapshot). a changed strategy takes over the trailing pairs of the old strategy it
+        matches on Condition.migration_keys (same config apart from trailing %, else same conditions), regardless
+        of position. trailing pairs of an old strategy no changed strategy matches are dropped.
+        the current snapshot's strategies are never modified.
+        conditions are compiled against the statistics store here, evaluation reads its array by index
+        :param previous: the section's strategies in the current snapshot
+        :return: list of condition_class instances
+        """
+        pair_settings = self.config.pair_settings_table
+        previous = list(previous or ())
+
+        unchanged = {}
+        for strategy in previous:
+            unchanged.setdefault(strategy.strategy_key, []).append(strategy)
+
+        strategies = []
+        reused = set()
+        built = []
+        for strategy_config in strategy_configs:
+            matches = unchanged.get(get_strategy_key(strategy_config))
+            if matches:
+                carried = matches.pop(0)
+                reused.add(id(carried))
+                strategy = carried.for_snapshot(pair_settings)
+            else:
+                strategy = condition_class(strategy_config, pair_settings=pair_settings)
+                built.append(strategy)
+            # the backtester supplies plain dicts, those are evaluated by name
+            if isinstance(self.statistics, StatisticsStore):
+                strategy.compile(self.statistics)
+            strategies.append(strategy)
+
+        # each replaced strategy hands its trailing pairs to at most one changed strategy, closest key first
+        replaced = [strategy for strategy in previous if id(strategy) not in reused]
+        for level in (0, 1):
+            for strategy in list(built):
+                match = next((old for old in replaced
+                              if old.migration_keys[level] == strategy.migration_keys[level]), None)
+                if match is not None:
+                    strategy.migrate_trailing(match)
+                    replaced.remove(match)
+                    built.remove(strategy)
+
+        return strategies
+
+    # ----
+    def publish_snapshot(self, snapshot):
+        # a single reference assignment, readers see either the old or the new snapshot
+        self.snapshot = snapshot
+        self.state_versions['config'] += 1
+
+    # ----
+    def get_state_version(self, *kinds):
+        """
+        :param kinds: any of STATE_KINDS and 'exchange' (tickers and fills), all of them when none are given
+        :return: tuple of their versions, changes whenever that state did (see utils.ResponseCache)
+        """
+        versions = self.state_versions
+        exchange_version = self.exchange.state_version if self.exchange is not None else 0
+        return tuple(exchange_version if kind == 'exchange' else versions[kind]
+                     for kind in kinds or (*STATE_KINDS, 'exchange'))
 
-        dca_buy_strategies = []
-        for strategy in self.config.dca_buy_strategies:
-            dca_buy_strategies.append(DCABuyCondition(strategy, pair_settings=self.config.pair_specific_settings))
+    # ----
+    @property
+    def buy_strategies(self):
+        return self.snapshot.buy_strategies if self.snapshot is not None else None
 
-        sell_strategies = []
-        for strategy in self.config.sell_strategies:
-            sell_strategies.append(SellCondition(strategy, pair_settings=self.config.pair_specific_settings))
+    @property
+    def dca_buy_strategies(self):
+        return self.snapshot.dca_buy_strategies if self.snapshot is not None else None
 
-        self.buy_strategies = buy_strategies
-        self.sell_strategies = sell_strategies
-        self.dca_buy_strategies = dca_buy_strategies
+    @property
+    def sell_strategies(self):
+        return self.snapshot.sell_strategies if self.snapshot is not None else None
 
     # ----
     def get_possible_buys(self, pairs, strategies):
@@ -308,10 +426,11 @@ class LiquiTrader:
     # ----
     # check min balance, max pairs, quote change, market change, trading enabled, blacklist, whitelist, 24h change
     # todo add pair specific settings
-    def handle_possible_buys(self, possible_buys):
+    def handle_possible_buys(self, possible_buys, snapshot=None):
         # Alleviate lookup cost
         exchange = self.exchange
-        config = self.config
+        snapshot = snapshot or self.snapshot
+        trade_conditions = snapshot.trade_conditions
         exchange_pairs = exchange.pairs
 
         for pair in possible_buys:
@@ -319,7 +438,7 @@ class LiquiTrader:
 
             if self.pair_specific_buy_checks(pair, exch_pair['close'], possible_buys[pair],
                                              exchange.balance, exch_pair['percentage'],
-                                             config.global_trade_conditions['min_buy_balance']):
+                                             trade_conditions.min_buy_balance, snapshot=snapshot):
 
                 # amount we'd like to own
                 target_amount = possible_buys[pair]
@@ -336,7 +455,7 @@ class LiquiTrader:
 
                 # get viable trade, returns None if none available
                 price_info = self.check_for_viable_trade(current_price, orderbook, remaining_amount, min_cost,
-                                                         config.global_trade_conditions['max_spread'])
+                                                         trade_conditions.max_spread)
 
                 # Check to see if amount remaining to buy is greater than min trade quantity for pair
                 if price_info is None or price_info.amount * price_info.average_price < min_cost:
@@ -344,6 +463,7 @@ class LiquiTrader:
 
                 # place order
                 order = exchange.place_order(pair, 'limit', 'buy', price_info.amount, price_info.price)
+                METRICS.increment('orders_placed_total', side='buy')
                 # store order in trade history
                 self.trade_history.append(order)
                 self.save_trade_history()
@@ -381,17 +501,19 @@ class LiquiTrader:
             current_value = exch_pair['total'] * price.average_price
 
             order = exchange.place_order(pair, 'limit', 'sell', exch_pair['total'], price.price)
+            METRICS.increment('orders_placed_total', side='sell')
             self.trade_history.append(order)
             self.save_trade_history()
 
     # ----
-    def handle_possible_dca_buys(self, possible_buys):
+    def handle_possible_dca_buys(self, possible_buys, snapshot=None):
         # Alleviate lookup cost
         exchange = self.exchange
-        config = self.config
+        snapshot = snapshot or self.snapshot
+        trade_conditions = snapshot.trade_conditions
         exchange_pairs = exchange.pairs
-        
-        dca_timeout = float(config.global_trade_conditions['dca_timeout']) * 60
+
+        dca_timeout = trade_conditions.dca_timeout
         for pair in possible_buys:
             exch_pair = exchange_pairs[pair]
 
@@ -399,12 +521,12 @@ class LiquiTrader:
             min_cost = exchange.get_min_cost(pair)
 
             if (exch_pair['total'] * exch_pair['close'] < min_cost
-                    or time.time() - exch_pair['last_order_time'] < dca_timeout):
+                    or exchange.get_time() - exch_pair['last_order_time'] < dca_timeout):
                 continue
 
             if self.pair_specific_buy_checks(pair, exch_pair['close'], possible_buys[pair],
                                              exchange.balance, exch_pair['percentage'],
-                                             config.global_trade_conditions['dca_min_buy_balance'], True):
+                                             trade_conditions.dca_min_buy_balance, True, snapshot):
 
                 current_price = exch_pair['close']
 
@@ -415,31 +537,36 @@ class LiquiTrader:
 
                 # get viable trade, returns None if none available
                 price_info = self.check_for_viable_trade(current_price, orderbook, possible_buys[pair], min_cost,
-                                                         config.global_trade_conditions['max_spread'], True)
+                                                         trade_conditions.max_spread, True)
 
                 # Check to see if amount remaining to buy is greater than min trade quantity for pair
                 if price_info is None or price_info.amount * price_info.average_price < min_cost:
                     continue
 
                 order = exchange.place_order(pair, 'limit', 'buy', possible_buys[pair], exch_pair['close'])
+                METRICS.increment('orders_placed_total', side='dca')
                 if order['cost'] > min_cost:
                     exch_pair['dca_level'] += 1
                 self.trade_history.append(order)
                 self.save_trade_history()
 
     # ----
-    def pair_specific_buy_checks(self, pair, price, amount, balance, change, min_balance, dca=False):
+    def pair_specific_buy_checks(self, pair, price, amount, balance, change, min_balance, dca=False, snapshot=None):
+        """
+        :param min_balance: (value, is percent of total current value), see GlobalTradeConditions
+        :param snapshot: ConfigSnapshot of the current cycle, defaults to the latest one
+        """
         # Alleviate lookup cost
-        global_trade_conditions = self.config.global_trade_conditions
+        trade_conditions = (snapshot or self.snapshot).trade_conditions
+
+        min_balance, is_percent = min_balance
+        if is_percent:
+            min_balance *= self.get_tcv()
 
-        min_balance = min_balance if not isinstance(min_balance, str) \
-            else percentToFloat(min_balance) * self.get_tcv()
-        self.below_max_pairs = self.is_below_max_pairs(len(self.owned), int(global_trade_conditions['max_pairs']))
+        self.below_max_pairs = trade_conditions.below_max_pairs(len(self.owned))
         checks = [not exceeds_min_balance(balance, min_balance, price, amount),
-                  below_max_change(change, global_trade_conditions['max_change']),
-                  above_min_change(change, global_trade_conditions['min_change']),
-                  not is_blacklisted(pair, global_trade_conditions['blacklist']),
-                  is_whitelisted(pair, global_trade_conditions['whitelist'])
+                  trade_conditions.in_change_range(change),
+                  trade_conditions.is_tradeable(pair)
                   ]
 
         if not dca:
@@ -452,24 +579,23 @@ class LiquiTrader:
         return current_pairs < max_pairs or max_pairs == 0
 
     # ----
-    def global_buy_checks(self):
+    def global_buy_checks(self, snapshot=None):
         # Alleviate lookup cost
         quote_change_info = self.exchange.quote_change_info
-        market_change = self.config.global_trade_conditions
+        market_change = (snapshot or self.snapshot).trade_conditions
         self.market_change_24h = get_average_market_change(self.exchange.pairs)
-        self.below_max_pairs = self.is_below_max_pairs(len(self.owned),
-                                                       int(self.config.global_trade_conditions['max_pairs']))
-        self.check_24h_quote_change = in_range(quote_change_info['24h'],
-                                               market_change['min_24h_quote_change'],
-                                               market_change['max_24h_quote_change'])
+        self.below_max_pairs = market_change.below_max_pairs(len(self.owned))
+        self.check_24h_quote_change = in_trade_range(quote_change_info['24h'],
+                                                     market_change.min_24h_quote_change,
+                                                     market_change.max_24h_quote_change)
 
-        self.check_1h_quote_change = in_range(quote_change_info['1h'],
-                                              market_change['min_1h_quote_change'],
-                                              market_change['max_1h_quote_change'])
+        self.check_1h_quote_change = in_trade_range(quote_change_info['1h'],
+                                                    market_change.min_1h_quote_change,
+                                                    market_change.max_1h_quote_change)
 
-        self.check_24h_market_change = in_range(self.market_change_24h,
-                                                market_change['min_24h_market_change'],
-                                                market_change['max_24h_market_change'])
+        self.check_24h_market_change = in_trade_range(self.market_change_24h,
+                                                      market_change.min_24h_market_change,
+                                                      market_change.max_24h_market_change)
 
         return all((
             self.check_1h_quote_change,
@@ -480,25 +606,68 @@ class LiquiTrader:
     # ----
     def do_technical_analysis(self):
         candles = self.exchange.candles
+        snapshot = self.snapshot
+        if snapshot is None:
+            raise TypeError('(do_technical_analysis) LiquiTrader.snapshot cannot be None, see load_strategies')
+
+        # the cache and statistics belong to the trader thread, they follow a new snapshot here instead of
+        # being changed by whichever thread published it
+        if snapshot is not self.analysed_snapshot:
+            self.indicator_cache.clear()
+            self.statistics.set_window(snapshot.statistics_window)
+            self.analysed_snapshot = snapshot
+
+        indicators = snapshot.indicators
+        with METRICS.time('technical_analysis_seconds'):
+            for pair in self.exchange.pairs:
+                try:
+                    self.statistics.update(pair, run_ta(candles[pair], indicators, self.indicator_cache, pair))
 
-        for pair in self.exchange.pairs:
-            if self.indicators is None:
-                raise TypeError('(do_technical_analysis) LiquiTrader.indicators cannot be None')
+                except Exception as ex:
+                    print('err in do ta', pair, ex)
+                    self.exchange.reload_single_candle_history(pair)
+                    continue
 
-            try:
-                self.statistics[pair] = run_ta(candles[pair], self.indicators)
+        self.state_versions['stats'] += 1
 
-            except Exception as ex:
-                print('err in do ta', pair, ex)
-                self.exchange.reload_single_candle_history(pair)
-                continue
+    # ----
+    def trade_cycle(self):
+        """
+        evaluate every strategy against current pair / statistics state and act on the results
+        statistics are expected to be current (see do_technical_analysis)
+        the whole cycle runs on the snapshot current when it starts, config updates apply from the next cycle
+        """
+        exchange = self.exchange
+        snapshot = self.snapshot
+        general_settings = snapshot.general_settings
+        time_section = METRICS.time
+
+        with time_section('trade_cycle_seconds'):
+            with time_section('strategy_evaluation_seconds', side='buy'):
+                possible_buys = self.get_possible_buys(exchange.pairs, snapshot.buy_strategies)
+            with time_section('strategy_evaluation_seconds', side='dca'):
+                possible_dca_buys = self.get_possible_buys(exchange.pairs, snapshot.dca_buy_strategies)
+
+            if (self.global_buy_checks(snapshot)
+                    and general_settings['trading_enabled'] and not general_settings['sell_only_mode']):
+                with time_section('order_handling_seconds', side='buy'):
+                    self.handle_possible_buys(possible_buys, snapshot)
+                with time_section('order_handling_seconds', side='dca'):
+                    self.handle_possible_dca_buys(possible_dca_buys, snapshot)
+
+            with time_section('strategy_evaluation_seconds', side='sell'):
+                possible_sells = self.get_possible_sells(exchange.pairs, snapshot.sell_strategies)
+            # Don't make sells if not trading enabled
+            if general_settings['trading_enabled']:
+                with time_section('order_handling_seconds', side='sell'):
+                    self.handle_possible_sells(possible_sells)
 
     # ----
     def save_trade_history(self):
+        self.state_versions['trades'] += 1
         self.save_pairs_history()
         fp = 'tradehistory.json'
-        with open(fp, 'w') as f:
-            json.dump(self.trade_history, f)
+        JsonTools.dump_file(self.trade_history, fp)
 
     # ----
     def save_pairs_history(self):
@@ -507,9 +676,7 @@ class LiquiTrader:
     # ----
     def load_pairs_history(self):
         fp = 'pair_data.json'
-
-        with open(fp, 'r') as f:
-            pair_data = json.load(f)
+        pair_data = JsonTools.load_file(fp)
 
         exchange_pairs = self.exchange.pairs
         for pair in exchange_pairs:
@@ -526,25 +693,32 @@ class LiquiTrader:
     # ----
     def load_trade_history(self):
         fp = 'tradehistory.json'
-        with open(fp, 'r') as f:
-            self.trade_history = json.load(f)
+        self.trade_history = JsonTools.load_file(fp)
 
-    def pairs_to_df(self, basic=True, friendly=False, holding=False, fee=0.075):
-        df = pd.DataFrame.from_dict(self.exchange.pairs, orient='index')
-        times = []
+    # ----
+    @property
+    def trade_history(self):
+        return self._trade_history[1]
 
-        timezone = self.config.general_settings['timezone']
-        try:
-            arrow.utcnow().to(timezone)  # Try to parse timezone
+    @trade_history.setter
+    def trade_history(self, trade_history):
+        # the list is only appended to in place, replacing it starts a new generation
+        self._trade_history = (self._trade_history[0] + 1, trade_history)
 
-        except arrow.parser.ParserError:
-            print('Invalid timezone in config, defaulting to UTC')
-            timezone = 'UTC'
+    def get_trade_history_generation(self):
+        """
+        :return: (generation, trade history), read together. the generation changes whenever the list is replaced
+        """
+        return self._trade_history
 
-        for t in df.last_order_time.values:
-            times.append(arrow.get(t).to(timezone).datetime)
+    def pairs_to_df(self, basic=True, friendly=False, holding=False, fee=0.075):
+        pairs = self.exchange.pairs
+        # same frame as DataFrame.from_dict(pairs, orient='index'), without its per cell nested dict walk
+        df = pd.DataFrame(list(pairs.values()), index=list(pairs))
 
-        df.last_order_time = pd.DatetimeIndex(times)
+        # whole seconds, as arrow.get(int(t)) used to
+        timezone = get_timezone(self.config.general_settings['timezone'])
+        df.last_order_time = pd.to_datetime(df.last_order_time.astype('int64'), unit='s', utc=True).dt.tz_convert(timezone)
 
         if 'total_cost' in df and 'close' in df:
             df['current_value'] = df.close * df.total * (1 - (fee / 100))
@@ -555,26 +729,33 @@ class LiquiTrader:
                 df = df[df.total_cost > dust]
 
         if friendly:
-            try:
-                if len(df) > 0:
-                    df = prettify_dataframe(df, self.exchange.quote_price)
-
-            except ValueError as ex:
-                pass
-
-            except TypeError as ex:
-                pass
-            try:
-                df = df[DEFAULT_COLUMNS] if basic else df
-            except KeyError as ex:
-                pass
-            df.rename(columns=COLUMN_ALIASES,
-                      inplace=True)
-            return df
+            return self.format_pairs_df(df, basic)
 
         else:
             return df
 
+    # ----
+    def format_pairs_df(self, df, basic=True):
+        """
+        display formatting / column names of pairs_to_df(friendly=True), paged endpoints format just the page
+        """
+        try:
+            if len(df) > 0:
+                df = prettify_dataframe(df, self.exchange.quote_price)
+
+        except ValueError as ex:
+            pass
+
+        except TypeError as ex:
+            pass
+        try:
+            df = df[DEFAULT_COLUMNS] if basic else df
+        except KeyError as ex:
+            pass
+        df.rename(columns=COLUMN_ALIASES,
+                  inplace=True)
+        return df
+
     # ----
     def get_pending_value(self):
         df = self.pairs_to_df()
@@ -661,17 +842,36 @@ class LiquiTrader:
 
     # ----
     def get_trailing_pairs(self):
+        pairs = self.exchange.pairs
+        snapshot = self.snapshot
         return {
-            "buy": list(map(vars,
-                        self.buy_strategies)),
+            "buy": [strategy.get_trailing_view(pairs) for strategy in snapshot.buy_strategies],
 
-            "sell": list(map(vars,
-                        self.sell_strategies)),
+            "sell": [strategy.get_trailing_view(pairs) for strategy in snapshot.sell_strategies],
 
-            "dca": list(map(vars,
-                        self.dca_buy_strategies))
+            "dca": [strategy.get_trailing_view(pairs) for strategy in snapshot.dca_buy_strategies]
         }
 
+    def get_trailing_json(self):
+        """
+        get_trailing_pairs as JSON bytes, joined from each strategy's encoded entries (Condition.get_trailing_json)
+        """
+        pairs = self.exchange.pairs
+        snapshot = self.snapshot
+        sides = (('buy', snapshot.buy_strategies), ('sell', snapshot.sell_strategies),
+                 ('dca', snapshot.dca_buy_strategies))
+
+        return b'{' + b','.join(b'"%s":[' % side.encode() +
+                                b','.join(strategy.get_trailing_json(pairs) for strategy in strategies) + b']'
+                                for side, strategies in sides) + b'}'
+
+    # ----
+    def profile(self, duration, interval=Profiler.DEFAULT_INTERVAL, thread_prefixes=None):
+        """
+        sample the threads of the process running the engine, see Profiler.profile
+        """
+        return Profiler.profile(duration, interval, thread_prefixes)
+
 
 def print_line(text=''):
     sys.stdout.write(text + '\n')
@@ -713,39 +913,21 @@ def trader_thread_loop(lt_engine, _shutdown_handler):
     _shutdown_handler.add_task()
 
     # Alleviate method lookup overhead
-    global_buy_checks = lt_engine.global_buy_checks
     do_technical_analysis = lt_engine.do_technical_analysis
-    get_possible_buys = lt_engine.get_possible_buys
-    handle_possible_buys = lt_engine.handle_possible_buys
-    handle_possible_dca_buys = lt_engine.handle_possible_dca_buys
-    get_possible_sells = lt_engine.get_possible_sells
-    handle_possible_sells = lt_engine.handle_possible_sells
+    trade_cycle = lt_engine.trade_cycle
 
-    exchange = lt_engine.exchange
-    config = lt_engine.config
     last_run_ta = 0
     while not _shutdown_handler.running_or_complete():
         try:
-            # timed @ 1.1 seconds 128ms stdev
+            # timed @ 1.1 seconds 128ms stdev, see technical_analysis_seconds on /api/metrics
             # only run once per minute, any more than that is not necessary
+            # and straight away when a config update published a new snapshot
             now = time.time()
-            if now - last_run_ta > 60:
+            if now - last_run_ta > 60 or lt_engine.snapshot is not lt_engine.analysed_snapshot:
                 do_technical_analysis()
                 last_run_ta=now
 
-            from pprint import pprint
-            # pprint(exchange.pairs)
-
-            possible_buys = get_possible_buys(exchange.pairs, lt_engine.buy_strategies)
-            possible_dca_buys = get_possible_buys(exchange.pairs, lt_engine.dca_buy_strategies)
-            if global_buy_checks() and config.general_settings['trading_enabled'] and not config.general_settings['sell_only_mode']:
-                    handle_possible_buys(possible_buys)
-                    handle_possible_dca_buys(possible_dca_buys)
-            possible_sells = get_possible_sells(exchange.pairs, lt_engine.sell_strategies)
-            # Don't make sells if not trading enabled
-            if config.general_settings['trading_enabled']:
-                handle_possible_sells(possible_sells)
-
+            trade_cycle()
 
         except Exception as ex:
             print('err in run: {}'.format(traceback.format_exc()))
@@ -782,7 +964,7 @@ def firsttime_init(shutdown_handler):
                                           host=host,
                                           port=port,
                                           )
-    gui_thread = threading.Thread(target=gui_server.run)
+    gui_thread = threading.Thread(target=gui_server.run, name='gui')
     gui_thread.start()
     while not gui.gui_server.users_exist():
         time.sleep(1)
@@ -818,11 +1000,21 @@ def main(ipython=False):
     gui.gui_server.LT_ENGINE = lt_engine
     config = lt_engine.config
 
-    gui_server = gui.gui_server.GUIServer(shutdown_handler,
-                                          host=config.general_settings['host'],
-                                          port=config.general_settings['port'],
-                                          ssl=config.general_settings['use_ssl'],
-                                          )
+    if config.general_settings.get('gui_process'):
+        # web / API tier in its own process, reading engine state over a local channel
+        from gui.state_channel import GUIProcess
+        gui_server = GUIProcess(lt_engine, shutdown_handler,
+                                host=config.general_settings['host'],
+                                port=config.general_settings['port'],
+                                ssl=config.general_settings['use_ssl'],
+                                )
+
+    else:
+        gui_server = gui.gui_server.GUIServer(shutdown_handler,
+                                              host=config.general_settings['host'],
+                                              port=config.general_settings['port'],
+                                              ssl=config.general_settings['use_ssl'],
+                                              )
 
     # ----
     try:
@@ -834,9 +1026,10 @@ def main(ipython=False):
     lt_engine.load_strategies()
 
     # ----
-    trader_thread = threading.Thread(target=lambda: trader_thread_loop(lt_engine, shutdown_handler))
-    gui_thread = threading.Thread(target=gui_server.run)
-    exchange_thread = threading.Thread(target=lt_engine.run_exchange)
+    # named so stacks can be told apart, see /api/profile
+    trader_thread = threading.Thread(target=lambda: trader_thread_loop(lt_engine, shutdown_handler), name='trader')
+    gui_thread = threading.Thread(target=gui_server.run, name='gui')
+    exchange_thread = threading.Thread(target=lt_engine.run_exchange, name='exchange')
 
     trader_thread.start()
     gui_thread.start()
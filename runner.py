@@ -8,5 +8,9 @@ utils.runtime_handler.enable_faulthandler()  # Handles crashes that otherwise wo
 
 
 if __name__ == '__main__':
+    # frozen builds start the GUI process (general setting gui_process) through this executable
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     import liquitrader
     liquitrader.main()
@@ -0,0 +1,112 @@
+import sys
+sys.path.append('..')
+
+import math
+import random
+
+import pytest
+
+from backtesting.BacktestExchange import BacktestExchange
+from backtesting.Backtester import Backtester, PairFeed, make_config
+from backtesting.HistoryLoader import resample_candles
+from utils.CandleTools import candles_to_df
+
+START = 1535455200000
+RSI_5M = {'value': 'RSI', 'candle_period': 14, 'timeframe': '5m'}
+
+
+def make_candles(seed=0, minutes=2 * 1440):
+    rnd = random.Random(seed)
+    candles = []
+    price = 0.001
+    for i in range(minutes):
+        open_ = price
+        price = 0.001 * (1 + 0.05 * math.sin(i / (180 + seed * 20))) * (1 + rnd.uniform(-0.002, 0.002))
+        candles.append([START + i * 60000, open_, max(open_, price) * 1.001, min(open_, price) * 0.999,
+                        price, 1000 + rnd.random() * 100])
+    return candles
+
+
+def get_config():
+    buy = [{'conditions': [{'left': RSI_5M, 'op': '<', 'right': {'value': 35}}], 'trailing %': 0.1, 'buy_value': 0.1}]
+    sell = [{'conditions': [], 'trailing %': 0.1, 'sell_value': 1}]
+    return make_config(buy, sell)
+
+
+# ----
+def test_resample_candles():
+    df = candles_to_df(make_candles(minutes=10))
+    resampled = resample_candles(df, '5m')
+
+    assert len(resampled) == 2
+    first = df.iloc[:5]
+    assert resampled.iloc[0]['timestamp'] == START
+    assert resampled.iloc[0]['open'] == first['open'].iloc[0]
+    assert resampled.iloc[0]['high'] == first['high'].max()
+    assert resampled.iloc[0]['low'] == first['low'].min()
+    assert resampled.iloc[0]['close'] == first['close'].iloc[-1]
+    assert resampled.iloc[0]['volume'] == pytest.approx(first['volume'].sum())
+
+
+def test_feed_only_uses_closed_candles():
+    base = candles_to_df(make_candles())
+    frames = {'1m': base, '5m': resample_candles(base, '5m')}
+    feed = PairFeed('ADA/ETH', frames, [{'name': 'RSI', 'candle_period': 14}], '1m', ['5m'])
+
+    # 12 minutes in: 12 1m candles and 2 5m candles have closed
+    now = START + 12 * 60000
+    feed.advance(now)
+
+    assert feed.close[feed.index] == base['close'].iloc[11]
+    assert len(feed.statistics['RSI_14_5m']) == 2
+    assert feed.start_time > START
+
+
+def test_exchange_uses_simulated_clock():
+    exchange = BacktestExchange('ETH', 1, ['5m'])
+    exchange.add_pair('ADA/ETH').update({'close': 0.001, 'bid': 0.001, 'ask': 0.001})
+    exchange.sim_time = 1535455200
+
+    order = exchange.place_order('ADA/ETH', 'limit', 'buy', 100, 0.001)
+
+    assert exchange.get_time() == 1535455200
+    assert order['timestamp'] == 1535455200000
+    assert exchange.pairs['ADA/ETH']['last_order_time'] == 1535455200
+    assert exchange.get_depth('ADA/ETH', 'buy')[0][0] == 0.001
+
+
+def test_closing_sell_resets_the_position():
+    exchange = BacktestExchange('ETH', 1, ['5m'])
+    pair = exchange.add_pair('ADA/ETH')
+    pair.update({'close': 0.001, 'bid': 0.001, 'ask': 0.001})
+    exchange.place_order('ADA/ETH', 'limit', 'buy', 100, 0.001)
+
+    pair.update({'close': 0.002, 'bid': 0.002, 'ask': 0.002})
+    exchange.place_order('ADA/ETH', 'limit', 'sell', pair['total'], 0.002)
+
+    # the realised gain isn't carried into the next position's cost
+    assert (pair['total'], pair['total_cost'], pair['avg_price']) == (0, 0, None)
+
+
+def test_backtest_run():
+    history = {f'SYM{i}/ETH': {'1m': candles_to_df(make_candles(i))} for i in range(2)}
+    backtester = Backtester(history, get_config(), starting_balance=1.0)
+    results = backtester.run()
+
+    assert results['steps'] > 0 and results['pairs'] == 2
+    assert results['buys'] > 0 and results['sells'] > 0
+    assert results['candle_errors'] == 0
+
+    # final value is balance plus open positions at the last close
+    exchange = backtester.exchange
+    holdings = sum(pair['close'] * pair['total'] for pair in exchange.pairs.values())
+    assert results['final_value'] == pytest.approx(exchange.balance + holdings)
+
+    # orders are stamped with simulated, not wall clock, time
+    for order in backtester.trader.trade_history:
+        assert results['start'] <= order['timestamp'] <= results['end']
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
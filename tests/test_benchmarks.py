@@ -0,0 +1,42 @@
+import sys
+sys.path.append('..')
+
+import pytest
+
+from benchmarks import bench_hot_paths, fixtures
+
+
+def test_fixtures_are_reproducible():
+    first = fixtures.make_candlesticks(pair_count=2, candle_count=50)
+    second = fixtures.make_candlesticks(pair_count=2, candle_count=50)
+
+    assert list(first) == ['SYM0/ETH', 'SYM1/ETH']
+    assert list(first['SYM0/ETH']) == list(fixtures.TIMEFRAMES)
+    assert first['SYM1/ETH']['1h'].equals(second['SYM1/ETH']['1h'])
+
+
+def test_every_case_runs():
+    results = bench_hot_paths.run_benchmarks(pair_count=3, repeat=1)
+
+    cases = results['results']
+    for name in ('run_ta', 'run_ta_cached', 'process_depth', 'pairs_to_df_friendly', 'calc_average_price_from_hist',
+                 'dashboard_data'):
+        assert name in cases
+    for name in fixtures.CONDITIONS:
+        assert cases['condition_' + name]['median'] > 0
+        assert cases['condition_' + name + '_compiled']['median'] > 0
+
+    assert results['meta']['pairs'] == 3
+
+
+def test_compare_reports_slowdowns():
+    baseline = {'results': {'fast': {'median': 1.0}, 'slow': {'median': 1.0}, 'skipped': {'skipped': 'x'}}}
+    results = {'results': {'fast': {'median': 1.1}, 'slow': {'median': 1.5}, 'skipped': {'skipped': 'x'},
+                           'new': {'median': 1.0}}}
+
+    assert bench_hot_paths.compare(results, baseline, tolerance=0.25) == [('slow', 1.0, 1.5, 50.0)]
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,84 @@
+import sys
+sys.path.append('..')
+
+import threading
+
+import pytest
+
+from backtesting.Backtester import make_config
+from config.ConfigSnapshot import ConfigSnapshot
+from config.PairSettingsTable import PairSettingsTable
+from liquitrader import LiquiTrader, ShutdownHandler
+
+RSI_5M = {'value': 'RSI', 'candle_period': 14, 'timeframe': '5m'}
+
+
+def get_buy_strategies(count):
+    return [{'conditions': [{'left': RSI_5M, 'op': '<', 'right': {'value': 30}}], 'trailing %': 0.1,
+             'buy_value': 0.1} for _ in range(count)]
+
+
+def test_snapshot_is_frozen():
+    config = make_config(get_buy_strategies(1), [])
+    snapshot = ConfigSnapshot(config, [], [], [])
+
+    config.general_settings['trading_enabled'] = False
+    config.indicators['RSI14']['timeframes'].append('1h')
+
+    assert snapshot.general_settings['trading_enabled'] is True
+    assert snapshot.indicators[0]['timeframes'] == ('5m',)
+    assert snapshot.timeframes == {'5m'}
+
+    with pytest.raises(AttributeError):
+        snapshot.buy_strategies = ()
+    with pytest.raises(TypeError):
+        snapshot.general_settings['trading_enabled'] = False
+
+
+def test_readers_never_see_a_partial_update():
+    trader = LiquiTrader(ShutdownHandler())
+    trader.config = make_config(get_buy_strategies(1), [])
+    trader.load_strategies()
+
+    def publish():
+        for count in range(2, 200):
+            with trader.config.update_lock:
+                trader.config.buy_strategies = get_buy_strategies(count)
+                trader.config.general_settings = {**trader.config.general_settings, 'count': count}
+                trader.load_strategies()
+
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+
+    versions = []
+    while publisher.is_alive() or not versions:
+        snapshot = trader.snapshot
+        assert snapshot.general_settings.get('count', 1) == len(snapshot.buy_strategies)
+        versions.append(snapshot.version)
+    publisher.join()
+
+    assert versions == sorted(versions)
+    assert len(trader.buy_strategies) == 199 and trader.snapshot.general_settings['count'] == 199
+
+
+def test_reload_leaves_the_current_snapshot_alone():
+    trader = LiquiTrader(ShutdownHandler())
+    trader.config = make_config(get_buy_strategies(1), [])
+    trader.load_strategies()
+    old = trader.snapshot
+    old_table = old.buy_strategies[0].pair_settings
+
+    # a trade cycle holding old while the pair settings are replaced
+    trader.config.pair_settings_table = PairSettingsTable({'ADA': {'sell': {'value': '3'}}})
+    trader.load_strategies()
+
+    strategy = old.buy_strategies[0]
+    assert strategy.pair_settings is old_table and strategy.pair_settings.get('ADA/ETH') is None
+    assert trader.buy_strategies[0].pair_settings.get('ADA/ETH').sell_value == 3.0
+    # the trailing pairs carry on
+    assert trader.buy_strategies[0].pairs_trailing is strategy.pairs_trailing
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,126 @@
+import sys
+sys.path.append('..')
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from exchanges.BinanceExchange import BinanceExchange
+
+
+def get_exchange_instance():
+    instance = BinanceExchange('binance', 'ETH', 10, {'public': '', 'secret': ''}, ['5m'])
+    instance.pairs = {
+        'ADA/ETH': {'symbol': 'ADA/ETH', 'base': 'ADA', 'total': 0, 'amount': 0, 'total_cost': 0,
+                    'avg_price': None, 'limits': {'amount': {'min': 1}}},
+        'XRP/ETH': {'symbol': 'XRP/ETH', 'base': 'XRP', 'total': 5, 'amount': 5, 'total_cost': 0.5,
+                    'avg_price': 0.1, 'limits': {'amount': {'min': 1}}},
+    }
+    return instance
+
+
+class Client:
+    def __init__(self, balances):
+        self.balances = balances
+        self.trade_requests = []
+
+    def fetchBalance(self):
+        return self.balances
+
+    def fetchMyTrades(self, symbol):
+        self.trade_requests.append(symbol)
+        return [{'id': 1, 'symbol': symbol, 'side': 'buy', 'amount': 20, 'cost': 1.0, 'price': 0.05,
+                 'fee': {'cost': 0, 'currency': 'ETH'}}]
+
+
+@pytest.fixture
+def running_loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(1)
+    loop.close()
+
+
+def wait_for(condition, timeout=1.0):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+# ----
+def test_candle_reload_is_dropped_without_a_running_loop():
+    ex = get_exchange_instance()
+    ex._loop = asyncio.new_event_loop()
+
+    ex.reload_single_candle_history('ADA/ETH')
+    assert not ex._pending_candle_reloads
+    ex._loop.close()
+
+
+def test_candle_reloads_are_deduplicated_and_released(running_loop):
+    ex = get_exchange_instance()
+    ex._loop = running_loop
+    release = threading.Event()
+    calls = []
+
+    async def reload(symbol):
+        calls.append(symbol)
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        raise RuntimeError('fetch failed')
+
+    ex._reload_single_candle_history = reload
+
+    threads = [threading.Thread(target=ex.reload_single_candle_history, args=('ADA/ETH',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert wait_for(lambda: calls == ['ADA/ETH'])
+    assert ex._pending_candle_reloads == {'ADA/ETH'}
+
+    # a failed reload still frees the symbol for the next one
+    release.set()
+    assert wait_for(lambda: not ex._pending_candle_reloads)
+    ex.reload_single_candle_history('ADA/ETH')
+    assert wait_for(lambda: len(calls) == 2)
+
+
+def test_balances_are_fetched_then_applied():
+    ex = get_exchange_instance()
+    ex._client = Client({'ETH': {'total': 7}, 'ADA': {'free': 20, 'used': 0, 'total': 20},
+                         'XRP': {'free': 5, 'used': 0, 'total': 5}})
+
+    balances, trades = ex.fetch_balances()
+    # only ADA's average has to be recalculated, fetching doesn't touch pairs
+    assert list(trades) == ['ADA/ETH'] and ex._client.trade_requests == ['ADA/ETH']
+    assert ex.pairs['ADA/ETH']['total'] == 0 and ex.balance == 10
+
+    ex.apply_balances(balances, trades)
+    assert ex.balance == 7
+    assert ex.pairs['ADA/ETH']['total'] == 20
+    assert ex.pairs['ADA/ETH']['avg_price'] == pytest.approx(0.05)
+    assert ex.pairs['XRP/ETH']['avg_price'] == 0.1
+
+
+def test_positions_changed_since_the_fetch_wait_for_the_next_one():
+    ex = get_exchange_instance()
+    ex._client = Client({'XRP': {'free': 5, 'used': 0, 'total': 5}})
+    balances, trades = ex.fetch_balances()
+
+    # a fill landed on the loop in between, its trades weren't fetched
+    ex.pairs['XRP/ETH']['total'] = 8
+    ex.apply_balances(balances, trades)
+    assert ex.pairs['XRP/ETH']['total'] == 8
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
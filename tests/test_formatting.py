@@ -0,0 +1,60 @@
+import sys
+sys.path.append('..')
+
+import arrow
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.FormattingTools import (decimal_with_usd, eight_decimal_format, format_datetimes, format_decimal_with_usd,
+                                   format_fixed, prettify_dataframe, two_decimal_format)
+from utils.Utils import get_timezone
+
+VALUES = [0.0, 1e-9, 0.00036123456789, 1.005, 2.675, 123.456789, -4.2, 1e6 / 3, float('nan')]
+
+
+def test_vectorized_formats_match_scalar_formats():
+    assert list(format_fixed(VALUES)) == [eight_decimal_format(value) for value in VALUES]
+    assert list(format_fixed(VALUES, 2)) == [two_decimal_format(value) for value in VALUES]
+    assert list(format_decimal_with_usd(VALUES, 213.7)) == [decimal_with_usd(value, 213.7) for value in VALUES]
+
+
+@pytest.mark.parametrize('timezone', ['UTC', 'US/Eastern', 'Asia/Kolkata', '+05:30', '-03:00'])
+def test_datetimes_match_str_across_dst(timezone):
+    # 0 is what pairs without orders have, the others straddle US daylight saving changes
+    seconds = [0, 1520751600, 1520755200, 1541311200, 1541314800, 1535455200]
+    column = pd.Series(pd.to_datetime(seconds, unit='s', utc=True)).dt.tz_convert(get_timezone(timezone))
+
+    expected = [str(arrow.get(t).to(timezone).datetime) for t in seconds]
+    assert list(format_datetimes(column)) == [str(value) for value in column] == expected
+
+
+def test_timezones_parsed_once(capsys):
+    get_timezone.cache_clear()
+    assert get_timezone('US/Eastern') is get_timezone('US/Eastern')
+
+    assert get_timezone('not/a_timezone') == get_timezone('UTC')
+    get_timezone('not/a_timezone')
+    assert capsys.readouterr().out.count('Invalid timezone') == 1
+
+
+def test_prettify_dataframe():
+    df = pd.DataFrame({'last_order_time': pd.to_datetime([1535455200, 0], unit='s', utc=True),
+                       'avg_price': [0.00036, np.nan], 'close': [0.0004, 0.001], 'gain': [10.123, -1.5],
+                       'quoteVolume': [1234.9, 10.1], 'total_cost': [0.5, 0.0], 'current_value': [0.55, 0.0],
+                       'total': [1388.888, 0.0], 'percentage': [1.234, -0.5]})
+
+    df = prettify_dataframe(df, 200)
+    assert df.iloc[0].to_dict() == {'last_order_time': '2018-08-28 11:20:00+00:00', 'avg_price': '0.00036000',
+                                    'close': '0.00040000', 'gain': 10.12, 'quoteVolume': 1234,
+                                    'total_cost': '0.50000000 ($100.0)', 'current_value': '0.55000000 ($110.0)',
+                                    'total': 1388.89, 'percentage': '1.23'}
+    assert df.avg_price[1] == 'nan'
+
+    with pytest.raises(ValueError):
+        prettify_dataframe(pd.DataFrame({'quoteVolume': [np.nan]}))
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,144 @@
+import sys
+sys.path.append('..')
+
+import random
+
+import numpy as np
+import pytest
+
+from talib import abstract
+
+from analyzers.IndicatorCache import IndicatorCache
+from analyzers.TechnicalAnalysis import calculate_indicator, calculate_live_indicator, get_indicators, get_inputs, \
+    is_price_indicator, run_ta
+from config.config import Config
+from utils.CandleTools import candles_to_df
+
+
+def get_candles(count=100, step=300000):
+    return candles_to_df([[1535455200000 + i * step, 1 + i * 0.01, 1.1 + i * 0.01, 0.9 + i * 0.01,
+                           1 + (i % 7) * 0.01, 100 + i] for i in range(count)])
+
+
+def get_strategy(timeframe='5m'):
+    return {'conditions': [{'left': {'value': 'RSI', 'candle_period': 14, 'timeframe': timeframe},
+                            'op': '<', 'right': {'value': 30}},
+                           {'left': {'value': 'BBANDS', 'timeframe': '15m'}, 'op': '<', 'right': {'value': 'price'}}]}
+
+
+# ----
+def test_config_records_timeframes_per_indicator():
+    config = Config()
+    config.parse_indicators_from_strategy([get_strategy('5m'), get_strategy('1h')])
+
+    assert config.indicators['RSI14']['timeframes'] == ['5m', '1h']
+    assert config.indicators['BBANDS0']['timeframes'] == ['15m']
+    assert config.timeframes == {'5m', '15m', '1h'}
+
+
+def test_only_referenced_timeframes_are_calculated():
+    config = Config()
+    indicators = list(config.parse_indicators_from_strategy([get_strategy()]).values())
+    stats = run_ta({'5m': get_candles(), '15m': get_candles(step=900000)}, indicators)
+
+    assert set(stats) == {'RSI_14_5m', 'UPPERBAND_15m', 'MIDDLEBAND_15m', 'LOWERBAND_15m'}
+    expected = dict(get_indicators(get_candles(), 'RSI', 14))['RSI_14']
+    assert np.allclose(stats['RSI_14_5m'], expected, equal_nan=True)
+
+
+def test_results_are_reused_until_candles_change():
+    cache = IndicatorCache()
+    indicators = [{'name': 'RSI', 'candle_period': 14, 'timeframes': ['5m']}]
+    candles = get_candles()
+
+    first = run_ta({'5m': candles}, indicators, cache, 'ADA/ETH')
+    second = run_ta({'5m': candles}, indicators, cache, 'ADA/ETH')
+    assert second['RSI_14_5m'] is first['RSI_14_5m']
+    assert cache.hits == 1
+
+    # live candle update
+    candles.loc[candles.index[-1], 'close'] = 5
+    third = run_ta({'5m': candles}, indicators, cache, 'ADA/ETH')
+    assert third['RSI_14_5m'] is not first['RSI_14_5m']
+    assert third['RSI_14_5m'][-1] != first['RSI_14_5m'][-1]
+
+
+def test_indicators_without_timeframes_run_everywhere():
+    stats = run_ta({'5m': get_candles(), '15m': get_candles()}, [{'name': 'RSI', 'candle_period': 14}])
+    assert set(stats) == {'RSI_14_5m', 'RSI_14_15m'}
+
+
+def get_random_walk(count=500):
+    rnd = random.Random(3)
+    candles, price = [], 0.001
+    for i in range(count):
+        open_, price = price, price * (1 + rnd.uniform(-0.01, 0.01))
+        candles.append([1535455200000 + i * 300000, open_, max(open_, price) * 1.002, min(open_, price) * 0.998,
+                        price, rnd.uniform(100, 1000)])
+    return candles_to_df(candles)
+
+
+@pytest.mark.parametrize('name, period', [('RSI', 14), ('EMA', 20), ('MACD', 0), ('BBANDS', 20), ('MFI', 30)])
+def test_live_candle_matches_full_calculation(name, period):
+    candles = get_random_walk()
+    full = get_indicators(candles, name, period)
+    live = calculate_live_indicator({}, get_inputs(candles), name, period)
+
+    for (full_name, full_values), (live_name, live_values) in zip(full, live):
+        assert full_name == live_name
+        assert np.allclose(full_values, live_values, rtol=1e-6, equal_nan=True)
+
+
+@pytest.mark.parametrize('name, period', [('RSI', 14), ('MACD', 0), ('BBANDS', 20), ('MFI', 30), ('CDLDOJI', 0),
+                                          ('CDLDOJI', 14)])
+def test_direct_calls_match_the_abstract_api(name, period):
+    inputs = get_inputs(get_random_walk())
+    function = abstract.Function(name)
+    expected = function(inputs, timeperiod=period) if period and 'timeperiod' in function.parameters \
+        else function(inputs)
+    expected = expected if isinstance(expected, list) else [expected]
+
+    for (_, values), expected_values in zip(calculate_indicator(inputs, name, period, round_last=False), expected):
+        if is_price_indicator(name):
+            expected_values = expected_values / 100000000
+        assert np.allclose(values, expected_values, equal_nan=True)
+
+
+@pytest.mark.parametrize('count', [300, 500])
+def test_closed_candles_are_not_recalculated_on_ticks(count):
+    # the histories the engine holds, see load_all_candle_histories / reload_single_candle_history
+    cache = IndicatorCache()
+    indicators = [{'name': 'EMA', 'candle_period': 20, 'timeframes': ['5m']}]
+    candles = get_random_walk(count)
+
+    def get_closed():
+        return cache.get_closed_results('ADA/ETH', '5m', candles.to_numpy(dtype=float)).get(('EMA', 20))
+
+    first = run_ta({'5m': candles}, indicators, cache, 'ADA/ETH')
+    closed = get_closed()
+    assert closed is not None
+
+    candles.loc[candles.index[-1], 'close'] *= 1.05
+    second = run_ta({'5m': candles}, indicators, cache, 'ADA/ETH')
+
+    assert get_closed() is closed
+    assert np.array_equal(first['EMA_20_5m'][:-1], second['EMA_20_5m'][:-1], equal_nan=True)
+    assert second['EMA_20_5m'][-1] > first['EMA_20_5m'][-1]
+
+    # a new candle closes the live one
+    candles.loc[candles.index[-1] + (candles.index[-1] - candles.index[-2])] = candles.iloc[-1]
+    run_ta({'5m': candles}, indicators, cache, 'ADA/ETH')
+    assert get_closed() is not None and get_closed() is not closed
+
+
+def test_short_histories_are_recalculated_in_full():
+    cache = IndicatorCache()
+    candles = get_random_walk(100)
+    run_ta({'5m': candles}, [{'name': 'EMA', 'candle_period': 20, 'timeframes': ['5m']}], cache, 'ADA/ETH')
+
+    assert cache.get_closed_results('ADA/ETH', '5m', candles.to_numpy(dtype=float)) == {}
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,103 @@
+import sys
+sys.path.append('..')
+
+import contextlib
+import io
+
+import pytest
+
+from benchmarks import fixtures
+from utils.Metrics import METRICS, NULL_TIMER, Histogram, MetricsRegistry
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry()
+
+    @registry.timed('decorated_seconds')
+    def add(a, b):
+        return a + b
+
+    assert registry.time('section_seconds') is NULL_TIMER
+    with registry.time('section_seconds'):
+        pass
+    registry.increment('orders_placed_total', side='buy')
+    registry.observe('observed_seconds', 1.0)
+
+    assert add(1, 2) == 3
+    assert registry.histograms == {} and registry.counters == {}
+
+
+def test_enabled_registry_times_by_label():
+    registry = MetricsRegistry(enabled=True)
+
+    @registry.timed('decorated_seconds', handler='add')
+    def add(a, b):
+        return a + b
+
+    assert add(1, 2) == 3
+    with registry.time('section_seconds', side='buy'):
+        pass
+    with registry.time('section_seconds', side='sell'):
+        pass
+    registry.increment('orders_placed_total', side='buy')
+    registry.increment('orders_placed_total', 2, side='buy')
+
+    assert registry.get_histogram('decorated_seconds', handler='add').count == 1
+    assert set(registry.histograms['section_seconds']) == {(('side', 'buy'),), (('side', 'sell'),)}
+    assert registry.counters['orders_placed_total'] == {(('side', 'buy'),): 3}
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry(enabled=True, buckets=(0.1, 1.0))
+    registry.describe('cycle_seconds', 'one cycle')
+    for seconds in (0.05, 0.5, 5):
+        registry.observe('cycle_seconds', seconds)
+    registry.increment('orders_placed_total', side='buy')
+
+    extra = Histogram((0.1, 1.0))
+    extra.observe(0.2)
+    text = registry.to_prometheus([('exchange_request_seconds', {'endpoint': 'de"pth'}, extra)])
+    lines = text.splitlines()
+
+    assert text.endswith('\n')
+    assert '# HELP cycle_seconds one cycle' in lines
+    assert '# TYPE cycle_seconds histogram' in lines
+    # buckets are cumulative in the export
+    assert 'cycle_seconds_bucket{le="0.1"} 1' in lines
+    assert 'cycle_seconds_bucket{le="1.0"} 2' in lines
+    assert 'cycle_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'cycle_seconds_sum 5.55' in lines
+    assert 'cycle_seconds_count 3' in lines
+    assert 'exchange_request_seconds_bucket{endpoint="de\\"pth",le="1.0"} 1' in lines
+    assert '# TYPE orders_placed_total counter' in lines
+    assert 'orders_placed_total{side="buy"} 1' in lines
+
+
+@pytest.fixture
+def metrics_enabled():
+    METRICS.reset()
+    METRICS.enabled = True
+    yield METRICS
+    METRICS.enabled = False
+    METRICS.reset()
+
+
+def test_trade_cycle_is_instrumented(metrics_enabled):
+    engine = fixtures.make_engine(pair_count=5, holding=2)
+    engine.exchange.candles = fixtures.make_candlesticks(pair_count=5, candle_count=100)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.do_technical_analysis()
+        engine.trade_cycle()
+
+    histograms = metrics_enabled.histograms
+    assert histograms['technical_analysis_seconds'][()].count == 1
+    assert histograms['trade_cycle_seconds'][()].count == 1
+    assert set(histograms['strategy_evaluation_seconds']) == {(('side', 'buy'),), (('side', 'dca'),),
+                                                              (('side', 'sell'),)}
+    assert (('side', 'sell'),) in histograms['order_handling_seconds']
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,64 @@
+import sys
+sys.path.append('..')
+
+import pytest
+
+from backtesting.Optimizer import Optimizer, grid_search, random_search, set_param
+from utils.CandleTools import candles_to_df
+from test_backtester import get_config, make_candles
+
+PARAMS = {
+    'buy_strategies.0.trailing %': [0.1, 0.5],
+    'buy_strategies.0.conditions.0.left.candle_period': [14, 21],
+    'sell_strategies.0.sell_value': [1, 2],
+}
+
+
+def get_history():
+    return {f'SYM{i}/ETH': {'1m': candles_to_df(make_candles(i, minutes=1440))} for i in range(2)}
+
+
+# ----
+def test_set_param():
+    strategies = {'buy_strategies': [{'conditions': [{'left': {'candle_period': 14}}], 'trailing %': 0}]}
+    set_param(strategies, 'buy_strategies.0.trailing %', 0.5)
+    set_param(strategies, 'buy_strategies.0.conditions.0.left.candle_period', 21)
+
+    assert strategies['buy_strategies'][0]['trailing %'] == 0.5
+    assert strategies['buy_strategies'][0]['conditions'][0]['left']['candle_period'] == 21
+
+
+def test_search_spaces():
+    assert len(grid_search(PARAMS)) == 8
+
+    variants = random_search(PARAMS, 5, seed=1)
+    assert len(variants) == 5
+    assert len({tuple(variant.items()) for variant in variants}) == 5
+    assert random_search(PARAMS, 5, seed=1) == variants
+    assert len(random_search(PARAMS, 100)) == 8
+
+
+def test_variants_do_not_modify_base_config():
+    config = get_config()
+    optimizer = Optimizer(get_history(), config, PARAMS, workers=1)
+    strategies = optimizer.get_strategies({'buy_strategies.0.trailing %': 2})
+
+    assert strategies['buy_strategies'][0]['trailing %'] == 2
+    assert config.buy_strategies[0]['trailing %'] == 0.1
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_ranked_results(workers):
+    optimizer = Optimizer(get_history(), get_config(), PARAMS, workers=workers)
+    results = optimizer.run()
+
+    assert len(results) == 8
+    assert [result['rank'] for result in results] == list(range(1, 9))
+    profits = [result['profit_percent'] for result in results]
+    assert profits == sorted(profits, reverse=True)
+    assert all('max_drawdown_percent' in result and 'trades' in result for result in results)
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,85 @@
+import sys
+sys.path.append('..')
+
+import json
+
+import pandas as pd
+import pytest
+
+from gui.TradeLogViews import TradeLogViews
+from utils.Pagination import MAX_LIMIT, paginate, parse_page_args, to_page_json
+
+ALIASES = {'close': 'Price', 'symbol': 'Symbol'}
+
+
+def get_frame():
+    return pd.DataFrame({'symbol': ['ADA/ETH', 'XRP/ETH', 'ADA/BTC', 'TRX/ETH', 'LTC/ETH'],
+                         'close': [3.0, 1.0, None, 2.0, 1.0]})
+
+
+def test_no_page_args_is_legacy():
+    assert parse_page_args({}) is None
+    assert parse_page_args({'unrelated': '1'}) is None
+
+
+@pytest.mark.parametrize('args', [{'page': '0'}, {'page': 'x'}, {'limit': '0'}, {'limit': str(MAX_LIMIT + 1)}])
+def test_bad_page_args(args):
+    with pytest.raises(ValueError):
+        parse_page_args(args)
+
+
+def test_sort_by_display_name_then_page():
+    request = parse_page_args({'sort': '-Price', 'limit': '2', 'page': '2'}, ALIASES)
+    assert (request.sort, request.descending) == ('close', True)
+
+    total, page = paginate(get_frame(), request)
+    assert total == 5
+    # stable, equal prices keep their order, missing values last
+    assert list(page.symbol) == ['XRP/ETH', 'LTC/ETH']
+
+    total, page = paginate(get_frame(), parse_page_args({'sort': 'close', 'page': '3', 'limit': '2'}))
+    assert list(page.symbol) == ['ADA/BTC']
+
+
+def test_filter_and_envelope():
+    request = parse_page_args({'filter': 'ada'})
+    total, page = paginate(get_frame(), request)
+
+    body = json.loads(to_page_json(page, total, request))
+    assert body == {'total': 2, 'page': 1, 'limit': 50,
+                    'data': [{'symbol': 'ADA/ETH', 'close': 3.0}, {'symbol': 'ADA/BTC', 'close': None}]}
+
+    total, page = paginate(get_frame(), parse_page_args({'filter': 'nothing'}))
+    assert json.loads(to_page_json(page, total, request))['data'] == []
+
+    with pytest.raises(ValueError):
+        paginate(get_frame(), parse_page_args({'sort': 'missing'}))
+
+
+def trade(side, i, **extra):
+    return {'timestamp': i, 'symbol': 'ADA/ETH', 'price': 1.0, 'amount': 1.0, 'side': side, 'status': 'closed',
+            'remaining': 0.0, 'filled': 1.0, 'cost': 1.1, **extra}
+
+
+def test_trade_log_views_rebuild_only_on_change():
+    history = []
+    views = TradeLogViews()
+    assert views.get(history) == (None, None)
+
+    history.append(trade('buy', 1))
+    buy_log, sell_log = views.get(history)
+    assert list(buy_log.timestamp) == [1] and sell_log is None
+    assert views.get(history)[0] is buy_log
+
+    history.append(trade('sell', 2, bought_price=1.0))
+    buy_log, sell_log = views.get(history)
+    assert list(sell_log.columns) == TradeLogViews.SELL_COLUMNS
+    assert sell_log.gain.iloc[0] == pytest.approx(10)
+
+    # a reloaded history is a new list
+    assert views.get(list(history))[1] is not sell_log
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,45 @@
+import sys
+sys.path.append('..')
+
+import pytest
+
+from conditions.BuyCondition import BuyCondition
+from conditions.SellCondition import SellCondition
+from config.PairSettingsTable import PairSettingsTable
+
+PAIR_SETTINGS = {
+    'ADA': {'buy': {'method': 'modify', 'value': '2'}, 'sell': {'value': '1.5'}},
+    'XRP': {'buy': {'method': 'override', 'value': '10%'}},
+    'BAD': {'buy': {'method': 'modify', 'value': 'two'}},
+}
+
+
+def test_table_is_parsed_once():
+    table = PairSettingsTable(PAIR_SETTINGS)
+
+    ada = table.get('ADA/ETH')
+    assert (ada.buy_modifier, ada.buy_override, ada.sell_value) == (2.0, None, 1.5)
+    assert table.get('XRP/BTC').buy_override == (0.1, True)
+    assert table.get('ETH/BTC') is None
+    # invalid entries are skipped instead of failing every evaluation
+    assert table.get('BAD/ETH') is None
+    assert table.get('ADA/ETH') is ada
+
+
+def test_strategies_use_table():
+    table = PairSettingsTable(PAIR_SETTINGS)
+    buy = BuyCondition({'conditions': [], 'buy_value': '5%'}, pair_settings=table)
+
+    assert buy.apply_pair_settings('ETH/BTC', 10) == pytest.approx(0.5)
+    assert buy.apply_pair_settings('ADA/ETH', 10) == pytest.approx(1.0)
+    assert buy.apply_pair_settings('XRP/ETH', 10) == pytest.approx(1.0)
+    assert BuyCondition({'conditions': [], 'buy_value': 0.2}).apply_pair_settings('ADA/ETH', 10) == 0.2
+
+    sell = SellCondition({'conditions': [], 'sell_value': 1}, pair_settings=PAIR_SETTINGS)
+    assert sell.get_sell_value('ADA/ETH') == 1.5
+    assert sell.get_sell_value('XRP/ETH') == 1.0
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
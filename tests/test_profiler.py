@@ -0,0 +1,66 @@
+import sys
+sys.path.append('..')
+
+import threading
+
+import pytest
+
+from utils import Profiler
+from utils.Profiler import SamplingProfiler
+
+
+def spin(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+@pytest.fixture
+def trader_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=spin, args=(stop,), name='trader')
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_collapsed_stacks_are_rooted_at_the_thread(trader_thread):
+    profiler = SamplingProfiler(0.001, thread_prefixes=('trader',))
+    profiler.run(0.2)
+
+    lines = profiler.to_collapsed().splitlines()
+    assert lines and profiler.samples > 10
+    for line in lines:
+        stack, count = line.rsplit(' ', 1)
+        assert stack.startswith('trader;') and int(count) > 0
+
+    # thread entry point first, running frame last
+    assert any(';spin (test_profiler.py:' in line for line in lines)
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) <= profiler.samples
+
+
+def test_unselected_threads_and_the_sampler_are_skipped(trader_thread):
+    profiler = SamplingProfiler(thread_prefixes=('exchange',))
+    profiler.sample()
+    assert profiler.counts == {}
+
+    profiler = SamplingProfiler()
+    profiler.sample()
+    assert not any('SamplingProfiler' in stack or 'sample (Profiler.py' in stack for stack in profiler.counts)
+
+
+def test_profile_limits():
+    with pytest.raises(ValueError):
+        Profiler.profile(Profiler.MAX_DURATION + 1)
+    with pytest.raises(ValueError):
+        Profiler.profile(0.1, interval=0.2)
+
+    # only one profile at a time
+    with Profiler._profile_lock:
+        assert Profiler.profile(0.05) is None
+    assert Profiler.profile(0.05, 0.01) is not None
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
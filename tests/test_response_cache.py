@@ -0,0 +1,128 @@
+import sys
+sys.path.append('..')
+
+import contextlib
+import io
+import threading
+import time
+
+import pytest
+
+from benchmarks import fixtures
+from utils.Metrics import METRICS
+from utils.ResponseCache import ResponseCache
+
+
+class Builder:
+    def __init__(self, delay=0):
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return f'response {self.calls}'
+
+
+def test_reused_until_the_version_changes():
+    cache = ResponseCache()
+    build = Builder()
+
+    assert cache.get('analyzers', 1, build) == 'response 1'
+    assert cache.get('analyzers', 1, build) == 'response 1'
+    assert cache.get('analyzers', 2, build) == 'response 2'
+    assert cache.get('stats', 2, build) == 'response 3'
+    assert cache.get_stats() == {'analyzers': {'hits': 1, 'misses': 2}, 'stats': {'hits': 0, 'misses': 1}}
+
+
+def test_ttls():
+    cache = ResponseCache({'analyzers': 0.05, 'config': 0})
+    build = Builder()
+
+    cache.get('analyzers', 1, build)
+    time.sleep(0.06)
+    assert cache.get('analyzers', 1, build) == 'response 2'
+
+    # 0 turns caching off, unknown routes aren't cached either
+    assert cache.get('config', 1, build) == 'response 3'
+    assert cache.get('config', 1, build) == 'response 4'
+    assert cache.get('unknown', 1, build) == 'response 5'
+
+    # per call override
+    assert cache.get('config', 1, build, ttl=10) == 'response 6'
+    assert cache.get('config', 1, build, ttl=10) == 'response 6'
+
+
+def test_concurrent_misses_build_once():
+    cache = ResponseCache()
+    build = Builder(delay=0.05)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get('holding', 1, build))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert build.calls == 1 and set(results) == {'response 1'}
+
+
+def test_hit_metrics():
+    METRICS.reset()
+    METRICS.enabled = True
+    try:
+        cache = ResponseCache()
+        for _ in range(3):
+            cache.get('stats', 1, Builder())
+
+        counters = METRICS.counters['response_cache_total']
+        assert counters[(('result', 'hit'), ('route', 'stats'))] == 2
+        assert counters[(('result', 'miss'), ('route', 'stats'))] == 1
+
+    finally:
+        METRICS.enabled = False
+        METRICS.reset()
+
+
+def test_hit_counts_are_exported_with_metrics_off():
+    cache = ResponseCache()
+    for _ in range(3):
+        cache.get('stats', 1, Builder())
+
+    lines = METRICS.to_prometheus(extra_counters=cache.get_counters()).splitlines()
+    assert 'response_cache_total{result="hit",route="stats"} 2' in lines
+    assert 'response_cache_total{result="miss",route="stats"} 1' in lines
+
+
+def test_engine_state_version():
+    engine = fixtures.make_engine(pair_count=5, holding=2)
+    engine.exchange.candles = fixtures.make_candlesticks(pair_count=5, candle_count=100)
+    version = engine.get_state_version
+
+    config, stats, everything = version('config'), version('stats'), version()
+    engine.load_strategies()
+    assert version('config') != config and version('stats') == stats and version() != everything
+
+    config, stats = version('config'), version('stats')
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.do_technical_analysis()
+    assert version('stats') != stats and version('config') == config
+
+    # only flushes that change a pair count, and they leave config / stats responses cached
+    exchange, config, stats = version('exchange'), version('config'), version('stats')
+    engine.exchange.flush_tickers()
+    assert version('exchange') == exchange
+    engine.exchange.ticker_ingest.push('SYM1/ETH', 1, 2, 1.5, 100, 3)
+    engine.exchange.flush_tickers()
+    assert version('exchange') != exchange
+    assert (version('config'), version('stats')) == (config, stats)
+
+    holding = version('exchange', 'trades')
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.exchange.place_order('SYM1/ETH', 'limit', 'buy', 10, 0.001)
+    assert version('exchange', 'trades') != holding
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
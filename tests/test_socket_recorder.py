@@ -0,0 +1,94 @@
+import sys
+sys.path.append('..')
+
+import pytest
+
+from exchanges.BinanceExchange import BinanceExchange
+from exchanges.SocketRecorder import MAGIC, SocketRecorder, SocketReplayer, read_records
+from utils.CandleTools import candles_to_df
+
+START = 1535455200000
+
+
+def get_exchange_instance():
+    instance = BinanceExchange('binance', 'ETH', 10, {'public': '', 'secret': ''}, ['5m'])
+    instance.pairs = {'ADA/ETH': {'symbol': 'ADA/ETH', 'total': 0}}
+    instance.candles = {'ADA/ETH': {'5m': candles_to_df([[START, 1, 1, 1, 1, 10]])}}
+    return instance
+
+
+def ticker(close):
+    return {'bid': close * 0.99, 'ask': close * 1.01, 'close': close, 'quoteVolume': 100, 'percentage': 1.5,
+            'info': {'c': str(close)}}
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / 'sockets.bin'
+    with SocketRecorder(path) as recorder:
+        recorder.record('ticker', 'ADA/ETH', ticker(1.0), timestamp=100.0)
+        recorder.record('ticker', 'ADA/ETH', ticker(1.1), timestamp=100.1)
+        recorder.record('ob', 'ADA/ETH', {'asks': [[1.2, 5]], 'bids': [[1.0, 5]]}, timestamp=100.2)
+        recorder.record('ohlcv', 'ADA/ETH', [START + 300000, 1, 2, 0.5, 1.5, 20], '5m', timestamp=100.3)
+        recorder.record('ticker', 'ADA/ETH', ticker(1.2), timestamp=100.6)
+    return path
+
+
+def test_records_round_trip(recording):
+    records = list(read_records(recording))
+
+    assert [event for _, event, _, _, _ in records] == ['ticker', 'ticker', 'ob', 'ohlcv', 'ticker']
+    assert records[0][0] == 100.0 and records[0][3]['close'] == 1.0
+    assert records[3][4] == '5m'
+
+
+def test_truncated_log_and_appending(recording):
+    with open(recording, 'rb') as f:
+        data = f.read()
+    assert data.startswith(MAGIC) and data.count(MAGIC) == 1
+
+    # a crash mid write loses only the last record
+    with open(recording, 'wb') as f:
+        f.write(data[:-3])
+    assert len(list(read_records(recording))) == 4
+
+    with SocketRecorder(recording) as recorder:
+        recorder.record('ticker', 'ADA/ETH', ticker(2.0), timestamp=101.0)
+
+    with open(recording, 'rb') as f:
+        assert f.read().count(MAGIC) == 1
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'{}')
+    with pytest.raises(ValueError):
+        list(read_records(path))
+
+
+def test_replay_drives_socket_handlers(recording):
+    exchange = get_exchange_instance()
+    flushes = []
+    replayer = SocketReplayer(exchange, recording, speed=0,
+                              on_flush=lambda ex, timestamp: flushes.append((timestamp, ex.pairs['ADA/ETH']['close'])))
+
+    stats = replayer.replay()
+
+    assert stats['messages'] == 5 and stats['recorded'] == pytest.approx(0.6)
+    assert stats['per_event'] == {'ticker': 3, 'ob': 1, 'ohlcv': 1}
+    # tickers are flushed every 0.25 recorded seconds, the burst before the first flush coalesces
+    assert flushes == [(100.25, 1.1), (100.5, 1.1), (100.6, 1.2)]
+
+    pair = exchange.pairs['ADA/ETH']
+    assert pair['asks'] == [[1.2, 5]] and pair['bid'] == pytest.approx(1.2 * 0.99)
+    assert len(exchange.candles['ADA/ETH']['5m']) == 2
+
+
+def test_replay_speed(recording):
+    stats = SocketReplayer(get_exchange_instance(), recording, speed=4).replay()
+    assert stats['elapsed'] >= 0.6 / 4
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,152 @@
+import sys
+sys.path.append('..')
+
+import json
+import threading
+import time
+
+import pytest
+
+from benchmarks import fixtures
+from gui.state_channel import EngineMirror, StatePublisher
+from utils.Metrics import METRICS
+
+
+@pytest.fixture
+def channel():
+    engine = fixtures.make_engine(pair_count=10, holding=3)
+    engine.global_buy_checks()
+    publisher = StatePublisher(engine, min_interval=0)
+    publisher.start()
+
+    mirror = EngineMirror(publisher.address, publisher.authkey, max_age=0)
+    yield engine, publisher, mirror
+    publisher.close()
+    METRICS.enabled = False
+    METRICS.reset()
+
+
+def test_mirror_reports_like_the_engine(channel):
+    engine, _, mirror = channel
+    mirror.refresh()
+
+    assert mirror.get_tcv() == pytest.approx(engine.get_tcv())
+    assert mirror.get_pending_value() == pytest.approx(engine.get_pending_value())
+    assert mirror.get_total_profit() == pytest.approx(engine.get_total_profit())
+    assert mirror.pairs_to_df(friendly=True).equals(engine.pairs_to_df(friendly=True))
+    assert mirror.get_trailing_json() == engine.get_trailing_json()
+    assert mirror.get_trailing_pairs() == json.loads(engine.get_trailing_json())
+    assert mirror.check_24h_market_change == engine.check_24h_market_change
+    assert mirror.get_state_version() == engine.get_state_version()
+    assert json.loads(mirror.config.get_config())['general'] == engine.config.general_settings
+
+    # order books stay in the engine process
+    assert 'asks' not in next(iter(mirror.exchange.pairs.values()))
+
+
+def test_trade_history_is_sent_as_a_delta(channel):
+    engine, _, mirror = channel
+    mirror.refresh()
+    history = mirror.trade_history
+    assert history == engine.trade_history
+
+    engine.trade_history.append({**engine.trade_history[-1], 'id': 'new'})
+    mirror.refresh()
+    assert mirror.trade_history is history and history[-1]['id'] == 'new'
+
+    # a reloaded history starts over
+    engine.trade_history = engine.trade_history[:2]
+    mirror.refresh()
+    assert mirror.trade_history is not history and len(mirror.trade_history) == 2
+
+    # even when the new list has the old one's id, as a collected list's id can be reused
+    reloaded = engine.trade_history
+    reloaded[:] = reloaded[:1]
+    engine.trade_history = reloaded
+    mirror.refresh()
+    assert mirror.trade_history == reloaded
+
+
+def test_config_updates_run_in_the_engine(channel):
+    engine, _, mirror = channel
+    updates = []
+    engine.config.update_config = lambda section, data: updates.append((section, data))
+
+    mirror.config.update_config('general', {'trading_enabled': False})
+    assert updates == [('general', {'trading_enabled': False})]
+
+    def fail(section, data):
+        raise KeyError(section)
+
+    engine.config.update_config = fail
+    with pytest.raises(RuntimeError):
+        mirror.config.update_config('unknown', {})
+
+
+def test_engine_metrics_are_mirrored(channel):
+    engine, _, mirror = channel
+    METRICS.enabled = True
+    METRICS.observe('technical_analysis_seconds', 0.2)
+    engine.exchange.latency.observe('depth', 0.05)
+    engine.config.general_settings['metrics_enabled'] = True
+
+    mirror.refresh()
+    assert mirror.exchange.latency.histograms['depth'].count == 1
+    assert 'technical_analysis_seconds_count 1' in METRICS.to_prometheus().splitlines()
+
+
+def test_unreachable_engine_keeps_the_last_state(channel):
+    _, publisher, mirror = channel
+    mirror.refresh()
+    pairs = mirror.exchange.pairs
+
+    publisher.close()
+    mirror._connection.close()
+    mirror._connection = None
+    mirror.refresh()
+    assert mirror.exchange.pairs is pairs
+
+
+def test_failed_state_build_keeps_the_last_state(channel):
+    engine, _, mirror = channel
+    mirror.refresh()
+    pairs = mirror.exchange.pairs
+
+    engine.get_trailing_json = lambda: 1 / 0
+    mirror.refresh()
+    assert mirror.exchange.pairs is pairs
+
+
+def test_missing_quote_candles(channel):
+    engine, _, mirror = channel
+    del engine.exchange.quote_candles
+
+    mirror.refresh()
+    assert mirror.exchange.quote_candles is None
+    assert mirror.exchange.pairs.keys() == engine.exchange.pairs.keys()
+
+
+def test_profile_runs_in_the_engine_process(channel):
+    engine, _, mirror = channel
+    requests = []
+    engine.profile = lambda *args: requests.append(args) or time.sleep(0.3) or 'trader;main 1\n'
+
+    result = []
+    profiler = threading.Thread(target=lambda: result.append(mirror.profile(0.3, 0.01, ['trader'])))
+    profiler.start()
+    time.sleep(0.05)
+
+    # the profile has a connection of its own, state refreshes aren't held up by it
+    start = time.time()
+    mirror.refresh()
+    assert time.time() - start < 0.2
+    profiler.join()
+
+    assert requests == [(0.3, 0.01, ('trader',))] and result == ['trader;main 1\n']
+    with pytest.raises(ValueError):
+        mirror.profile(0.3, 1)
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,164 @@
+import sys
+sys.path.append('..')
+
+import threading
+
+import numpy as np
+import pytest
+
+from analyzers.StatisticsStore import StatisticsStore, INITIAL_PAIRS
+from analyzers.TechnicalAnalysis import run_ta
+from benchmarks import fixtures
+from conditions.BuyCondition import BuyCondition
+from conditions.CompiledCondition import CompiledCondition
+from conditions.condition_tools import evaluate_condition
+from config.config import Config, get_statistics_window
+
+RSI_5M = {'value': 'RSI', 'candle_period': 14, 'timeframe': '5m'}
+get_operand = fixtures.get_operand
+
+
+def test_pair_view_matches_tail():
+    store = StatisticsStore(window=3)
+    rsi = np.arange(50.0)
+    store.update('ADA/ETH', {'RSI_14_5m': rsi, 'MFI_30_5m': np.array([7.0])})
+
+    stats = store['ADA/ETH']
+    assert list(stats) == ['RSI_14_5m', 'MFI_30_5m']
+    assert stats['RSI_14_5m'].tolist() == rsi[-3:].tolist()
+    # short histories are padded in front, the newest value stays last
+    assert stats['MFI_30_5m'][-1] == 7.0 and np.isnan(stats['MFI_30_5m'][0])
+
+    rsi_id = store.get_indicator_id('RSI_14_5m')
+    assert store.get_last(store.pair_ids['ADA/ETH'], rsi_id, lookback=2) == 47.0
+
+
+def test_indicators_are_per_pair():
+    store = StatisticsStore()
+    store.update('ADA/ETH', {'RSI_14_5m': np.ones(5)})
+    store.update('XRP/ETH', {'MFI_30_5m': np.ones(5)})
+
+    assert 'MFI_30_5m' not in store['ADA/ETH']
+    assert dict(store['XRP/ETH']).keys() == {'MFI_30_5m'}
+
+    # an update replaces everything stored for the pair
+    store.update('ADA/ETH', {'MFI_30_5m': np.zeros(5)})
+    assert 'RSI_14_5m' not in store['ADA/ETH']
+
+
+def test_growth_and_window_change():
+    store = StatisticsStore(window=2)
+    for i in range(INITIAL_PAIRS + 1):
+        store.update(f'SYM{i}/ETH', {f'IND{j}': np.arange(10.0) + i for j in range(20)})
+
+    assert store['SYM0/ETH']['IND19'].tolist() == [8.0, 9.0]
+    assert store[f'SYM{INITIAL_PAIRS}/ETH']['IND0'][-1] == 9.0 + INITIAL_PAIRS
+
+    store.set_window(4)
+    assert store['SYM0/ETH']['IND0'][-2:].tolist() == [8.0, 9.0]
+    assert store.to_records()[1] == {'symbol': 'SYM1/ETH', **{f'IND{j}': 10.0 for j in range(20)}}
+
+
+def test_conditions_on_store():
+    store = StatisticsStore(window=4)
+    rsi = np.array([50.0, 40.0, 25.0, 20.0, 35.0])
+    store.update('ADA/ETH', {'RSI_14_5m': rsi})
+    pair = {'symbol': 'ADA/ETH', 'close': 1.0}
+
+    cross = {'left': RSI_5M, 'op': 'cross_up', 'right': {'value': 30}, 'cross_candles': 1}
+    change = {'left': {**RSI_5M, 'change_over': 3}, 'op': '<', 'right': {'value': 0}}
+
+    for condition in (cross, change):
+        assert evaluate_condition(condition, pair, store['ADA/ETH']) == \
+            evaluate_condition(condition, pair, {'RSI_14_5m': rsi})
+
+
+def test_records_never_show_a_pair_mid_update():
+    store = StatisticsStore()
+    statistics = {f'IND{j}': np.arange(5.0) for j in range(16)}
+    store.update('ADA/ETH', statistics)
+    done = threading.Event()
+
+    def update():
+        while not done.is_set():
+            store.update('ADA/ETH', statistics)
+
+    updater = threading.Thread(target=update)
+    updater.start()
+    try:
+        for _ in range(2000):
+            assert len(store.to_records()[0]) == len(statistics) + 1
+    finally:
+        done.set()
+        updater.join()
+
+
+def test_compiled_conditions_match_evaluate_condition():
+    config = fixtures.get_config()
+    store = StatisticsStore(config.statistics_window)
+    for symbol, candles in fixtures.make_candlesticks(pair_count=4, candle_count=120).items():
+        store.update(symbol, run_ta(candles, list(config.indicators.values())))
+    store.update('ADA/ETH', {'RSI_14_5m': np.array([50.0, 40.0, 25.0, 20.0, 35.0])})
+
+    conditions = {
+        **fixtures.CONDITIONS,
+        'cross_true': {'left': RSI_5M, 'op': 'cross_up', 'right': {'value': 30}, 'cross_candles': 1},
+        'change_over': {'left': {**RSI_5M, 'change_over': 3}, 'op': '<', 'right': {'value': 0}},
+        'past_window': {'left': {**RSI_5M, 'change_over': 10}, 'op': '<', 'right': {'value': 0}},
+        'missing': {'left': get_operand('MFI', 30), 'op': '<', 'right': {'value': 'price'}},
+        'inverse_pattern': {'left': {'value': 'CDLDOJI', 'timeframe': '5m'}, 'op': '>', 'right': {'value': 0},
+                            'inverse': True},
+    }
+    for name, condition in conditions.items():
+        compiled = CompiledCondition(condition, store)
+        for symbol, pair_id in store.pair_ids.items():
+            pair = {'symbol': symbol, 'close': 40.0, 'quoteVolume': 50.0, 'current_value': 1.05, 'total_cost': 1.0}
+            try:
+                expected = evaluate_condition(condition, pair, store[symbol])
+            except TypeError:
+                # a cross on a missing statistic fails by name, compiled it's just not met
+                expected = False
+            assert compiled.evaluate(pair, pair_id) == expected, name
+
+    assert CompiledCondition(conditions['cross_true'], store).evaluate({}, store.pair_ids['ADA/ETH'])
+
+
+def test_strategies_read_the_store_they_were_compiled_against():
+    store = StatisticsStore(window=4)
+    strategy = BuyCondition({'conditions': [{'left': RSI_5M, 'op': '<', 'right': {'value': 30}}],
+                             'trailing %': 0.1, 'buy_value': 1})
+    strategy.compile(store)
+    store.update('ADA/ETH', {'RSI_14_5m': np.array([35.0, 20.0])})
+    pair = {'symbol': 'ADA/ETH', 'close': 1.0}
+
+    assert strategy.check_conditions(pair, store['ADA/ETH'])
+    # another store's views and plain dicts are evaluated by name
+    other = StatisticsStore()
+    other.update('ADA/ETH', {'RSI_14_5m': np.array([50.0])})
+    assert not strategy.check_conditions(pair, other['ADA/ETH'])
+    assert not strategy.check_conditions(pair, {'RSI_14_5m': [50.0]})
+
+
+def test_engine_compiles_strategies_against_its_store():
+    engine = fixtures.make_engine(pair_count=2, holding=0)
+    for strategies in (engine.buy_strategies, engine.sell_strategies, engine.dca_buy_strategies):
+        for strategy in strategies:
+            assert strategy._compiled[0] is engine.statistics
+
+    assert {'RSI_14_5m', 'EMA_20_15m', 'CDLDOJI_5m'} <= engine.statistics.indicator_ids.keys()
+
+
+def test_statistics_window_from_strategies():
+    assert get_statistics_window({'left': RSI_5M, 'op': '<', 'right': {'value': 30}}) == 2
+    assert get_statistics_window({'left': RSI_5M, 'op': 'cross_up', 'right': RSI_5M, 'cross_candles': 3}) == 4
+    assert get_statistics_window({'left': {**RSI_5M, 'change_over': '5'}, 'op': '<', 'right': {'value': 0}}) == 6
+
+    config = Config()
+    config.parse_indicators_from_strategy([{'conditions': [{'left': RSI_5M, 'op': 'cross_up', 'right': RSI_5M,
+                                                            'cross_candles': 6}]}])
+    assert config.statistics_window == 7
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,71 @@
+import sys
+sys.path.append('..')
+
+import pytest
+
+from exchanges.TickerIngest import TickerIngest
+
+
+def get_pairs():
+    return {'ADA/ETH': {'symbol': 'ADA/ETH', 'percentage': 0}}
+
+
+# ----
+def test_burst_is_coalesced():
+    ingest = TickerIngest()
+    pairs = get_pairs()
+
+    for close in (1, 1.1, 1.2):
+        ingest.push('ADA/ETH', close - 0.01, close + 0.01, close, 1000, 2.5)
+
+    assert ingest.coalesced == 2
+    assert ingest.flush(pairs) == 1
+    assert pairs['ADA/ETH']['close'] == 1.2
+    assert pairs['ADA/ETH']['bid'] == pytest.approx(1.19)
+    assert ingest.pending_count() == 0
+
+
+def test_only_engine_fields_are_stored():
+    ingest = TickerIngest()
+    pairs = get_pairs()
+
+    ingest.push_ticker('ADA/ETH', {'symbol': 'ADA/ETH', 'bid': '1', 'ask': '2', 'close': '1.5',
+                                   'quoteVolume': '10', 'percentage': '-1', 'info': {'c': '1.5'}, 'vwap': 1})
+    ingest.flush(pairs)
+
+    assert pairs['ADA/ETH'] == {'symbol': 'ADA/ETH', 'bid': 1.0, 'ask': 2.0, 'close': 1.5,
+                                'quoteVolume': 10.0, 'percentage': -1.0}
+
+
+def test_unchanged_fields_are_not_written():
+    ingest = TickerIngest()
+    pairs = get_pairs()
+
+    ingest.push('ADA/ETH', 1, 2, 1.5, 10, 0)
+    ingest.flush(pairs)
+    writes = ingest.field_writes
+
+    ingest.push('ADA/ETH', 1, 2, 1.6, 10, 0)
+    assert ingest.flush(pairs) == 1
+    assert ingest.field_writes == writes + 1
+
+    ingest.push('ADA/ETH', 1, 2, 1.6, 10, 0)
+    assert ingest.flush(pairs) == 0
+
+
+def test_missing_values_and_unknown_pairs_are_skipped():
+    ingest = TickerIngest()
+    pairs = get_pairs()
+
+    ingest.push('ADA/ETH', None, 'bad', 1.5, None, None)
+    ingest.push('XRP/ETH', 1, 1, 1, 1, 1)
+    ingest.flush(pairs)
+
+    assert 'bid' not in pairs['ADA/ETH'] and 'ask' not in pairs['ADA/ETH']
+    assert pairs['ADA/ETH']['close'] == 1.5
+    assert 'XRP/ETH' not in pairs
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
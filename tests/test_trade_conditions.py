@@ -0,0 +1,46 @@
+import sys
+sys.path.append('..')
+
+import itertools
+
+import pytest
+
+from config.GlobalTradeConditions import GlobalTradeConditions, in_range
+from utils.Utils import in_range as utils_in_range, is_blacklisted, is_whitelisted
+
+
+def test_parsed_values():
+    conditions = GlobalTradeConditions({'max_pairs': '5', 'min_change': '-2.5', 'max_change': '', 'dca_timeout': '2',
+                                        'min_buy_balance': '10%', 'dca_min_buy_balance': 0.5})
+
+    assert conditions.max_pairs == 5
+    assert (conditions.min_change, conditions.max_change) == (-2.5, 0.0)
+    assert conditions.dca_timeout == 120
+    assert conditions.min_buy_balance == (0.1, True)
+    assert conditions.dca_min_buy_balance == (0.5, False)
+    assert conditions.below_max_pairs(4) and not conditions.below_max_pairs(5)
+    # missing limits are disabled
+    assert conditions.max_spread == 0 and conditions.whitelist_all
+
+    with pytest.raises(ValueError):
+        GlobalTradeConditions({'max_change': 'ten'})
+
+
+@pytest.mark.parametrize('whitelist', [[], ['ALL'], ['all'], ['XRP/ETH'], ['ADA/ETH', 'XRP/ETH']])
+def test_lists_match_utils(whitelist):
+    blacklist = ['ADA/ETH']
+    conditions = GlobalTradeConditions({'blacklist': blacklist, 'whitelist': whitelist})
+
+    for pair in ('ADA/ETH', 'XRP/ETH', 'TRX/ETH'):
+        expected = not is_blacklisted(pair, blacklist) and is_whitelisted(pair, whitelist)
+        assert conditions.is_tradeable(pair) == expected
+
+
+def test_range_matches_utils():
+    for value, low, high in itertools.product([-5, 0, 5], [-3, 0, 3], [-3, 0, 3]):
+        assert in_range(value, low, high) == utils_in_range(value, str(low), str(high))
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
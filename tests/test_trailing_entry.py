@@ -0,0 +1,135 @@
+import sys
+sys.path.append('..')
+
+import json
+
+import pytest
+
+from backtesting.Backtester import make_config
+from conditions.BuyCondition import BuyCondition
+from conditions.Condition import TrailingEntry
+from conditions.SellCondition import SellCondition
+from liquitrader import LiquiTrader, ShutdownHandler
+
+RSI_5M = {'value': 'RSI', 'candle_period': 14, 'timeframe': '5m'}
+BUY = {'conditions': [{'left': RSI_5M, 'op': '<', 'right': {'value': 30}},
+                      {'left': RSI_5M, 'op': '<', 'right': {'value': 40}}],
+       'trailing %': 1, 'buy_value': 0.1}
+
+
+def get_pair(close):
+    return {'symbol': 'ADA/ETH', 'close': close, 'bid': close, 'ask': close,
+            'limits': {'amount': {'min': 1}}, 'info': {'filters': list(range(50))}}
+
+
+def test_entry_only_keeps_trailing_state():
+    strategy = BuyCondition(BUY)
+    statistics = {'RSI_14_5m': [30.0, 25.0], 'MFI_14_5m': [50.0]}
+
+    assert strategy.evaluate(get_pair(1.0), statistics, 1) is None
+    entry = strategy.pairs_trailing['ADA/ETH']
+
+    assert isinstance(entry, TrailingEntry) and not hasattr(entry, '__dict__')
+    assert (entry.trail_from, entry.trail_to) == (1.0, 1.01)
+    # only the strategy's own indicators, once each
+    assert entry.stats == [['RSI_14_5m', 25.0]]
+
+    # the same entry is updated while the pair keeps trailing
+    assert strategy.evaluate(get_pair(0.9), statistics, 1) is None
+    assert strategy.pairs_trailing['ADA/ETH'] is entry
+    assert entry.trail_from == 0.9
+
+
+def test_trailing_view():
+    strategy = SellCondition({'conditions': [], 'trailing %': 1, 'sell_value': 1})
+    pair = {**get_pair(2.0), 'total': 1, 'total_cost': 1, 'avg_price': 1}
+    strategy.evaluate(pair, {})
+
+    pair['close'] = 2.1
+    view = strategy.get_trailing_view({'ADA/ETH': pair})
+
+    assert view['pairs_trailing']['ADA/ETH'] == {'symbol': 'ADA/ETH', 'trail_from': 2.0, 'trail_to': 1.98,
+                                                 'close': 2.1, 'stats': []}
+    assert view['sell_value'] == 1
+    json.dumps(view)
+
+
+def test_trailing_json_matches_view():
+    strategy = BuyCondition(BUY)
+    strategy.evaluate(get_pair(1.0), {'RSI_14_5m': [25.0]}, 10)
+    entry = strategy.pairs_trailing['ADA/ETH']
+
+    pairs = {'ADA/ETH': get_pair(1.1)}
+    expected = json.loads(json.dumps(strategy.get_trailing_view(pairs)))
+    assert json.loads(strategy.get_trailing_json(pairs)) == expected
+
+    # an unchanged trail reuses the encoded entry, the close is always the pair's latest
+    encoded = entry.get_encoded()
+    strategy.evaluate(get_pair(1.0), {'RSI_14_5m': [25.0]}, 10)
+    assert entry.get_encoded() is encoded
+    pairs['ADA/ETH']['close'] = 1.2
+    assert json.loads(strategy.get_trailing_json(pairs))['pairs_trailing']['ADA/ETH']['close'] == 1.2
+
+    # a moved trail is encoded again
+    strategy.evaluate(get_pair(0.9), {'RSI_14_5m': [25.0]}, 10)
+    assert json.loads(strategy.get_trailing_json(pairs))['pairs_trailing']['ADA/ETH']['trail_from'] == 0.9
+
+    strategy.pairs_trailing.pop('ADA/ETH')
+    assert json.loads(strategy.get_trailing_json(pairs))['pairs_trailing'] == {}
+
+
+def test_trailing_survives_reload():
+    other = {**BUY, 'buy_value': 0.2}
+    trader = LiquiTrader(ShutdownHandler())
+    trader.config = make_config([BUY, other], [])
+    trader.load_strategies()
+
+    statistics = {'RSI_14_5m': [25.0]}
+    for strategy in trader.buy_strategies:
+        strategy.evaluate(get_pair(1.0), statistics, 1)
+    first, second = trader.buy_strategies
+
+    # unchanged strategies keep their trailing pairs, a changed one takes over its predecessor's
+    trader.config = make_config([BUY, {**other, 'trailing %': 2}, BUY], [])
+    trader.load_strategies()
+    kept, changed, added = trader.buy_strategies
+
+    assert kept is not first and kept.pairs_trailing is first.pairs_trailing
+    assert changed is not second and changed.pairs_trailing['ADA/ETH'].trail_from == 1.0
+    assert changed.pairs_trailing['ADA/ETH'] is not second.pairs_trailing['ADA/ETH']
+    assert added.pairs_trailing == {}
+
+    # the migrated entry follows the new trailing %
+    changed.evaluate(get_pair(1.0), statistics, 1)
+    assert changed.pairs_trailing['ADA/ETH'].trail_to == 1.02
+
+
+def test_trailing_follows_the_matching_strategy_when_one_is_inserted_before_it():
+    other = {'conditions': [{'left': RSI_5M, 'op': '<', 'right': {'value': 35}}], 'trailing %': 1, 'buy_value': 0.1}
+    inserted = {'conditions': [{'left': RSI_5M, 'op': '<', 'right': {'value': 50}}], 'trailing %': 1,
+                'buy_value': 0.1}
+    trader = LiquiTrader(ShutdownHandler())
+    trader.config = make_config([BUY, other], [])
+    trader.load_strategies()
+
+    for strategy, close in zip(trader.buy_strategies, (1.0, 2.0)):
+        strategy.evaluate(get_pair(close), {'RSI_14_5m': [25.0]}, 1)
+
+    # a new strategy in front, BUY's trailing % and other's buy value changed in the same edit
+    trader.config = make_config([inserted, {**BUY, 'trailing %': 2}, {**other, 'buy_value': 0.3}], [])
+    trader.load_strategies()
+    new, changed_trailing, changed_value = trader.buy_strategies
+
+    assert new.pairs_trailing == {}
+    assert changed_trailing.pairs_trailing['ADA/ETH'].trail_from == 1.0
+    assert changed_value.pairs_trailing['ADA/ETH'].trail_from == 2.0
+
+    # a strategy nothing matches any more takes its trailing pairs with it
+    trader.config = make_config([inserted], [])
+    trader.load_strategies()
+    assert trader.buy_strategies[0].pairs_trailing == {}
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
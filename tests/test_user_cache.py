@@ -0,0 +1,63 @@
+import sys
+sys.path.append('..')
+
+import pytest
+
+from gui.UserCache import UserCache
+
+
+class UserTable:
+    def __init__(self):
+        self.roles = {1: 'admin'}
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return self.roles
+
+
+def test_roles_are_loaded_once():
+    table = UserTable()
+    cache = UserCache(table.load)
+
+    for _ in range(5):
+        assert cache.get_role(1) == 'admin'
+        assert cache.get_role('1') == 'admin'
+        assert cache.users_exist()
+
+    assert table.loads == 1
+    assert cache.get_role(2) is None and not cache.user_exists(2)
+    assert cache.get_role(None) is None
+
+
+def test_invalidate_reloads():
+    table = UserTable()
+    cache = UserCache(table.load)
+    assert not cache.user_exists(2)
+
+    table.roles = {1: 'guest', 2: 'admin'}
+    # still the cached table until it's invalidated
+    assert cache.get_role(1) == 'admin'
+
+    cache.invalidate()
+    assert cache.get_role(1) == 'guest' and cache.user_exists(2)
+    assert table.loads == 2
+
+
+def test_load_racing_an_invalidation_isnt_kept():
+    table = UserTable()
+    cache = UserCache(lambda: (cache.invalidate(), table.load())[1])
+
+    assert cache.get_role(1) == 'admin'
+    cache.get_role(1)
+    assert table.loads == 2
+
+
+def test_no_users():
+    cache = UserCache(dict)
+    assert not cache.users_exist()
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,178 @@
+import sys
+sys.path.append('..')
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from exchanges.BinanceExchange import BinanceExchange
+
+
+def get_exchange_instance():
+    instance = BinanceExchange('binance', 'ETH', 10, {'public': '', 'secret': ''}, ['5m'])
+
+    instance.pairs = {
+        'ADA/ETH': {'symbol': 'ADA/ETH', 'base': 'ADA', 'total': 0, 'amount': 0, 'total_cost': 0,
+                    'avg_price': None, 'last_order_time': 0}
+    }
+    instance._client.markets_by_id = {'ADAETH': {'symbol': 'ADA/ETH'}}
+    instance.user_socket = 'conn'
+
+    return instance
+
+
+def execution_report(side, qty, price, fee=0.0, fee_asset='ETH', exec_type='TRADE', order_id=1, filled_to=None):
+    return {'e': 'executionReport', 's': 'ADAETH', 'S': side, 'x': exec_type, 'i': order_id,
+            'z': str(qty if filled_to is None else filled_to),
+            'l': str(qty), 'L': str(price), 'n': str(fee), 'N': fee_asset}
+
+
+class OrderClient:
+    """
+    REST client filling orders at the requested price, fee in the quote currency
+    """
+
+    def __init__(self):
+        self.order_id = 0
+        self.markets_by_id = {'ADAETH': {'symbol': 'ADA/ETH'}}
+
+    def amount_to_precision(self, symbol, amount):
+        return amount
+
+    def price_to_precision(self, symbol, price):
+        return price
+
+    def create_order(self, symbol, order_type, side, amount, price):
+        self.order_id += 1
+        return {'id': str(self.order_id), 'symbol': symbol, 'side': side, 'amount': amount, 'filled': amount,
+                'cost': amount * price, 'fee': {'currency': 'ETH', 'cost': 0}}
+
+
+class Loop:
+    """
+    records what's scheduled on the exchange loop instead of running it
+    """
+
+    def __init__(self):
+        self.later = []
+
+    def call_later(self, delay, callback):
+        self.later.append((delay, callback))
+
+
+# ----
+def test_buy_fill_updates_position():
+    ex = get_exchange_instance()
+
+    ex.process_user_message(execution_report('BUY', 100, 0.01))
+    pair = ex.pairs['ADA/ETH']
+    assert pair['total'] == 100
+    assert pair['total_cost'] == pytest.approx(1)
+    assert pair['avg_price'] == pytest.approx(0.01)
+    assert ex.balance == pytest.approx(9)
+    assert pair['last_order_time'] > 0
+
+
+def test_base_fee_reduces_amount():
+    ex = get_exchange_instance()
+
+    ex.process_user_message(execution_report('BUY', 100, 0.01, fee=1, fee_asset='ADA'))
+    assert ex.pairs['ADA/ETH']['total'] == 99
+
+
+def test_non_trade_execution_ignored():
+    ex = get_exchange_instance()
+
+    ex.process_user_message(execution_report('BUY', 100, 0.01, exec_type='NEW'))
+    assert ex.pairs['ADA/ETH']['total'] == 0
+    assert ex.balance == 10
+
+
+def test_account_update_overwrites_balances():
+    ex = get_exchange_instance()
+
+    ex.process_user_message({'e': 'outboundAccountInfo',
+                             'B': [{'a': 'ETH', 'f': '4.5', 'l': '0.5'},
+                                   {'a': 'ADA', 'f': '20', 'l': '0'},
+                                   {'a': 'XYZ', 'f': '1', 'l': '0'}]})
+    assert ex.balance == 5
+    assert ex.pairs['ADA/ETH']['total'] == 20
+
+
+def test_account_update_keeps_the_average_price():
+    ex = get_exchange_instance()
+    ex.process_user_message(execution_report('BUY', 100, 0.01))
+
+    ex.process_user_message({'e': 'outboundAccountPosition', 'B': [{'a': 'ADA', 'f': '50', 'l': '0'}]})
+    pair = ex.pairs['ADA/ETH']
+    assert pair['total'] == 50
+    assert pair['avg_price'] == pytest.approx(0.01)
+    assert pair['total_cost'] == pytest.approx(0.5)
+
+    ex.process_user_message({'e': 'outboundAccountPosition', 'B': [{'a': 'ADA', 'f': '0', 'l': '0'}]})
+    assert (pair['total'], pair['total_cost'], pair['avg_price']) == (0, 0, None)
+
+
+def test_rest_fill_is_applied_once():
+    ex = get_exchange_instance()
+    ex._client = OrderClient()
+
+    order = ex.place_order('ADA/ETH', 'limit', 'buy', 100, 0.01)
+    # the position is there before the stream reports the fill, the next cycle won't buy again
+    assert ex.pairs['ADA/ETH']['total'] == 100
+
+    ex.process_user_message(execution_report('BUY', 100, 0.01, order_id=int(order['id'])))
+    assert ex.pairs['ADA/ETH']['total'] == 100
+    assert ex.balance == pytest.approx(9)
+
+
+def test_streamed_fill_before_the_rest_response():
+    ex = get_exchange_instance()
+    ex._client = OrderClient()
+
+    # the first 40 are reported before create_order returns, the REST response only adds the rest
+    ex.process_user_message(execution_report('BUY', 40, 0.01, order_id=1))
+    ex.place_order('ADA/ETH', 'limit', 'buy', 100, 0.01)
+    assert ex.pairs['ADA/ETH']['total'] == pytest.approx(100)
+    assert ex.balance == pytest.approx(9)
+
+    ex.process_user_message(execution_report('BUY', 60, 0.01, order_id=1, filled_to=100))
+    assert ex.pairs['ADA/ETH']['total'] == pytest.approx(100)
+
+
+def test_messages_are_handled_on_the_exchange_loop():
+    ex = get_exchange_instance()
+    loop = asyncio.new_event_loop()
+    ex._loop = loop
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    try:
+        ex.handle_user_socket(execution_report('BUY', 100, 0.01))
+        end = time.time() + 1
+        while ex.pairs['ADA/ETH']['total'] == 0 and time.time() < end:
+            time.sleep(0.01)
+        assert ex.pairs['ADA/ETH']['total'] == 100
+
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(1)
+        loop.close()
+
+
+def test_stream_error_falls_back_to_polling_and_reconnects():
+    ex = get_exchange_instance()
+    ex._loop = Loop()
+    ex._balance_upkeep_call_schedule = ex._user_stream_reconcile_schedule
+
+    ex.process_user_message({'e': 'error', 'm': 'closed'})
+    assert ex.user_socket is None
+    assert ex._balance_upkeep_call_schedule == ex._polling_balance_upkeep_schedule
+    assert ex._loop.later == [(ex._user_stream_retry_schedule, ex.start_user_socket)]
+
+
+# ========
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -1,5 +1,8 @@
 from functools import partial
 
+import numpy as np
+import pandas as pd
+
 def eight_decimal_format(value):
     return "{0:.8f}".format(value)
 
@@ -28,19 +31,59 @@ COLUMN_FORMATS = {'last_order_time': str,
                   }
 
 
+# ----
+# vectorized versions of the formatters above, one call per column instead of one per cell
+def format_fixed(values, decimals=8):
+    """
+    same as "{0:.8f}".format on every value
+    """
+    return np.char.mod(f'%.{decimals}f', np.asarray(values, dtype=float))
+
+
+def format_datetimes(column):
+    """
+    same as str() on every value of a timezone aware datetime Series, ie '2018-08-28 07:00:00-04:00'
+    pandas formats tz aware values one by one, local wall time + a lookup of the few distinct utc offsets is much faster
+    """
+    local = column.dt.tz_localize(None)
+    offsets = (local - column.dt.tz_convert('UTC').dt.tz_localize(None)) // pd.Timedelta(minutes=1)
+    offset_strings = {minutes: '{}{:02d}:{:02d}'.format('-' if minutes < 0 else '+', *divmod(abs(minutes), 60))
+                      for minutes in offsets.unique()}
+    return local.astype(str) + offsets.map(offset_strings)
+
+
+def format_decimal_with_usd(values, quote_price=0):
+    """
+    same as decimal_with_usd on every value
+    """
+    values = np.asarray(values, dtype=float)
+    usd = np.round(quote_price * values, 2).astype(str)
+    return np.char.add(np.char.add(np.char.add(format_fixed(values), ' ($'), usd), ')')
+
+
+VECTOR_COLUMN_FORMATS = {'last_order_time': lambda column, _: format_datetimes(column),
+                         'avg_price': lambda column, _: format_fixed(column),
+                         'close': lambda column, _: format_fixed(column),
+                         'gain': lambda column, _: column.astype(float).round(2),
+                         'quoteVolume': lambda column, _: column.astype('int64'),
+                         'total_cost': lambda column, quote_price: format_decimal_with_usd(column, quote_price),
+                         'current_value': lambda column, quote_price: format_decimal_with_usd(column, quote_price),
+                         'total': lambda column, _: column.astype(float).round(2),
+                         'percentage': lambda column, _: format_fixed(column, 2)
+                         }
+
+
 def prettify_dataframe(df, quote_price=200):
-    usdformat = partial(decimal_with_usd, quote_price=quote_price)
-
-    for column_name, format_func in COLUMN_FORMATS.items():
-        if format_func is not None:
-            if column_name not in df:
-                print(f'{column_name} missing from dataframe')
-                continue  # Skip formatting
-
-            if str(format_func) != str(decimal_with_usd):
-                df[column_name] = list(map(format_func, df[column_name]))
-            else:
-                df[column_name] = list(map(usdformat, df[column_name]))
+    """
+    format COLUMN_FORMATS columns for display, see VECTOR_COLUMN_FORMATS
+    :raises ValueError, TypeError: when a column has values its format can't take (ie None prices)
+    """
+    for column_name, format_func in VECTOR_COLUMN_FORMATS.items():
+        if column_name not in df:
+            print(f'{column_name} missing from dataframe')
+            continue  # Skip formatting
+
+        df[column_name] = format_func(df[column_name], quote_price)
 
     return df
 
@@ -0,0 +1,89 @@
+"""
+JSON encode / decode with orjson when it's installed, falls back to the standard library json module
+
+Differences to be aware of when orjson is used:
+    - NaN / Infinity are written as null
+    - numpy arrays and scalars are serialized natively
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+FAST_JSON = orjson is not None
+
+if FAST_JSON:
+    _DUMPS_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # types neither encoder handles natively
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+# ----
+def loads(data):
+    """
+    :param data: str or bytes
+    """
+    if FAST_JSON:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+def dumps(obj):
+    """
+    :return: JSON encoded str
+    """
+    return dumpb(obj).decode('utf-8') if FAST_JSON else json.dumps(obj, default=_default)
+
+
+def dumpb(obj):
+    """
+    :return: JSON encoded bytes, skips the decode step when writing straight to a binary file / socket
+    """
+    if FAST_JSON:
+        return orjson.dumps(obj, default=_default, option=_DUMPS_OPTIONS)
+
+    return json.dumps(obj, default=_default).encode('utf-8')
+
+
+# ----
+def load_file(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(obj, path):
+    data = dumpb(obj)
+
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+# ----
+def install_fast_parser(client):
+    """
+    swap a ccxt client's response parser for the fast decoder
+    anything the fast decoder rejects is handed back to ccxt's own parse_json
+    """
+    if not FAST_JSON:
+        return client
+
+    parse_json = client.parse_json
+
+    def fast_parse_json(http_response):
+        try:
+            return orjson.loads(http_response)
+        except (ValueError, TypeError):
+            return parse_json(http_response)
+
+    client.parse_json = fast_parse_json
+    return client
@@ -0,0 +1,297 @@
+import bisect
+import functools
+import threading
+import time
+
+# upper bounds in seconds, same defaults prometheus client libraries use
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Fixed bucket histogram, bucket counts are not cumulative (last slot is +Inf)
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        rebuild a histogram from snapshot(), ie one sent from another process
+        """
+        bounds = list(snapshot['buckets'])
+        histogram = cls(float(bound) for bound in bounds[:-1])
+        histogram.counts = list(snapshot['buckets'].values())
+        histogram.count = snapshot['count']
+        histogram.sum = snapshot['sum']
+        return histogram
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            total = self.sum
+
+        return {
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], counts)),
+            'count': count,
+            'sum': total,
+            'avg': total / count if count else 0
+        }
+
+
+class LatencyTracker:
+    """
+    Keeps one histogram per name (ie REST endpoint)
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self.histograms = {}
+
+    def observe(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, Histogram(self._buckets))
+        histogram.observe(seconds)
+
+    def get_stats(self):
+        return {name: histogram.snapshot() for name, histogram in list(self.histograms.items())}
+
+
+# ----
+def format_labels(labels):
+    """
+    :param labels: ((name, value), ...)
+    :return: '{name="value",...}' or '' without labels
+    """
+    if not labels:
+        return ''
+
+    values = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, values)) + '}'
+
+
+def format_histogram(name, labels, histogram):
+    """
+    :return: prometheus text exposition lines of one histogram, buckets are cumulative there
+    """
+    snapshot = histogram.snapshot()
+    lines = []
+    cumulative = 0
+    for bound, count in snapshot['buckets'].items():
+        cumulative += count
+        lines.append(f'{name}_bucket{format_labels(labels + (("le", bound),))} {cumulative}')
+
+    lines.append(f'{name}_sum{format_labels(labels)} {snapshot["sum"]!r}')
+    lines.append(f'{name}_count{format_labels(labels)} {snapshot["count"]}')
+    return lines
+
+
+class _NullTimer:
+    """
+    returned by MetricsRegistry.time while disabled, entering / leaving it does nothing
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+# =============================
+class MetricsRegistry:
+    """
+    Process wide timers / counters of the engine's hot paths, exported in prometheus text format (see /api/metrics)
+
+    Disabled by default (general setting "metrics_enabled"), time() then returns a shared no-op timer and
+    increment() returns straight away, so instrumented code only pays an attribute check
+    """
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self._buckets = buckets
+        # {name: {labels: Histogram}}, labels are ((name, value), ...) sorted by name
+        self.histograms = {}
+        self.counters = {}
+        self.descriptions = {}
+        self._lock = threading.Lock()
+
+    # ----
+    def describe(self, name, description):
+        self.descriptions[name] = description
+
+    # ----
+    def get_histogram(self, name, **labels):
+        key = tuple(sorted(labels.items()))
+        histograms = self.histograms.get(name)
+        histogram = histograms.get(key) if histograms is not None else None
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, {}).setdefault(key, Histogram(self._buckets))
+        return histogram
+
+    # ----
+    def time(self, name, **labels):
+        """
+        with METRICS.time('technical_analysis_seconds'): ...
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self.get_histogram(name, **labels))
+
+    def timed(self, name, **labels):
+        """
+        decorator version of time(), enabled is checked on every call so it can be toggled at runtime
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+
+                with Timer(self.get_histogram(name, **labels)):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def observe(self, name, seconds, **labels):
+        if self.enabled:
+            self.get_histogram(name, **labels).observe(seconds)
+
+    # ----
+    def increment(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counters = self.counters.setdefault(name, {})
+            counters[key] = counters.get(key, 0) + value
+
+    # ----
+    def snapshot(self):
+        """
+        :return: every series as plain data, see merge_snapshot
+        """
+        with self._lock:
+            histograms = {name: dict(series) for name, series in self.histograms.items()}
+            counters = {name: dict(series) for name, series in self.counters.items()}
+
+        return {
+            'histograms': {name: {labels: histogram.snapshot() for labels, histogram in series.items()}
+                           for name, series in histograms.items()},
+            'counters': counters,
+        }
+
+    def merge_snapshot(self, snapshot):
+        """
+        replace the series in another registry's snapshot (ie the engine's, see gui.state_channel), others are kept
+        """
+        histograms = {name: {labels: Histogram.from_snapshot(histogram) for labels, histogram in series.items()}
+                      for name, series in snapshot['histograms'].items()}
+        with self._lock:
+            self.histograms.update(histograms)
+            self.counters.update(snapshot['counters'])
+
+    # ----
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    # ----
+    def to_prometheus(self, extra_histograms=(), extra_counters=()):
+        """
+        :param extra_histograms: [(name, {label: value}, Histogram)] kept elsewhere, ie exchange REST latency
+        :param extra_counters: [(name, {label: value}, value)] kept elsewhere whether or not metrics are enabled,
+                               ie response cache hits. they replace the registry's own series with the same labels
+        :return: text exposition format 0.0.4
+        """
+        histograms = {name: dict(series) for name, series in list(self.histograms.items())}
+        for name, labels, histogram in extra_histograms:
+            histograms.setdefault(name, {})[tuple(sorted(labels.items()))] = histogram
+
+        lines = []
+        for name in sorted(histograms):
+            if name in self.descriptions:
+                lines.append(f'# HELP {name} {self.descriptions[name]}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, histogram in sorted(histograms[name].items()):
+                lines.extend(format_histogram(name, labels, histogram))
+
+        with self._lock:
+            counters = {name: dict(series) for name, series in self.counters.items()}
+        for name, labels, value in extra_counters:
+            counters.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+        for name in sorted(counters):
+            if name in self.descriptions:
+                lines.append(f'# HELP {name} {self.descriptions[name]}')
+            lines.append(f'# TYPE {name} counter')
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f'{name}{format_labels(labels)} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = MetricsRegistry()
+METRICS.describe('technical_analysis_seconds', 'run_ta over every pair, one observation per pass')
+METRICS.describe('strategy_evaluation_seconds', 'evaluating one set of strategies against every pair')
+METRICS.describe('order_handling_seconds', 'acting on one cycle of possible trades, including depth and orders')
+METRICS.describe('trade_cycle_seconds', 'one LiquiTrader.trade_cycle')
+METRICS.describe('orders_placed_total', 'orders placed by the trader')
+METRICS.describe('socket_handler_seconds', 'handling one websocket message')
+METRICS.describe('gui_request_seconds', 'GUI / API request handling by route')
+METRICS.describe('exchange_request_seconds', 'exchange REST request latency by endpoint')
+METRICS.describe('exchange_loop_lag_seconds', 'how late the exchange event loop woke up a sleeping task')
+
+
+if __name__ == '__main__':
+    tracker = LatencyTracker()
+    for latency in (0.004, 0.03, 0.03, 0.2, 12):
+        tracker.observe('depth', latency)
+    print(tracker.get_stats())
+
+    METRICS.enabled = True
+    with METRICS.time('technical_analysis_seconds'):
+        time.sleep(0.01)
+    METRICS.increment('orders_placed_total', side='buy')
+    print(METRICS.to_prometheus(extra_histograms=[('exchange_request_seconds', {'endpoint': 'depth'},
+                                                   tracker.histograms['depth'])]))
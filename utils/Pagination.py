@@ -0,0 +1,93 @@
+"""
+page / limit / sort / filter query arguments for the GUI's table endpoints
+
+    /api/market?page=2&limit=50&sort=-Volume&filter=eth
+
+Without any of these arguments endpoints keep their old response, with them the response is a single encoded
+{"total": rows after filtering, "page": 2, "limit": 50, "data": [...rows]}
+"""
+import pandas as pd
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+PAGE_ARGS = ('page', 'limit', 'sort', 'filter')
+
+
+class PageRequest:
+    __slots__ = ('page', 'limit', 'sort', 'descending', 'filter')
+
+    def __init__(self, page=1, limit=DEFAULT_LIMIT, sort=None, descending=False, filter=None):
+        self.page = page
+        self.limit = limit
+        self.sort = sort
+        self.descending = descending
+        self.filter = filter
+
+
+# ----
+def parse_page_args(args, aliases=None):
+    """
+    :param args: query arguments (flask.request.args or a dict)
+    :param aliases: {column: display name}, sort accepts either name
+    :return: PageRequest, None when no paging argument was given (legacy response)
+    :raises ValueError: on a malformed page / limit
+    """
+    if not any(name in args for name in PAGE_ARGS):
+        return None
+
+    try:
+        page = int(args.get('page', 1))
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        raise ValueError('page and limit must be integers')
+
+    if page < 1 or not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f'page must be at least 1 and limit between 1 and {MAX_LIMIT}')
+
+    sort = args.get('sort') or None
+    descending = False
+    if sort is not None:
+        descending = sort.startswith('-')
+        sort = sort.lstrip('-+')
+        columns = {display: column for column, display in (aliases or {}).items()}
+        sort = columns.get(sort, sort)
+
+    return PageRequest(page, limit, sort, descending, args.get('filter') or None)
+
+
+# ----
+def paginate(df, page_request, filter_column='symbol'):
+    """
+    filter, sort then slice df, sorting is stable so equal rows keep their order (ie trade history order)
+    :param filter_column: the filter argument is a case insensitive substring of this column
+    :return: (rows after filtering, page of df)
+    :raises ValueError: sorting by a column df doesn't have
+    """
+    if page_request.filter and filter_column in df:
+        df = df[df[filter_column].astype(str).str.contains(page_request.filter, case=False, regex=False)]
+
+    if page_request.sort is not None:
+        if page_request.sort not in df:
+            raise ValueError(f'can\'t sort by {page_request.sort}')
+
+        df = df.sort_values(page_request.sort, ascending=not page_request.descending, kind='stable',
+                            na_position='last')
+
+    start = (page_request.page - 1) * page_request.limit
+    return len(df), df.iloc[start:start + page_request.limit]
+
+
+def to_page_json(df, total, page_request):
+    """
+    :return: the envelope as a JSON str, rows are encoded once by pandas and not parsed again
+    """
+    rows = df.to_json(orient='records') if len(df) else '[]'
+    return f'{{"total":{total},"page":{page_request.page},"limit":{page_request.limit},"data":{rows}}}'
+
+
+if __name__ == '__main__':
+    frame = pd.DataFrame({'symbol': ['ADA/ETH', 'XRP/ETH', 'ADA/BTC'], 'close': [3, 1, 2]})
+    request = parse_page_args({'sort': '-Price', 'filter': 'ada', 'limit': '1'}, {'close': 'Price'})
+
+    total, page = paginate(frame, request)
+    print(to_page_json(page, total, request))
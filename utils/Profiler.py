@@ -0,0 +1,133 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+# cProfile / profile are excluded from frozen builds (see setup.py), this only needs sys._current_frames
+DEFAULT_INTERVAL = 0.005
+MAX_DURATION = 120
+
+# one profile at a time, overlapping samplers would just slow each other (and the bot) down
+_profile_lock = threading.Lock()
+
+
+def format_frame(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def get_stack(frame):
+    """
+    :return: frame names from the thread's entry point down to the running frame
+    """
+    stack = []
+    while frame is not None:
+        stack.append(format_frame(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+# =============================
+class SamplingProfiler:
+    """
+    Statistical profiler for a running process, every interval it records the stack of each thread
+
+    Stacks are rooted at the thread's name (see liquitrader.main for the trader / gui / exchange threads),
+    output is the collapsed stack format flamegraph.pl and speedscope read: "thread;outer;...;inner count"
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, thread_prefixes=None):
+        """
+        :param interval: seconds between samples
+        :param thread_prefixes: only sample threads whose name starts with one of these, all threads when None
+        """
+        self.interval = interval
+        self.thread_prefixes = tuple(thread_prefixes) if thread_prefixes else None
+        self.counts = collections.Counter()
+        self.samples = 0
+
+    # ----
+    def is_profiled(self, name):
+        return self.thread_prefixes is None or name.startswith(self.thread_prefixes)
+
+    # ----
+    def sample(self):
+        own_ident = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, f'thread-{ident}')
+            if ident == own_ident or not self.is_profiled(name):
+                continue
+
+            self.counts[';'.join([name] + get_stack(frame))] += 1
+
+        self.samples += 1
+
+    # ----
+    def run(self, duration):
+        """
+        sample for duration seconds on the calling thread
+        :return: self.counts
+        """
+        interval = self.interval
+        end = time.perf_counter() + duration
+        next_sample = time.perf_counter()
+
+        while next_sample < end:
+            self.sample()
+            next_sample += interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # sampling fell behind, don't burst to catch up
+                next_sample = time.perf_counter()
+
+        return self.counts
+
+    # ----
+    def to_collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.counts.items()))
+
+
+# ----
+def check_arguments(duration, interval):
+    """
+    :raises ValueError: for a duration / interval out of range
+    """
+    if not 0 < duration <= MAX_DURATION:
+        raise ValueError(f'profile duration must be between 0 and {MAX_DURATION} seconds')
+    if not 0 < interval < duration:
+        raise ValueError('profile interval must be positive and shorter than the duration')
+
+
+def profile(duration, interval=DEFAULT_INTERVAL, thread_prefixes=None):
+    """
+    :param duration: seconds, at most MAX_DURATION
+    :return: collapsed stacks, None when another profile is already running
+    :raises ValueError: for a duration / interval out of range
+    """
+    check_arguments(duration, interval)
+
+    if not _profile_lock.acquire(blocking=False):
+        return None
+
+    try:
+        profiler = SamplingProfiler(interval, thread_prefixes)
+        profiler.run(duration)
+        return profiler.to_collapsed()
+
+    finally:
+        _profile_lock.release()
+
+
+if __name__ == '__main__':
+    def busy():
+        while True:
+            sum(i * i for i in range(10000))
+
+    threading.Thread(target=busy, name='trader', daemon=True).start()
+    print(profile(0.5, thread_prefixes=('trader',)))
@@ -0,0 +1,106 @@
+import threading
+import time
+
+from utils.Metrics import METRICS
+
+# seconds a response is reused while the engine state version is unchanged, general setting "response_cache_ttls"
+# overrides these per route, 0 turns caching off for a route
+DEFAULT_TTLS = {
+    'analyzers': 2,
+    'stats': 10,
+    'config': 60,
+    'holding': 2,
+}
+
+METRICS.describe('response_cache_total', 'GUI responses served from the response cache (hit) or rebuilt (miss)')
+
+
+class ResponseCache:
+    """
+    Built responses keyed by route, reused until the engine state version changes or the TTL runs out
+
+    The version is whatever the caller keys a route on, gui_server uses LiquiTrader.get_state_version for the
+    state the route shows (ie stats only follow TA passes, not ticker flushes). The TTL bounds staleness for
+    anything it doesn't track (ie trailing entries moving between ticks)
+    """
+
+    def __init__(self, ttls=None):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        # {key: (version, expires, value)}
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+
+    # ----
+    def get(self, key, version, build, ttl=None):
+        """
+        :param build: called without arguments on a miss, its result is cached
+        :param ttl: seconds, defaults to self.ttls[key]
+        """
+        ttl = self.ttls.get(key, 0) if ttl is None else ttl
+        if ttl <= 0:
+            return build()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+            self._count(self.hits, key, 'hit')
+            return entry[2]
+
+        # one build per key at a time, concurrent polls of the same route wait for it instead of repeating it
+        with self._get_key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+                self._count(self.hits, key, 'hit')
+                return entry[2]
+
+            value = build()
+            self._entries[key] = (version, time.monotonic() + ttl, value)
+
+        self._count(self.misses, key, 'miss')
+        return value
+
+    # ----
+    def _get_key_lock(self, key):
+        lock = self._key_locks.get(key)
+        if lock is None:
+            with self._lock:
+                lock = self._key_locks.setdefault(key, threading.Lock())
+        return lock
+
+    def _count(self, counts, key, result):
+        with self._lock:
+            counts[key] = counts.get(key, 0) + 1
+        METRICS.increment('response_cache_total', route=key, result=result)
+
+    # ----
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries = {}
+        else:
+            self._entries.pop(key, None)
+
+    # ----
+    def get_stats(self):
+        with self._lock:
+            return {key: {'hits': self.hits.get(key, 0), 'misses': self.misses.get(key, 0)}
+                    for key in set(self.hits) | set(self.misses)}
+
+    def get_counters(self):
+        """
+        :return: get_stats as response_cache_total series for METRICS.to_prometheus, counted even with metrics off
+        """
+        counters = []
+        for key, stats in sorted(self.get_stats().items()):
+            counters.append(('response_cache_total', {'route': key, 'result': 'hit'}, stats['hits']))
+            counters.append(('response_cache_total', {'route': key, 'result': 'miss'}, stats['misses']))
+        return counters
+
+
+if __name__ == '__main__':
+    cache = ResponseCache()
+    for version in (1, 1, 1, 2):
+        print(cache.get('analyzers', version, lambda: f'built for {version}'))
+    print(cache.get_stats())
+    print(METRICS.to_prometheus(extra_counters=cache.get_counters()))
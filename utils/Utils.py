@@ -1,3 +1,6 @@
+import functools
+
+import arrow
 import pandas as pd
 
 
@@ -42,11 +45,10 @@ def is_whitelisted(pair, whitelist):
 
 
 def get_average_market_change(pairs):
-    try:
-        return pd.DataFrame.from_dict(pairs, orient='index').percentage.mean()
-    except Exception as ex:
-        print(ex)
-        return 0
+    # mean of the pairs' 24h change, missing / nan values are skipped
+    changes = [pair['percentage'] for pair in pairs.values()
+               if pair.get('percentage') is not None and pair['percentage'] == pair['percentage']]
+    return sum(changes) / len(changes) if changes else 0
 
 
 def in_max_spread(close, fill_price, max_spread):
@@ -74,6 +76,21 @@ def get_current_pending_value(pairs, balance):
     return pd.DataFrame.from_dict(pairs, orient='index').total_cost.sum() + balance
 
 
+# ----
+@functools.lru_cache(maxsize=16)
+def get_timezone(name):
+    """
+    tzinfo for a config timezone, parsed once per name with arrow's parser so anything Arrow.to takes works
+    invalid names fall back to UTC
+    """
+    try:
+        return arrow.parser.TzinfoParser.parse(name)
+
+    except arrow.parser.ParserError:
+        print('Invalid timezone in config, defaulting to UTC')
+        return arrow.parser.TzinfoParser.parse('UTC')
+
+
 if __name__ == '__main__':
     # false
     print(below_max_pairs(10, 10))